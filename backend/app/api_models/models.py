@@ -1,5 +1,7 @@
+import datetime
+
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class APIReading(BaseModel):
@@ -19,6 +21,22 @@ class APIMeter(BaseModel):
     description: Optional[str]
 
 
+class APIMeterFilter(BaseModel):
+    meter_type: Optional[str] = None
+    serial_prefix: Optional[str] = None
+    ppe_prefix: Optional[str] = None
+    description: Optional[str] = None
+
+
+class APIReadingsBatch(BaseModel):
+    facility_names: List[str]
+    meter_types: Optional[List[str]] = None
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+
 class APIFacility(BaseModel):
     name: str
     address: str
@@ -39,3 +57,37 @@ class APIUser(BaseModel):
 class APIUserLogin(BaseModel):
     email: str
     password: str
+
+
+class APIRefreshToken(BaseModel):
+    refresh_token: str
+
+
+class APIConsumptionMonth(BaseModel):
+    month: str
+    value: Optional[float]
+    usage: Optional[float]
+
+
+class APIConsumptionRow(BaseModel):
+    facility_name: str
+    serial_number: str
+    ppe: Optional[str]
+    multiply_factor: float
+    months: List[APIConsumptionMonth]
+
+
+class APIConsumptionReport(BaseModel):
+    months: List[str]
+    rows: List[APIConsumptionRow]
+    total: List[Optional[float]]
+
+
+class APIBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class APIBulkResult(BaseModel):
+    created: int
+    errors: List[APIBulkError]
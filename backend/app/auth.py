@@ -0,0 +1,246 @@
+"""Signed session tokens issued by ``/login``.
+
+Tokens are compact JWTs signed with HMAC-SHA256 (HS256). An access token
+is checked by recomputing its signature, so an authenticated request costs
+one HMAC and no bcrypt verify or database query. Access tokens live a few
+minutes; the longer-lived refresh token is exchanged at ``/refresh`` for a
+new pair.
+
+Revocation is kept in memory: ``revoke`` denylists one token until it
+expires, ``revoke_user`` rejects every token issued to a user before now,
+e.g. after the user is blocked or their role changes. Like the in-memory
+response cache, the denylist is per worker process, so a revoked access
+token stays usable on other workers until it expires.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+logger = logging.getLogger(__name__)
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, forged, expired or revoked."""
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    email: str
+    access_level: int
+    token_type: str
+    token_id: str
+    issued_at: float
+    expires_at: float
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenDenylist:
+    """Revoked token ids and per-user revocation times, held in memory."""
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, float] = {}
+        self._users: Dict[str, float] = {}
+
+    def revoke(self, claims: TokenClaims) -> None:
+        """Reject the token until it expires."""
+        now = time.time()
+        # Expired tokens fail validation anyway, drop them to bound the size
+        for token_id in [t for t, expires in self._tokens.items() if expires < now]:
+            del self._tokens[token_id]
+        self._tokens[claims.token_id] = claims.expires_at
+
+    def revoke_user(self, email: str, max_ttl: float) -> None:
+        """Reject every token issued to ``email`` before now."""
+        now = time.time()
+        for user in [u for u, revoked in self._users.items() if revoked + max_ttl < now]:
+            del self._users[user]
+        self._users[email] = now
+
+    def is_revoked(self, claims: TokenClaims) -> bool:
+        if claims.token_id in self._tokens:
+            return True
+        revoked_at = self._users.get(claims.email)
+        return revoked_at is not None and claims.issued_at <= revoked_at
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+
+class TokenIssuer:
+    """Issues and validates HS256 tokens."""
+
+    def __init__(
+        self,
+        secret: bytes,
+        access_ttl: float = 900.0,
+        refresh_ttl: float = 7 * 24 * 3600.0,
+    ) -> None:
+        """Initialize the issuer.
+
+        Args:
+            secret: HMAC key shared by all workers
+            access_ttl: Seconds an access token is valid
+            refresh_ttl: Seconds a refresh token is valid
+        """
+        self.secret = secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.denylist = TokenDenylist()
+
+    def _sign(self, signing_input: bytes) -> str:
+        return _b64encode(hmac.new(self.secret, signing_input, hashlib.sha256).digest())
+
+    def issue(self, email: str, access_level: int, token_type: str = ACCESS) -> str:
+        """Return a signed token of ``token_type`` for the user."""
+        now = time.time()
+        ttl = self.access_ttl if token_type == ACCESS else self.refresh_ttl
+        payload = {
+            "sub": email,
+            "lvl": access_level,
+            "typ": token_type,
+            "jti": secrets.token_urlsafe(12),
+            "iat": now,
+            "exp": now + ttl,
+        }
+        signing_input = (
+            _b64encode(json.dumps(_HEADER, separators=(",", ":")).encode())
+            + "."
+            + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        )
+        return signing_input + "." + self._sign(signing_input.encode())
+
+    def issue_pair(self, email: str, access_level: int) -> Dict[str, Any]:
+        """Return the token fields of a login or refresh response."""
+        return {
+            "access_token": self.issue(email, access_level, ACCESS),
+            "refresh_token": self.issue(email, access_level, REFRESH),
+            "token_type": "bearer",
+            "expires_in": int(self.access_ttl),
+        }
+
+    def validate(self, token: str, token_type: str = ACCESS) -> TokenClaims:
+        """Check the signature, type, expiry and revocation of a token.
+
+        Raises:
+            TokenError: If the token is not valid
+        """
+        try:
+            header, payload, signature = token.split(".")
+        except ValueError:
+            raise TokenError("Malformed token")
+        expected = self._sign(f"{header}.{payload}".encode())
+        if not hmac.compare_digest(signature, expected):
+            raise TokenError("Invalid token signature")
+        try:
+            data = json.loads(_b64decode(payload))
+            claims = TokenClaims(
+                email=data["sub"],
+                access_level=data["lvl"],
+                token_type=data["typ"],
+                token_id=data["jti"],
+                issued_at=data["iat"],
+                expires_at=data["exp"],
+            )
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise TokenError("Malformed token")
+        if claims.token_type != token_type:
+            raise TokenError(f"Expected a {token_type} token")
+        if claims.expires_at < time.time():
+            raise TokenError("Token expired")
+        if self.denylist.is_revoked(claims):
+            raise TokenError("Token revoked")
+        return claims
+
+    def revoke(self, claims: TokenClaims) -> None:
+        """Reject the token described by ``claims`` from now on."""
+        self.denylist.revoke(claims)
+
+    def revoke_user(self, email: str) -> None:
+        """Reject all tokens issued to ``email`` so far."""
+        self.denylist.revoke_user(email, max(self.access_ttl, self.refresh_ttl))
+
+
+def issuer_from_env() -> TokenIssuer:
+    """Create the token issuer configured by the environment.
+
+    Environment variables:
+        AUTH_SECRET: HMAC key; must be set and equal on all workers,
+            otherwise a random key is used and tokens do not survive
+            a restart
+        ACCESS_TOKEN_TTL: Seconds an access token is valid (default 900)
+        REFRESH_TOKEN_TTL: Seconds a refresh token is valid (default 7 days)
+    """
+    secret = os.environ.get("AUTH_SECRET")
+    if not secret:
+        logger.warning("AUTH_SECRET is not set, using a random per-process key")
+        secret = secrets.token_urlsafe(32)
+    return TokenIssuer(
+        secret.encode(),
+        access_ttl=float(os.environ.get("ACCESS_TOKEN_TTL", 900)),
+        refresh_ttl=float(os.environ.get("REFRESH_TOKEN_TTL", 7 * 24 * 3600)),
+    )
+
+
+tokens = issuer_from_env()
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> TokenClaims:
+    """FastAPI dependency returning the claims of a valid bearer access token."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return tokens.validate(credentials.credentials, ACCESS)
+    except TokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def require_access_level(level: int):
+    """Dependency factory allowing users with ``access_level`` <= ``level``.
+
+    Lower levels have more rights, 1 being an administrator.
+    """
+
+    async def dependency(user: TokenClaims = Depends(current_user)) -> TokenClaims:
+        if user.access_level > level:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient access level"
+            )
+        return user
+
+    return dependency
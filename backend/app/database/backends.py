@@ -0,0 +1,115 @@
+import os
+from typing import Any, Dict
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database import pooling
+
+CLOUD_SQL = "cloudsql"
+POSTGRES = "postgres"
+SQLITE = "sqlite"
+BACKENDS = (CLOUD_SQL, POSTGRES, SQLITE)
+
+DEFAULT_SQLITE_URL = "sqlite:///smart_energy.db"
+
+# Drivers used for each backend by the sync and the asyncio engine.
+SYNC_DRIVERS = {POSTGRES: "postgresql+pg8000", SQLITE: "sqlite"}
+ASYNC_DRIVERS = {POSTGRES: "postgresql+asyncpg", SQLITE: "sqlite+aiosqlite"}
+
+
+def backend_name() -> str:
+    """Return the configured database backend.
+
+    Environment variables:
+        DB_BACKEND: "cloudsql" (default), "postgres" or "sqlite"
+
+    Raises:
+        ValueError: If DB_BACKEND names an unknown backend
+    """
+    backend = os.environ.get("DB_BACKEND", CLOUD_SQL).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown DB_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}"
+        )
+    return backend
+
+
+def database_url(backend: str, asyncio: bool = False) -> sqlalchemy.engine.URL:
+    """Return the DATABASE_URL of a DSN backend with the driver set.
+
+    The scheme of DATABASE_URL only selects the database; the driver is
+    replaced with the one this client uses, so the same DSN serves the sync
+    and the asyncio engine. Unix sockets are given as ``?host=<directory>``.
+
+    Args:
+        backend: "postgres" or "sqlite"
+        asyncio: Return the URL for the asyncio engine
+
+    Raises:
+        ValueError: If DATABASE_URL is missing for PostgreSQL
+    """
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        if backend != SQLITE:
+            raise ValueError("DATABASE_URL must be set for the postgres backend")
+        url = DEFAULT_SQLITE_URL
+    drivers = ASYNC_DRIVERS if asyncio else SYNC_DRIVERS
+    url = make_url(url).set(drivername=drivers[backend])
+
+    # A Unix socket directory is given libpq style (?host=/cloudsql/...);
+    # pg8000 takes the path of the socket file instead
+    socket_dir = url.query.get("host")
+    if backend == POSTGRES and not asyncio and socket_dir and socket_dir.startswith("/"):
+        socket = f"{socket_dir.rstrip('/')}/.s.PGSQL.{url.port or 5432}"
+        url = url.difference_update_query(["host"]).update_query_dict({"unix_sock": socket})
+    return url
+
+
+def _engine_options(url: sqlalchemy.engine.URL) -> Dict[str, Any]:
+    """Return pool settings for ``url``.
+
+    In-memory SQLite lives in a single connection, which is shared by all
+    checkouts instead of being pooled.
+    """
+    if url.get_backend_name() == SQLITE and url.database in (None, "", ":memory:"):
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    return pooling.pool_options()
+
+
+def _enable_sqlite_foreign_keys(engine: sqlalchemy.engine.Engine) -> None:
+    """Turn on the ON DELETE actions the client relies on for SQLite."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragma(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def create_engine(backend: str) -> sqlalchemy.engine.Engine:
+    """Create the engine of a DSN backend from DATABASE_URL.
+
+    Args:
+        backend: "postgres" or "sqlite"
+
+    Returns:
+        Engine with the pool configured from the environment
+    """
+    url = database_url(backend)
+    engine = sqlalchemy.create_engine(url, **_engine_options(url))
+    if backend == SQLITE:
+        _enable_sqlite_foreign_keys(engine)
+    return engine
+
+
+def create_asyncio_engine(backend: str) -> AsyncEngine:
+    """Asyncio counterpart of ``create_engine``, using asyncpg or aiosqlite."""
+    url = database_url(backend, asyncio=True)
+    engine = create_async_engine(url, **_engine_options(url))
+    if backend == SQLITE:
+        _enable_sqlite_foreign_keys(engine.sync_engine)
+    return engine
@@ -1,77 +1,369 @@
+import asyncio
+import contextlib
+import contextvars
+import datetime
+import itertools
 import os
-import uuid
-from typing import List, Optional, Dict, Any, Union
-from passlib.hash import bcrypt
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Union, Iterable, Iterator, Set, Tuple, AsyncIterator, Awaitable, Callable
 
 from dotenv import load_dotenv
-from google.cloud.sql.connector import Connector
-import pg8000
 import sqlalchemy
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.util import await_only, greenlet_spawn
 
 from app.api_models.models import *
+from app.database import backends, migrations, passwords, pooling, query_metrics, rollup, schema
+
+# Rows fetched per round trip when streaming large results.
+STREAM_CHUNK_SIZE = 1000
+
+# Fields of APIReading, in the column order of the reading queries.
+READING_FIELDS = ("reading_id", "value", "reading_date", "meter_serial_number", "email")
+
+# Sort keys of search_meters and search_readings and the column each orders
+# by; ties are broken by the serial number or reading ID respectively.
+METER_SORT_COLUMNS = {
+    "serial_number": "meters.serial_number",
+    "meter_type": "meters.meter_type",
+}
+READING_SORT_COLUMNS = {
+    "reading_date": "readings.reading_date",
+    "value": "readings.value",
+    "serial_number": "meters.serial_number",
+}
+
+
+class IdCache:
+    """Bounded LRU cache of natural key -> surrogate ID lookups with a TTL.
+
+    Entries are keyed by ``(entity_type, value)``, e.g. ``("meters", "SN1")``.
+    Only successful lookups are cached. The TTL bounds how long another
+    worker process may keep serving an ID that was invalidated elsewhere.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of cached IDs
+            ttl: Seconds after which an entry is looked up again
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, entity_type: str, value: str) -> Optional[int]:
+        """Return the cached ID or None, counting a hit or a miss."""
+        key = (entity_type, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, entity_type: str, value: str, entity_id: int) -> None:
+        """Cache an ID, evicting the least recently used entry when full."""
+        key = (entity_type, value)
+        with self._lock:
+            self._entries[key] = (entity_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, entity_type: str, value: Optional[str] = None) -> None:
+        """Drop one entry, or every entry of ``entity_type`` if value is None."""
+        with self._lock:
+            if value is not None:
+                self._entries.pop((entity_type, value), None)
+                return
+            for key in [key for key in self._entries if key[0] == entity_type]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
 
 
 class DataBase:
     """Database client for Smart Energy application."""
 
-    def __init__(self) -> None:
-        """Initialize database connection pool using Cloud SQL connector."""
-        self.connector = Connector()
-        self.pool = sqlalchemy.create_engine(
-            "postgresql+pg8000://",
-            creator=lambda: self.connector.connect(
-                os.environ.get("INSTANCE_CONNECTION_NAME"),
-                "pg8000",
-                user=os.environ.get("DB_USER"),
-                password=os.environ.get("DB_PASSWORD"),
-                db=os.environ.get("DB_NAME"),
-            ),
+    def __init__(self, pool: Optional[sqlalchemy.engine.Engine] = None) -> None:
+        """Initialize the connection pool of the configured backend.
+
+        DB_BACKEND selects Cloud SQL (default), a PostgreSQL DSN or SQLite,
+        see ``backends.create_engine``.
+
+        Args:
+            pool: Optional engine to run the queries on instead of the
+                configured backend
+        """
+        self.connector = None
+        if pool is None and backends.backend_name() != backends.CLOUD_SQL:
+            pool = backends.create_engine(backends.backend_name())
+        if pool is None:
+            # Imported here: the connector and its google-auth/aiohttp stack
+            # take a large share of the import time on cold starts
+            from google.cloud.sql.connector import Connector
+
+            self.connector = Connector()
+            pool = sqlalchemy.create_engine(
+                "postgresql+pg8000://",
+                creator=lambda: self.connector.connect(
+                    os.environ.get("INSTANCE_CONNECTION_NAME"),
+                    "pg8000",
+                    user=os.environ.get("DB_USER"),
+                    password=os.environ.get("DB_PASSWORD"),
+                    db=os.environ.get("DB_NAME"),
+                ),
+                **pooling.pool_options(),
+            )
+        self.pool = pool
+        pooling.instrument_engine(pool)
+        query_metrics.instrument_engine(pool)
+        # Connection of the unit of work running in the current thread or
+        # task; concurrent requests on the event loop each see their own
+        self._unit_of_work: "contextvars.ContextVar[Optional[sqlalchemy.engine.Connection]]" = (
+            contextvars.ContextVar(f"unit_of_work_{id(self)}", default=None)
+        )
+        # IDs cached during that unit of work, evicted if it rolls back
+        self._cached_ids: "contextvars.ContextVar[Optional[Set[Tuple[str, str]]]]" = (
+            contextvars.ContextVar(f"cached_ids_{id(self)}", default=None)
+        )
+        self.bcrypt_rounds = passwords.bcrypt_rounds()
+        self.id_cache = IdCache(
+            max_size=int(os.environ.get("ID_CACHE_SIZE", 10000)),
+            ttl=float(os.environ.get("ID_CACHE_TTL", 300)),
         )
 
     # ==================== Private Helper Methods ====================
 
+    def close(self) -> None:
+        """Dispose of the connection pool and close the Cloud SQL connector."""
+        self.pool.dispose()
+        if self.connector is not None:
+            self.connector.close()
+
+    def create_schema(self, drop: bool = False) -> None:
+        """Apply pending schema migrations, see ``migrations.create_schema``."""
+        migrations.create_schema(self.pool, drop=drop)
+
+    def _connect(self) -> sqlalchemy.engine.Connection:
+        """Check out a pooled connection, recording checkout latency."""
+        return pooling.checkout(self.pool)
+
+    @contextlib.contextmanager
+    def unit_of_work(self) -> Iterator[sqlalchemy.engine.Connection]:
+        """Run several queries on one connection and commit them together.
+
+        Queries run through the helper methods inside the block, including
+        nested calls to other DataBase methods, share the connection and are
+        committed once when the block exits; an exception rolls all of them
+        back. A nested unit of work joins the outer one.
+
+        Yields:
+            Connection of the unit of work
+        """
+        conn = self._unit_of_work.get()
+        if conn is not None:
+            yield conn
+            return
+        with self._connect() as conn:
+            token = self._unit_of_work.set(conn)
+            cached_ids: Set[Tuple[str, str]] = set()
+            cached_token = self._cached_ids.set(cached_ids)
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                # IDs looked up inside the block may belong to rows that
+                # were just rolled back
+                for entity_type, value in cached_ids:
+                    self.id_cache.invalidate(entity_type, value)
+                raise
+            finally:
+                self._cached_ids.reset(cached_token)
+                self._unit_of_work.reset(token)
+
+    def _cache_id(self, entity_type: str, value: str, entity_id: int) -> None:
+        """Cache an ID, remembering it if a unit of work is running."""
+        self.id_cache.set(entity_type, value, entity_id)
+        cached_ids = self._cached_ids.get()
+        if cached_ids is not None:
+            cached_ids.add((entity_type, value))
+
+    @contextlib.contextmanager
+    def _reading(self) -> Iterator[sqlalchemy.engine.Connection]:
+        """Yield the connection of the current unit of work, or check out
+        one for a read that needs no commit."""
+        conn = self._unit_of_work.get()
+        if conn is not None:
+            yield conn
+            return
+        with self._connect() as conn:
+            yield conn
+
+    @query_metrics.timed("execute", rows=lambda rowcount: rowcount)
     def _execute_query(
         self, query: str, params: Optional[Dict[str, Any]] = None
-    ) -> None:
+    ) -> int:
         """Execute a database query with optional parameters.
 
         Args:
             query: SQL query string
             params: Optional parameters for the query
+
+        Returns:
+            Number of rows affected by the query
         """
         try:
-            with self.pool.connect() as conn:
+            with self.unit_of_work() as conn:
                 if params:
-                    conn.execute(text(query), params)
+                    result = conn.execute(text(query), params)
                 else:
-                    conn.execute(text(query))
-                conn.commit()
+                    result = conn.execute(text(query))
+                return result.rowcount
         except Exception as e:
             raise DatabaseError(f"Error executing query: {str(e)}")
 
-    def _fetch_query_results(
+    @query_metrics.timed("returning", rows=len)
+    def _execute_returning(
         self, query: str, params: Optional[Dict[str, Any]] = None
+    ) -> List[tuple]:
+        """Execute a writing query with a RETURNING clause and commit it.
+
+        Args:
+            query: SQL query string
+            params: Optional parameters for the query
+
+        Returns:
+            List of returned tuples
+        """
+        try:
+            with self.unit_of_work() as conn:
+                return conn.execute(text(query), params or {}).fetchall()
+        except Exception as e:
+            raise DatabaseError(f"Error executing query: {str(e)}")
+
+    @query_metrics.timed("transaction", rows=lambda result: None)
+    def _execute_queries(
+        self, queries: Iterable[Tuple[Union[str, TextClause], Optional[Dict[str, Any]]]]
+    ) -> None:
+        """Execute several queries on one connection and commit them together.
+
+        Args:
+            queries: (SQL query string or statement, optional parameters)
+                pairs, in order; a list of parameter dicts runs the query
+                once per dict
+        """
+        try:
+            with self.unit_of_work() as conn:
+                for query, params in queries:
+                    statement = text(query) if isinstance(query, str) else query
+                    if params:
+                        conn.execute(statement, params)
+                    else:
+                        conn.execute(statement)
+        except Exception as e:
+            raise DatabaseError(f"Error executing query: {str(e)}")
+
+    def _statement(self, query: str, expanding: Iterable[str] = ()) -> TextClause:
+        """Build a statement binding the ``expanding`` parameters as lists.
+
+        Args:
+            query: SQL query string
+            expanding: Names of list parameters used as ``IN :name``, which
+                unlike ``= ANY(:name)`` works on SQLite as well
+        """
+        statement = text(query)
+        if expanding:
+            statement = statement.bindparams(
+                *(sqlalchemy.bindparam(name, expanding=True) for name in expanding)
+            )
+        return statement
+
+    @query_metrics.timed("fetch", rows=len)
+    def _fetch_query_results(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        expanding: Iterable[str] = (),
     ) -> List[tuple]:
         """Execute a query and return fetched results.
 
         Args:
             query: SQL query string
             params: Optional parameters for the query
+            expanding: Names of list parameters, see ``_statement``
 
         Returns:
             List of result tuples
         """
+        statement = self._statement(query, expanding)
         try:
-            with self.pool.connect() as conn:
+            with self._reading() as conn:
                 if params:
-                    result = conn.execute(text(query), params).fetchall()
+                    result = conn.execute(statement, params).fetchall()
                 else:
-                    result = conn.execute(text(query)).fetchall()
+                    result = conn.execute(statement).fetchall()
                 return result
         except Exception as e:
             raise DatabaseError(f"Error fetching query results: {str(e)}")
 
+    def _stream_query_results(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        expanding: Iterable[str] = (),
+    ) -> Iterator[tuple]:
+        """Execute a query through a server-side cursor and yield its rows.
+
+        Rows are fetched ``chunk_size`` at a time, so memory use does not
+        grow with the size of the result. The connection stays checked out
+        until the iterator is exhausted or closed.
+
+        Args:
+            query: SQL query string
+            params: Optional parameters for the query
+            chunk_size: Number of rows fetched per round trip
+            expanding: Names of list parameters, see ``_statement``
+
+        Yields:
+            Result tuples
+        """
+        try:
+            with self._connect() as conn:
+                result = conn.execution_options(
+                    stream_results=True, yield_per=chunk_size
+                ).execute(self._statement(query, expanding), params or {})
+                for row in result:
+                    yield row
+        except Exception as e:
+            raise DatabaseError(f"Error streaming query results: {str(e)}")
+
     def _get_entity_id(self, entity_type: str, field: str, value: str) -> int:
         """Get entity ID from a field value.
 
@@ -86,6 +378,10 @@ class DataBase:
         Raises:
             ValueError: If entity not found
         """
+        cached = self.id_cache.get(entity_type, value)
+        if cached is not None:
+            return cached
+
         id_columns = {
             "users": "user_id",
             "meters": "meter_id",
@@ -95,14 +391,54 @@ class DataBase:
 
         params = {field: value}
 
-        with self.pool.connect() as conn:
+        start = time.perf_counter()
+        with self._reading() as conn:
             result = conn.execute(text(query), params).fetchone()
+            if query_metrics.enabled:
+                query_metrics.record("lookup", start, 1 if result else 0, sys._getframe(1))
             if result:
+                self._cache_id(entity_type, value, result[0])
                 return result[0]
             raise ValueError(
                 f"{entity_type[:-1].capitalize()} with {field} {value} not found"
             )
 
+    def _get_entity_ids(
+        self, entity_type: str, field: str, values: List[str]
+    ) -> Dict[str, int]:
+        """Get entity IDs for many field values in a single query.
+
+        Args:
+            entity_type: Type of entity (users, meters, facilities)
+            field: Field to search in
+            values: Values to search for
+
+        Returns:
+            Mapping of found field values to entity IDs; missing values are
+            left out
+        """
+        id_columns = {
+            "users": "user_id",
+            "meters": "meter_id",
+            "facilities": "facility_id",
+        }
+        ids: Dict[str, int] = {}
+        missing = []
+        for value in set(values):
+            cached = self.id_cache.get(entity_type, value)
+            if cached is not None:
+                ids[value] = cached
+            else:
+                missing.append(value)
+        if not missing:
+            return ids
+
+        query = f"SELECT {field}, {id_columns[entity_type]} FROM {entity_type} WHERE {field} IN :values"
+        for row in self._fetch_query_results(query, {"values": missing}, expanding=["values"]):
+            self._cache_id(entity_type, row[0], row[1])
+            ids[row[0]] = row[1]
+        return ids
+
     def _get_meter_id(self, serial_number: str) -> int:
         """Get meter ID from serial number."""
         return self._get_entity_id("meters", "serial_number", serial_number)
@@ -115,82 +451,717 @@ class DataBase:
         """Get facility ID from name."""
         return self._get_entity_id("facilities", "name", name)
 
-    def _generate_unique_id(self) -> int:
-        """Generate a unique ID for database records.
+    def _get_facility_ids(self, names: List[str]) -> Dict[str, int]:
+        """Get facility IDs for many facility names."""
+        return self._get_entity_ids("facilities", "name", names)
+
+    def _get_meter_ids(self, serial_numbers: List[str]) -> Dict[str, int]:
+        """Get meter IDs for many serial numbers."""
+        return self._get_entity_ids("meters", "serial_number", serial_numbers)
+
+    def _get_user_ids(self, emails: List[str]) -> Dict[str, int]:
+        """Get user IDs for many emails."""
+        return self._get_entity_ids("users", "email", emails)
+
+    def _fetch_for_entity(
+        self,
+        query: str,
+        params: Dict[str, Any],
+        entity_type: str,
+        field: str,
+        value: str,
+    ) -> List[tuple]:
+        """Fetch a query that joins an entity by name, email or serial number.
+
+        Whether the entity exists is only checked when no rows come back, so
+        a read of an existing entity takes one checkout and one round trip
+        instead of an ID lookup followed by the query.
+
+        Args:
+            query: SQL query filtering on the entity's field
+            params: Query parameters
+            entity_type: Type of entity (users, meters, facilities)
+            field: Field of the entity the query filters on
+            value: Value of the field
+
+        Returns:
+            Result rows
+
+        Raises:
+            ValueError: If there are no rows and the entity does not exist
+        """
+        result = self._fetch_query_results(query, params)
+        if not result:
+            self._get_entity_id(entity_type, field, value)
+        return result
+
+    def _fetch_for_facility(self, query: str, params: Dict[str, Any]) -> List[tuple]:
+        """Fetch a query filtering on ``facilities.name = :facility_name``."""
+        return self._fetch_for_entity(query, params, "facilities", "name", params["facility_name"])
+
+    def _parse_date(self, value: str) -> datetime.date:
+        """Parse an ISO date (YYYY-MM-DD) sent by the API.
+
+        Dates are bound as ``datetime.date`` so that every driver, including
+        asyncpg which does not cast strings, receives a proper date.
+
+        Raises:
+            ValueError: If the value is not an ISO date
+        """
+        try:
+            return datetime.date.fromisoformat(value[:10])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid reading_date {value}")
+
+    def _insert_unless_exists(
+        self, table: str, row: Dict[str, Any], key: str, id_column: str
+    ) -> Optional[int]:
+        """Insert ``row`` into ``table`` unless a row with the same ``key``
+        value exists, with one statement instead of a SELECT and an INSERT.
 
         Returns:
-            Unique integer ID
+            Generated ``id_column`` of the new row, None if it existed
+        """
+        columns = ", ".join(row)
+        # Typed, as PostgreSQL reads untyped parameters in a SELECT list as text
+        table_columns = schema.metadata.tables[table].c
+        values = ", ".join(
+            f"CAST(:{column} AS {table_columns[column].type.compile(dialect=self.pool.dialect)})"
+            for column in row
+        )
+        query = f"""
+        INSERT INTO {table} ({columns})
+        SELECT {values}
+        WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key} = :{key})
+        ON CONFLICT DO NOTHING
+        RETURNING {id_column}
         """
-        return uuid.uuid4().int & 0x7FFFFFFF
+        result = self._execute_returning(query, row)
+        return result[0][0] if result else None
+
+    def _like(self, column: str, param: str) -> str:
+        """Return a case-insensitive LIKE condition on ``column``.
+
+        SQLite has no ILIKE, its LIKE ignores case already. The pattern is
+        expected to be escaped by ``_like_pattern``.
+        """
+        operator = "LIKE" if self.pool.dialect.name == "sqlite" else "ILIKE"
+        return f"{column} {operator} :{param} ESCAPE '\\'"
+
+    def _like_pattern(self, value: str, prefix: bool = False) -> str:
+        """Escape the LIKE wildcards in ``value`` and wrap it in a pattern
+        matching it as a prefix or anywhere in the text."""
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + "%" if prefix else "%" + escaped + "%"
+
+    def _meter_filter_conditions(
+        self, filters: APIMeterFilter, params: Dict[str, Any]
+    ) -> str:
+        """Build the WHERE conditions of a meter search.
+
+        Prefix and substring matches are served by the trigram indexes of
+        the meters table on PostgreSQL.
+
+        Args:
+            filters: Filters to apply, unset ones are ignored
+            params: Query parameters, the filter values are added to it
+
+        Returns:
+            SQL conditions, each starting with AND
+        """
+        conditions = ""
+        if filters.meter_type:
+            conditions += " AND meters.meter_type = :meter_type"
+            params["meter_type"] = filters.meter_type
+        if filters.serial_prefix:
+            conditions += " AND " + self._like("meters.serial_number", "serial_prefix")
+            params["serial_prefix"] = self._like_pattern(filters.serial_prefix, prefix=True)
+        if filters.ppe_prefix:
+            conditions += " AND " + self._like("meters.ppe", "ppe_prefix")
+            params["ppe_prefix"] = self._like_pattern(filters.ppe_prefix, prefix=True)
+        if filters.description:
+            conditions += " AND " + self._like("meters.description", "description")
+            params["description"] = self._like_pattern(filters.description)
+        return conditions
+
+    def _keyset_clause(
+        self,
+        columns: Dict[str, str],
+        sort: str,
+        tiebreaker: str,
+        descending: bool,
+        after: Optional[Tuple[Any, Any]],
+        params: Dict[str, Any],
+    ) -> str:
+        """Build the keyset condition and ORDER BY of a sorted search.
+
+        Args:
+            columns: Sort keys and their columns
+            sort: Sort key
+            tiebreaker: Unique column ordering rows with equal sort keys
+            descending: Sort in descending order
+            after: Optional (sort value, tiebreaker value) of the last row
+                already returned
+            params: Query parameters, the cursor values are added to it
+
+        Rows without a value in a nullable sort column come last in both
+        directions; a cursor with a None sort value points into them.
+
+        Returns:
+            SQL starting with the AND of the keyset condition, if any, and
+            ending with ORDER BY
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in columns:
+            raise ValueError(f"Cannot sort by {sort}")
+        column = columns[sort]
+        table, name = column.split(".")
+        nullable = schema.metadata.tables[table].c[name].nullable
+        direction = "DESC" if descending else "ASC"
+        clause = ""
+        if after is not None:
+            comparison = "<" if descending else ">"
+            params["after_key"], params["after_id"] = after
+            if after[0] is None:
+                clause += f" AND {column} IS NULL AND {tiebreaker} {comparison} :after_id"
+            else:
+                # The bound on the column alone is implied by the row
+                # comparison, but usable for index bounds and partition pruning
+                condition = (
+                    f"{column} {comparison}= :after_key"
+                    f" AND ({column}, {tiebreaker}) {comparison} (:after_key, :after_id)"
+                )
+                if nullable:
+                    condition = f"({condition} OR {column} IS NULL)"
+                clause += f" AND {condition}"
+        nulls = " NULLS LAST" if nullable else ""
+        return clause + f" ORDER BY {column} {direction}{nulls}, {tiebreaker} {direction}"
+
+    def _lock_rollup_queries(self, meter_ids: Optional[List[int]] = None) -> rollup.Queries:
+        """Build the queries serializing rollup updates, see ``rollup.lock_queries``."""
+        return rollup.lock_queries(self.pool.dialect.name, meter_ids)
+
+    def _refresh_month_queries(
+        self, meter_id: int, month: datetime.date
+    ) -> List[Tuple[Union[str, TextClause], Optional[Dict[str, Any]]]]:
+        """Build the queries updating monthly_consumption after a reading
+        of ``meter_id`` in ``month`` was added, changed or removed.
+
+        Only the month itself and the next month with a reading, whose
+        delta depends on it, are touched.
+
+        Args:
+            meter_id: ID of the meter
+            month: Any date within the month
+
+        Returns:
+            (query, params) pairs to run in one transaction
+        """
+        month = month.replace(day=1)
+        params = {
+            "meter_id": meter_id,
+            "month": month,
+            "next_month": (month + datetime.timedelta(days=32)).replace(day=1),
+        }
+        previous_value = """(
+            SELECT p.closing_value
+            FROM monthly_consumption p
+            WHERE p.meter_id = monthly_consumption.meter_id
+              AND p.month < monthly_consumption.month
+            ORDER BY p.month DESC
+            LIMIT 1
+        )"""
+        return self._lock_rollup_queries([meter_id]) + [
+            (
+                "DELETE FROM monthly_consumption WHERE meter_id = :meter_id AND month = :month",
+                params,
+            ),
+            (
+                """
+                INSERT INTO monthly_consumption (meter_id, month, closing_value)
+                VALUES (:meter_id, :month, (
+                    SELECT value
+                    FROM readings
+                    WHERE meter_id = :meter_id
+                      AND reading_date >= :month AND reading_date < :next_month
+                    ORDER BY reading_date DESC, reading_id DESC
+                    LIMIT 1
+                ))
+                """,
+                params,
+            ),
+            # The month has no readings left
+            (
+                """
+                DELETE FROM monthly_consumption
+                WHERE meter_id = :meter_id AND month = :month AND closing_value IS NULL
+                """,
+                params,
+            ),
+            (
+                f"""
+                UPDATE monthly_consumption
+                SET delta = closing_value - {previous_value},
+                    usage = (closing_value - {previous_value}) * (
+                        SELECT multiply_factor FROM meters
+                        WHERE meters.meter_id = monthly_consumption.meter_id
+                    )
+                WHERE meter_id = :meter_id
+                  AND (month = :month OR month = (
+                      SELECT MIN(n.month) FROM monthly_consumption n
+                      WHERE n.meter_id = :meter_id AND n.month > :month
+                  ))
+                """,
+                params,
+            ),
+        ]
+
+    def _rebuild_monthly_consumption_queries(
+        self, meter_ids: Optional[List[int]] = None
+    ) -> rollup.Queries:
+        """Build the queries recomputing monthly_consumption from readings,
+        see ``rollup.rebuild_queries``."""
+        return rollup.rebuild_queries(self.pool.dialect.name, meter_ids)
+
+    def _get_reading_month(self, reading_id: int) -> Optional[Tuple[int, datetime.date]]:
+        """Return the meter ID and date of a reading, None if it does not exist."""
+        result = self._fetch_query_results(
+            "SELECT meter_id, reading_date FROM readings WHERE reading_id = :reading_id",
+            {"reading_id": reading_id},
+        )
+        if not result:
+            return None
+        meter_id, reading_date = result[0]
+        if isinstance(reading_date, str):
+            reading_date = self._parse_date(reading_date)
+        return meter_id, reading_date
+
+    def _hash_password(self, password: str) -> str:
+        """Hash a password with bcrypt."""
+        return passwords.hash_password(password, self.bcrypt_rounds)
+
+    def _verify_password(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password against its bcrypt hash.
+
+        Returns:
+            Whether the password matches, and a new hash if the stored one
+            was made with another cost factor
+        """
+        return passwords.verify_password(password, hashed_password, self.bcrypt_rounds)
 
     # ==================== Reading Methods ====================
 
+    def _readings_query(
+        self,
+        facility_name: str,
+        meter_type: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        after: Optional[Tuple[datetime.date, int]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the query of get_readings, see there for the arguments."""
+        query = """
+        SELECT readings.reading_id, readings.value, readings.reading_date,
+               meters.serial_number, users.email
+        FROM readings
+        JOIN meters ON readings.meter_id = meters.meter_id
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        JOIN users ON readings.user_id = users.user_id
+        WHERE facilities.name = :facility_name
+        """
+
+        params: Dict[str, Any] = {"facility_name": facility_name}
+        if meter_type:
+            query += " AND meters.meter_type = :meter_type"
+            params["meter_type"] = meter_type
+        if date_from is not None:
+            query += " AND readings.reading_date >= :date_from"
+            params["date_from"] = date_from
+        if date_to is not None:
+            query += " AND readings.reading_date <= :date_to"
+            params["date_to"] = date_to
+        if after is not None:
+            # The bound on reading_date alone is implied by the row comparison,
+            # it lets PostgreSQL skip the partitions of earlier months
+            query += (
+                " AND readings.reading_date >= :after_date"
+                " AND (readings.reading_date, readings.reading_id) > (:after_date, :after_id)"
+            )
+            params["after_date"], params["after_id"] = after
+        query += " ORDER BY readings.reading_date, readings.reading_id"
+        if limit is not None:
+            query += " LIMIT :limit"
+            params["limit"] = limit
+        return query, params
+
+    def _search_readings_query(
+        self,
+        facility_name: str,
+        filters: Optional[APIMeterFilter] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        sort: str = "reading_date",
+        descending: bool = False,
+        after: Optional[Tuple[Any, int]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the query of search_readings, see there for the arguments."""
+        query = """
+        SELECT readings.reading_id, readings.value, readings.reading_date,
+               meters.serial_number, users.email
+        FROM readings
+        JOIN meters ON readings.meter_id = meters.meter_id
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        JOIN users ON readings.user_id = users.user_id
+        WHERE facilities.name = :facility_name
+        """
+
+        params: Dict[str, Any] = {"facility_name": facility_name}
+        query += self._meter_filter_conditions(filters or APIMeterFilter(), params)
+        if date_from is not None:
+            query += " AND readings.reading_date >= :date_from"
+            params["date_from"] = date_from
+        if date_to is not None:
+            query += " AND readings.reading_date <= :date_to"
+            params["date_to"] = date_to
+        query += self._keyset_clause(
+            READING_SORT_COLUMNS, sort, "readings.reading_id", descending, after, params
+        )
+        if limit is not None:
+            query += " LIMIT :limit"
+            params["limit"] = limit
+        return query, params
+
+    def _reading_columns(self, rows: List[tuple]) -> Dict[str, List[Any]]:
+        """Transpose reading query rows into one list per APIReading field.
+
+        Dates are ISO strings, as in APIReading.
+        """
+        if not rows:
+            return {field: [] for field in READING_FIELDS}
+        reading_ids, values, dates, serial_numbers, emails = zip(*rows)
+        return {
+            "reading_id": list(reading_ids),
+            "value": list(values),
+            "reading_date": [str(date) if date else None for date in dates],
+            "meter_serial_number": list(serial_numbers),
+            "email": list(emails),
+        }
+
     def get_readings(
-        self, facility_name: str, meter_type: Optional[str] = None
+        self,
+        facility_name: str,
+        meter_type: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        after: Optional[Tuple[datetime.date, int]] = None,
+        limit: Optional[int] = None,
     ) -> List[APIReading]:
         """Get readings for a facility, optionally filtered by meter type.
 
+        Readings are ordered by (reading_date, reading_id), so a page can be
+        continued from its last reading with ``after`` (keyset pagination)
+        without the database skipping over the preceding rows.
+
         Args:
             facility_name: Name of the facility
             meter_type: Optional meter type filter
+            date_from: Optional first reading date, inclusive
+            date_to: Optional last reading date, inclusive
+            after: Optional (reading_date, reading_id) of the last reading
+                already returned
+            limit: Optional maximum number of readings
 
         Returns:
             List of APIReading objects
         """
-        facility_id = self._get_facility_id(facility_name)
+        query, params = self._readings_query(
+            facility_name, meter_type, date_from, date_to, after, limit
+        )
+        result = self._fetch_for_facility(query, params)
 
-        base_query = """
-        SELECT reading_id, value, reading_date, serial_number, email
-        FROM readings
-        JOIN meters ON readings.meter_id = meters.meter_id
-        JOIN users ON readings.user_id = users.user_id
-        WHERE meters.facility_id = :facility_id
+        return [
+            APIReading(
+                reading_id=row[0],
+                value=row[1],
+                reading_date=str(row[2]) if row[2] else None,
+                meter_serial_number=row[3],
+                email=row[4],
+            )
+            for row in result
+        ]
+
+    def get_reading_columns(self, *args: Any, **kwargs: Any) -> Dict[str, List[Any]]:
+        """Get readings like get_readings, as one list per APIReading field.
+
+        Built straight from the result rows, without a model per reading,
+        for the compact response formats of the readings endpoints.
+
+        Returns:
+            Dict of READING_FIELDS to lists of values
         """
+        return self._reading_columns(self._fetch_for_facility(*self._readings_query(*args, **kwargs)))
 
-        params = {"facility_id": facility_id}
-        if meter_type:
-            query = f"{base_query} AND meters.meter_type = :meter_type"
-            params["meter_type"] = meter_type
-        else:
-            query = base_query
+    def search_readings(
+        self,
+        facility_name: str,
+        filters: Optional[APIMeterFilter] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        sort: str = "reading_date",
+        descending: bool = False,
+        after: Optional[Tuple[Any, int]] = None,
+        limit: Optional[int] = None,
+    ) -> List[APIReading]:
+        """Search the readings of a facility by their meter and date.
 
-        result = self._fetch_query_results(query, params)
+        Readings are ordered by ``sort`` and then by reading_id, so a page
+        can be continued from its last reading with ``after``.
+
+        Args:
+            facility_name: Name of the facility
+            filters: Optional filters on the meter of the readings
+            date_from: Optional first reading date, inclusive
+            date_to: Optional last reading date, inclusive
+            sort: One of READING_SORT_COLUMNS
+            descending: Sort in descending order
+            after: Optional (sort value, reading_id) of the last reading
+                already returned
+            limit: Optional maximum number of readings
+
+        Returns:
+            List of APIReading objects
+
+        Raises:
+            ValueError: If the facility does not exist or the sort key is unknown
+        """
+        query, params = self._search_readings_query(
+            facility_name, filters, date_from, date_to, sort, descending, after, limit
+        )
+        result = self._fetch_for_facility(query, params)
 
         return [
             APIReading(
                 reading_id=row[0],
                 value=row[1],
-                reading_date=row[2].isoformat() if row[2] else None,
+                reading_date=str(row[2]) if row[2] else None,
                 meter_serial_number=row[3],
                 email=row[4],
             )
             for row in result
         ]
 
-    def make_reading(self, reading_data: APIReading) -> None:
+    def search_reading_columns(self, *args: Any, **kwargs: Any) -> Dict[str, List[Any]]:
+        """Search readings like search_readings, as one list per APIReading field.
+
+        Returns:
+            Dict of READING_FIELDS to lists of values
+        """
+        return self._reading_columns(
+            self._fetch_for_facility(*self._search_readings_query(*args, **kwargs))
+        )
+
+    def get_readings_batch(
+        self,
+        facility_names: List[str],
+        meter_types: Optional[List[str]] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        after: Optional[Tuple[datetime.date, int]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, List[APIReading]]:
+        """Get the readings of many facilities with one query.
+
+        Readings of all the facilities are paged together, ordered by
+        (reading_date, reading_id) like the readings of one facility.
+
+        Args:
+            facility_names: Names of the facilities
+            meter_types: Optional meter types, all types if None or empty
+            date_from: Optional first reading date, inclusive
+            date_to: Optional last reading date, inclusive
+            after: Optional (reading_date, reading_id) of the last reading
+                of the previous page
+            limit: Optional number of readings to return, across facilities
+
+        Returns:
+            Mapping of every requested facility name to its readings,
+            ordered by (reading_date, reading_id)
+
+        Raises:
+            ValueError: If one of the facilities does not exist
+        """
+        query = """
+        SELECT facilities.name, readings.reading_id, readings.value,
+               readings.reading_date, meters.serial_number, users.email
+        FROM readings
+        JOIN meters ON readings.meter_id = meters.meter_id
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        JOIN users ON readings.user_id = users.user_id
+        WHERE facilities.name IN :facility_names
+        """
+
+        names = list(dict.fromkeys(facility_names))
+        params: Dict[str, Any] = {"facility_names": names}
+        expanding = ["facility_names"]
+        if meter_types:
+            query += " AND meters.meter_type IN :meter_types"
+            params["meter_types"] = list(meter_types)
+            expanding.append("meter_types")
+        if date_from is not None:
+            query += " AND readings.reading_date >= :date_from"
+            params["date_from"] = date_from
+        if date_to is not None:
+            query += " AND readings.reading_date <= :date_to"
+            params["date_to"] = date_to
+        if after is not None:
+            query += (
+                " AND readings.reading_date >= :after_date"
+                " AND (readings.reading_date, readings.reading_id) > (:after_date, :after_id)"
+            )
+            params["after_date"], params["after_id"] = after
+        query += " ORDER BY readings.reading_date, readings.reading_id"
+        if limit is not None:
+            query += " LIMIT :limit"
+            params["limit"] = limit
+
+        readings: Dict[str, List[APIReading]] = {name: [] for name in names}
+        for row in self._fetch_query_results(query, params, expanding):
+            readings[row[0]].append(
+                APIReading(
+                    reading_id=row[1],
+                    value=row[2],
+                    reading_date=str(row[3]) if row[3] else None,
+                    meter_serial_number=row[4],
+                    email=row[5],
+                )
+            )
+
+        # Only facilities without readings may not exist
+        empty = [name for name, rows in readings.items() if not rows]
+        if empty:
+            found = self._get_facility_ids(empty)
+            missing = [name for name in empty if name not in found]
+            if missing:
+                raise ValueError(f"Facility with name {missing[0]} not found")
+        return readings
+
+    def make_reading(self, reading_data: APIReading) -> int:
         """Record a new meter reading.
 
         Args:
-            reading_data: APIReading object with reading data
+            reading_data: APIReading object with reading data; its
+                reading_id is ignored
+
+        Returns:
+            ID of the new reading
         """
-        reading_id = self._generate_unique_id()
-        meter_id = self._get_meter_id(reading_data.meter_serial_number)
-        user_id = self._get_user_id(reading_data.email)
+        reading_date = self._parse_date(reading_data.reading_date)
 
         query = """
-        INSERT INTO readings (reading_id, value, reading_date, meter_id, user_id)
-        VALUES (:reading_id, :value, :reading_date, :meter_id, :user_id)
+        INSERT INTO readings (value, reading_date, meter_id, user_id)
+        VALUES (:value, :reading_date, :meter_id, :user_id)
+        RETURNING reading_id
         """
 
-        params = {
-            "reading_id": reading_id,
-            "value": reading_data.value,
-            "reading_date": reading_data.reading_date,
-            "meter_id": meter_id,
-            "user_id": user_id,
-        }
+        with self.unit_of_work():
+            meter_id = self._get_meter_id(reading_data.meter_serial_number)
+            params = {
+                "value": reading_data.value,
+                "reading_date": reading_date,
+                "meter_id": meter_id,
+                "user_id": self._get_user_id(reading_data.email),
+            }
+            reading_id = self._execute_returning(query, params)[0][0]
+            self._execute_queries(self._refresh_month_queries(meter_id, reading_date))
+        return reading_id
 
-        self._execute_query(query, params)
+    def make_readings(self, readings: List[APIReading]) -> APIBulkResult:
+        """Record many meter readings at once.
+
+        Serial numbers and emails are resolved with one lookup each and all
+        valid readings are inserted by a single statement in one transaction,
+        an executemany on databases without arrays.
+        Readings with an unknown meter, user or an invalid date are skipped
+        and reported back instead of failing the whole batch.
+
+        Args:
+            readings: APIReading objects with reading data
+
+        Returns:
+            APIBulkResult with the number of created readings and per-row errors
+        """
+        with self.unit_of_work():
+            meter_ids = self._get_meter_ids([r.meter_serial_number for r in readings])
+            user_ids = self._get_user_ids([r.email for r in readings])
+
+            errors: List[APIBulkError] = []
+            columns: Dict[str, list] = {
+                "values": [],
+                "reading_dates": [],
+                "meter_ids": [],
+                "user_ids": [],
+            }
+            for index, reading in enumerate(readings):
+                if reading.meter_serial_number not in meter_ids:
+                    detail = f"Meter with serial_number {reading.meter_serial_number} not found"
+                elif reading.email not in user_ids:
+                    detail = f"User with email {reading.email} not found"
+                else:
+                    try:
+                        reading_date = self._parse_date(reading.reading_date)
+                        detail = None
+                    except ValueError as e:
+                        detail = str(e)
+                if detail:
+                    errors.append(APIBulkError(index=index, detail=detail))
+                    continue
+
+                columns["values"].append(reading.value)
+                columns["reading_dates"].append(reading_date)
+                columns["meter_ids"].append(meter_ids[reading.meter_serial_number])
+                columns["user_ids"].append(user_ids[reading.email])
+
+            if columns["values"]:
+                if self.pool.dialect.name == "postgresql":
+                    query = """
+                    INSERT INTO readings (value, reading_date, meter_id, user_id)
+                    SELECT * FROM unnest(
+                        CAST(:values AS double precision[]),
+                        CAST(:reading_dates AS date[]),
+                        CAST(:meter_ids AS bigint[]),
+                        CAST(:user_ids AS bigint[])
+                    )
+                    """
+                    params: Any = columns
+                else:
+                    # Without arrays the rows are inserted with one executemany
+                    query = """
+                    INSERT INTO readings (value, reading_date, meter_id, user_id)
+                    VALUES (:value, :reading_date, :meter_id, :user_id)
+                    """
+                    params = [
+                        {"value": v, "reading_date": d, "meter_id": m, "user_id": u}
+                        for v, d, m, u in zip(
+                            columns["values"],
+                            columns["reading_dates"],
+                            columns["meter_ids"],
+                            columns["user_ids"],
+                        )
+                    ]
+                # A batch usually spans many months, the touched meters are
+                # recomputed with one set-based statement instead
+                self._execute_queries(
+                    [(query, params)]
+                    + self._rebuild_monthly_consumption_queries(sorted(set(columns["meter_ids"])))
+                )
+
+        return APIBulkResult(created=len(columns["values"]), errors=errors)
 
     def delete_reading(self, reading_id: int) -> None:
         """Delete a meter reading.
@@ -206,7 +1177,12 @@ class DataBase:
 
         params = {"reading_id": reading_id}
 
-        self._execute_query(query, params)
+        with self.unit_of_work():
+            reading = self._get_reading_month(reading_id)
+            if reading is None:
+                self._execute_query(query, params)
+                return
+            self._execute_queries([(query, params)] + self._refresh_month_queries(*reading))
 
     def update_reading(self, reading_data: APIReading) -> None:
         """Update a meter reading.
@@ -223,10 +1199,217 @@ class DataBase:
         params = {
             "reading_id": reading_data.reading_id,
             "value": reading_data.value,
-            "reading_date": reading_data.reading_date,
+            "reading_date": self._parse_date(reading_data.reading_date),
         }
 
-        self._execute_query(query, params)
+        with self.unit_of_work():
+            reading = self._get_reading_month(reading_data.reading_id)
+            if reading is None:
+                self._execute_query(query, params)
+                return
+            meter_id, old_date = reading
+            # Months are refreshed in order, so a later month sees the updated
+            # closing value of an earlier one
+            months = sorted({old_date.replace(day=1), params["reading_date"].replace(day=1)})
+            queries = [(query, params)]
+            for month in months:
+                queries += self._refresh_month_queries(meter_id, month)
+            self._execute_queries(queries)
+
+    def rebuild_monthly_consumption(self) -> int:
+        """Recompute the monthly_consumption rollup from all readings.
+
+        Needed after readings were loaded outside of this client, e.g. for
+        a backfill, or when the rollup table was just created.
+
+        Returns:
+            Number of meter months in the rollup
+        """
+        with self.unit_of_work():
+            self._execute_queries(self._rebuild_monthly_consumption_queries())
+            return self._fetch_query_results("SELECT COUNT(*) FROM monthly_consumption")[0][0]
+
+    # ==================== Report Methods ====================
+
+    def _consumption_report_query(
+        self,
+        meter_types: List[str],
+        year: int,
+        facility_name: Optional[str] = None,
+        user_email: Optional[str] = None,
+    ) -> Tuple[str, Dict[str, Any], List[str]]:
+        """Build the consumption report query.
+
+        Month-end values and usage come from the monthly_consumption rollup,
+        so the query reads one row per meter and month instead of the raw
+        readings. The usage of the first month with a reading in the report
+        is left empty, as it depends on a month before the report. Rows are
+        ordered by meter and month.
+
+        Returns:
+            Tuple of query string, query parameters and month labels;
+            ``meter_types`` is an expanding parameter
+        """
+        start_date = datetime.date(year - 1, 12, 1)
+        end_date = datetime.date(year + 1, 1, 1)
+        months = [f"{year - 1}-12"] + [f"{year}-{m:02d}" for m in range(1, 13)]
+
+        filters = ["m.meter_type IN :meter_types"]
+        params: Dict[str, Any] = {
+            "meter_types": list(meter_types),
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        if facility_name:
+            filters.append("f.name = :facility_name")
+            params["facility_name"] = facility_name
+        if user_email:
+            filters.append(
+                """f.facility_id IN (
+                    SELECT a.facility_id
+                    FROM assignments a
+                    JOIN users u ON a.user_id = u.user_id
+                    WHERE u.email = :user_email
+                )"""
+            )
+            params["user_email"] = user_email
+
+        query = f"""
+        SELECT f.name, m.serial_number, m.ppe, m.multiply_factor, mc.month, mc.closing_value,
+               CASE WHEN LAG(mc.month) OVER (
+                   PARTITION BY m.meter_id ORDER BY mc.month
+               ) IS NOT NULL THEN mc.usage END AS usage
+        FROM meters m
+        JOIN facilities f ON m.facility_id = f.facility_id
+        LEFT JOIN monthly_consumption mc ON mc.meter_id = m.meter_id
+            AND mc.month >= :start_date AND mc.month < :end_date
+        WHERE {" AND ".join(filters)}
+        ORDER BY f.name, m.serial_number, mc.month
+        """
+        return query, params, months
+
+    def _group_consumption_rows(
+        self, result: Iterable[tuple], months: List[str]
+    ) -> Iterator[APIConsumptionRow]:
+        """Fold per-month result rows into one APIConsumptionRow per meter.
+
+        Args:
+            result: Rows ordered by meter and month
+            months: Month labels of the report
+
+        Yields:
+            APIConsumptionRow objects with one entry per month
+        """
+        current: Optional[APIConsumptionRow] = None
+        readings: Dict[str, APIConsumptionMonth] = {}
+
+        def finish(row: APIConsumptionRow) -> APIConsumptionRow:
+            row.months = [
+                readings.get(label, APIConsumptionMonth(month=label, value=None, usage=None))
+                for label in months
+            ]
+            return row
+
+        for name, serial_number, ppe, multiply_factor, month, value, usage in result:
+            if current is None or (current.facility_name, current.serial_number) != (name, serial_number):
+                if current is not None:
+                    yield finish(current)
+                current = APIConsumptionRow(
+                    facility_name=name,
+                    serial_number=serial_number,
+                    ppe=ppe,
+                    multiply_factor=multiply_factor,
+                    months=[],
+                )
+                readings = {}
+            if month is not None:
+                if isinstance(month, str):
+                    month = self._parse_date(month)
+                label = month.strftime("%Y-%m")
+                readings[label] = APIConsumptionMonth(month=label, value=value, usage=usage)
+
+        if current is not None:
+            yield finish(current)
+
+    def get_consumption_report(
+        self,
+        meter_types: List[str],
+        year: int,
+        facility_name: Optional[str] = None,
+        user_email: Optional[str] = None,
+    ) -> APIConsumptionReport:
+        """Build the monthly consumption report for December of the previous
+        year through December of ``year``.
+
+        Args:
+            meter_types: Meter types included in the report
+            year: Reported year
+            facility_name: Optional facility filter, all facilities if None
+            user_email: Optional user whose assigned facilities are reported
+
+        Returns:
+            APIConsumptionReport with one row per meter and a SUM row
+
+        Raises:
+            ValueError: If the facility or user does not exist
+        """
+        query, params, months = self._consumption_report_query(
+            meter_types, year, facility_name, user_email
+        )
+        result = self._fetch_query_results(query, params, expanding=["meter_types"])
+
+        if not result:
+            if facility_name:
+                self._get_facility_id(facility_name)
+            if user_email:
+                self._get_user_id(user_email)
+
+        rows = list(self._group_consumption_rows(result, months))
+
+        total: List[Optional[float]] = [None] * len(months)
+        for row in rows:
+            for i, entry in enumerate(row.months):
+                if entry.usage is not None:
+                    total[i] = (total[i] or 0.0) + entry.usage
+
+        return APIConsumptionReport(months=months, rows=rows, total=total)
+
+    def iter_consumption_report(
+        self,
+        meter_types: List[str],
+        year: int,
+        facility_name: Optional[str] = None,
+        user_email: Optional[str] = None,
+    ) -> Iterator[APIConsumptionRow]:
+        """Stream the consumption report rows through a server-side cursor.
+
+        The facility and user are validated eagerly so that a missing one
+        is reported before any row is produced; the rows themselves are
+        fetched in chunks while the returned iterator is consumed.
+
+        Args:
+            meter_types: Meter types included in the report
+            year: Reported year
+            facility_name: Optional facility filter, all facilities if None
+            user_email: Optional user whose assigned facilities are reported
+
+        Returns:
+            Iterator of APIConsumptionRow objects
+
+        Raises:
+            ValueError: If the facility or user does not exist
+        """
+        if facility_name:
+            self._get_facility_id(facility_name)
+        if user_email:
+            self._get_user_id(user_email)
+
+        query, params, months = self._consumption_report_query(
+            meter_types, year, facility_name, user_email
+        )
+        return self._group_consumption_rows(
+            self._stream_query_results(query, params, expanding=["meter_types"]), months
+        )
 
     # ==================== Meter Methods ====================
 
@@ -239,14 +1422,15 @@ class DataBase:
         Returns:
             List of APIMeter objects
         """
-        facility_id = self._get_facility_id(facility_name)
         query = """
-        SELECT serial_number, meter_type, ppe, multiply_factor, description
+        SELECT meters.serial_number, meters.meter_type, meters.ppe,
+               meters.multiply_factor, meters.description
         FROM meters
-        WHERE facility_id = :facility_id
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        WHERE facilities.name = :facility_name
         """
 
-        result = self._fetch_query_results(query, {"facility_id": facility_id})
+        result = self._fetch_for_facility(query, {"facility_name": facility_name})
 
         return [
             APIMeter(
@@ -270,15 +1454,16 @@ class DataBase:
         Returns:
             List of APIMeter objects
         """
-        facility_id = self._get_facility_id(facility_name)
         query = """
-        SELECT serial_number, meter_type, ppe, multiply_factor, description
+        SELECT meters.serial_number, meters.meter_type, meters.ppe,
+               meters.multiply_factor, meters.description
         FROM meters
-        WHERE facility_id = :facility_id AND meter_type = :meter_type
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        WHERE facilities.name = :facility_name AND meters.meter_type = :meter_type
         """
 
-        params = {"facility_id": facility_id, "meter_type": meter_type}
-        result = self._fetch_query_results(query, params)
+        params = {"facility_name": facility_name, "meter_type": meter_type}
+        result = self._fetch_for_facility(query, params)
 
         return [
             APIMeter(
@@ -292,36 +1477,85 @@ class DataBase:
             for row in result
         ]
 
-    def add_meter(self, meter_data: APIMeter) -> None:
-        """Add a new meter."""
-        if self._fetch_query_results(
-            "SELECT 1 FROM meters WHERE serial_number = :serial_number",
-            {"serial_number": meter_data.serial_number}
-        ):
-            raise ValueError(f"Meter with serial number {meter_data.serial_number} already exists.")
-        
-        if meter_data.meter_type != "Energia elektryczna":
-            meter_data.ppe = None
+    def search_meters(
+        self,
+        facility_name: str,
+        filters: Optional[APIMeterFilter] = None,
+        sort: str = "serial_number",
+        descending: bool = False,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[APIMeter]:
+        """Search the meters of a facility.
+
+        Meters are ordered by ``sort`` and then by serial number, so a page
+        can be continued from its last meter with ``after``.
+
+        Args:
+            facility_name: Name of the facility
+            filters: Optional filters, unset ones are ignored
+            sort: One of METER_SORT_COLUMNS
+            descending: Sort in descending order
+            after: Optional (sort value, serial_number) of the last meter
+                already returned
+            limit: Optional maximum number of meters
 
-        meter_id = self._generate_unique_id()
-        facility_id = self._get_facility_id(meter_data.facility_name)
+        Returns:
+            List of APIMeter objects
 
+        Raises:
+            ValueError: If the facility does not exist or the sort key is unknown
+        """
         query = """
-        INSERT INTO meters (meter_id, serial_number, meter_type, facility_id, ppe, multiply_factor, description)
-        VALUES (:meter_id, :serial_number, :meter_type, :facility_id, :ppe, :multiply_factor, :description)
+        SELECT meters.serial_number, meters.meter_type, meters.ppe,
+               meters.multiply_factor, meters.description
+        FROM meters
+        JOIN facilities ON meters.facility_id = facilities.facility_id
+        WHERE facilities.name = :facility_name
         """
 
-        params = {
-            "meter_id": meter_id,
-            "serial_number": meter_data.serial_number,
-            "meter_type": meter_data.meter_type,
-            "facility_id": facility_id,
-            "ppe": meter_data.ppe,
-            "multiply_factor": meter_data.multiply_factor,
-            "description": meter_data.description
-        }
+        params: Dict[str, Any] = {"facility_name": facility_name}
+        query += self._meter_filter_conditions(filters or APIMeterFilter(), params)
+        query += self._keyset_clause(
+            METER_SORT_COLUMNS, sort, "meters.serial_number", descending, after, params
+        )
+        if limit is not None:
+            query += " LIMIT :limit"
+            params["limit"] = limit
 
-        self._execute_query(query, params)
+        result = self._fetch_for_facility(query, params)
+
+        return [
+            APIMeter(
+                facility_name=facility_name,
+                serial_number=row[0],
+                meter_type=row[1],
+                ppe=row[2],
+                multiply_factor=row[3],
+                description=row[4],
+            )
+            for row in result
+        ]
+
+    def add_meter(self, meter_data: APIMeter) -> None:
+        """Add a new meter."""
+        if meter_data.meter_type != "Energia elektryczna":
+            meter_data.ppe = None
+
+        with self.unit_of_work():
+            facility_id = self._get_facility_id(meter_data.facility_name)
+            params = {
+                "serial_number": meter_data.serial_number,
+                "meter_type": meter_data.meter_type,
+                "facility_id": facility_id,
+                "ppe": meter_data.ppe,
+                "multiply_factor": meter_data.multiply_factor,
+                "description": meter_data.description
+            }
+            meter_id = self._insert_unless_exists("meters", params, "serial_number", "meter_id")
+            if meter_id is None:
+                raise ValueError(f"Meter with serial number {meter_data.serial_number} already exists.")
+        self._cache_id("meters", meter_data.serial_number, meter_id)
 
     def delete_meter(self, serial_number: str) -> None:
         """Delete a meter by serial number.
@@ -329,10 +1563,12 @@ class DataBase:
         Args:
             serial_number: Serial number of meter to delete
         """
-        meter_id = self._get_meter_id(serial_number)
-        # Consider using ON DELETE SET NULL in database schema instead of comment
-        query = "DELETE FROM meters WHERE meter_id = :meter_id"
-        self._execute_query(query, {"meter_id": meter_id})
+        with self.unit_of_work():
+            meter_id = self._get_meter_id(serial_number)
+            # Consider using ON DELETE SET NULL in database schema instead of comment
+            query = "DELETE FROM meters WHERE meter_id = :meter_id"
+            self._execute_query(query, {"meter_id": meter_id})
+        self.id_cache.invalidate("meters", serial_number)
 
     def update_meter(self, meter_data: APIMeter) -> None:
         """Update meter information.
@@ -356,7 +1592,12 @@ class DataBase:
             "description": meter_data.description
         }
 
-        self._execute_query(query, params)
+        rescale = """
+        UPDATE monthly_consumption
+        SET usage = delta * :multiply_factor
+        WHERE meter_id IN (SELECT meter_id FROM meters WHERE serial_number = :serial_number)
+        """
+        self._execute_queries([(query, params), (rescale, params)])
 
     # ==================== Facility Methods ====================
     def get_all_user_facilities(self, user_email: str) -> List[APIFacility]:
@@ -368,15 +1609,17 @@ class DataBase:
         Returns:
             List of facility names
         """
-        user_id = self._get_user_id(user_email)
         query = """
         SELECT f.name, f.address, f.email
         FROM facilities f
         JOIN assignments a ON f.facility_id = a.facility_id
-        WHERE a.user_id = :user_id
+        JOIN users u ON a.user_id = u.user_id
+        WHERE u.email = :user_email
         """
 
-        result = self._fetch_query_results(query, {"user_id": user_id})
+        result = self._fetch_for_entity(
+            query, {"user_email": user_email}, "users", "email", user_email
+        )
 
         return [
             APIFacility(name=row[0], address=row[1], email=row[2]) for row in result
@@ -419,25 +1662,15 @@ class DataBase:
         Args:
             facility_data: APIFacility object with facility data
         """
-        if self._fetch_query_results(
-            "SELECT 1 FROM facilities WHERE name = :name",
-            {"name": facility_data.name}
-        ):
-            raise ValueError(f"Facility with name {facility_data.name} already exists.")
-        facility_id = self._generate_unique_id()
-
-        query = """
-        INSERT INTO facilities (facility_id, name, address, email)
-        VALUES (:facility_id, :name, :address, :email)
-        """
-
         params = {
-            "facility_id": facility_id,
             "name": facility_data.name,
             "address": facility_data.address,
             "email": facility_data.email,
         }
-        self._execute_query(query, params)
+        facility_id = self._insert_unless_exists("facilities", params, "name", "facility_id")
+        if facility_id is None:
+            raise ValueError(f"Facility with name {facility_data.name} already exists.")
+        self._cache_id("facilities", facility_data.name, facility_id)
 
     def delete_facility(self, facility_name: str) -> None:
         """Delete a facility by name.
@@ -445,33 +1678,132 @@ class DataBase:
         Args:
             facility_name: Name of the facility to delete
         """
-        facility_id = self._get_facility_id(facility_name)
-        query = "DELETE FROM facilities WHERE facility_id = :facility_id"
-        self._execute_query(query, {"facility_id": facility_id})
+        with self.unit_of_work():
+            facility_id = self._get_facility_id(facility_name)
+            query = "DELETE FROM facilities WHERE facility_id = :facility_id"
+            self._execute_query(query, {"facility_id": facility_id})
+        self.id_cache.invalidate("facilities", facility_name)
+        # Meters of the facility go with it; their serial numbers are not known here
+        self.id_cache.invalidate("meters")
 
     def assign_user_to_facility(self, user_email: str, facility_name: str) -> None:
         """Assign a user to a facility.
 
+        Assigning a user to a facility again does nothing.
+
         Args:
             user_email: Email of the user
             facility_name: Name of the facility
         """
-        assignment_id = self._generate_unique_id()
-        user_id = self._get_user_id(user_email)
-        facility_id = self._get_facility_id(facility_name)
-
         query = """
-        INSERT INTO assignments (assignment_id, user_id, facility_id)
-        VALUES (:assignment_id, :user_id, :facility_id)
+        INSERT INTO assignments (user_id, facility_id)
+        VALUES (:user_id, :facility_id)
+        ON CONFLICT DO NOTHING
         """
 
-        params = {
-            "assignment_id": assignment_id,
-            "user_id": user_id,
-            "facility_id": facility_id,
-        }
+        with self.unit_of_work():
+            params = {
+                "user_id": self._get_user_id(user_email),
+                "facility_id": self._get_facility_id(facility_name),
+            }
+            self._execute_query(query, params)
 
-        self._execute_query(query, params)
+    def _assign_user_to_all_facilities_query(self) -> str:
+        """Build the query assigning the user ``:user_id`` to every facility.
+
+        Existing assignments are skipped, so the query can be repeated.
+        """
+        return """
+        INSERT INTO assignments (user_id, facility_id)
+        SELECT :user_id, f.facility_id
+        FROM facilities f
+        WHERE NOT EXISTS (
+            SELECT 1 FROM assignments a
+            WHERE a.user_id = :user_id AND a.facility_id = f.facility_id
+        )
+        ON CONFLICT DO NOTHING
+        """
+
+    def assign_user_to_facilities(self, user_email: str) -> int:
+        """Assign a user to every facility with a single statement.
+
+        Args:
+            user_email: Email of the user
+
+        Returns:
+            Number of new assignments; facilities the user was already
+            assigned to are skipped
+        """
+        user_id = self._get_user_id(user_email)
+        return self._execute_query(
+            self._assign_user_to_all_facilities_query(), {"user_id": user_id}
+        )
+
+    def assign_users_to_facilities(
+        self, assignments: List[APIAssignment]
+    ) -> APIBulkResult:
+        """Create many assignments at once.
+
+        Emails and facility names are resolved with one lookup each and all
+        pairs are inserted by a single statement in one transaction, an
+        executemany on databases without arrays. Pairs with an unknown user or facility are skipped and reported back;
+        pairs that already exist are skipped silently, so a batch can be
+        retried.
+
+        Args:
+            assignments: APIAssignment objects with (email, facility_name) pairs
+
+        Returns:
+            APIBulkResult with the number of created assignments and per-row errors
+        """
+        user_ids = self._get_user_ids([a.email for a in assignments])
+        facility_ids = self._get_facility_ids([a.facility_name for a in assignments])
+
+        errors: List[APIBulkError] = []
+        pairs = set()
+        for index, assignment in enumerate(assignments):
+            if assignment.email not in user_ids:
+                errors.append(APIBulkError(index=index, detail=f"User with email {assignment.email} not found"))
+            elif assignment.facility_name not in facility_ids:
+                errors.append(APIBulkError(index=index, detail=f"Facility with name {assignment.facility_name} not found"))
+            else:
+                pairs.add((user_ids[assignment.email], facility_ids[assignment.facility_name]))
+
+        created = 0
+        if pairs:
+            pairs = sorted(pairs)
+            if self.pool.dialect.name == "postgresql":
+                query = """
+                INSERT INTO assignments (user_id, facility_id)
+                SELECT p.user_id, p.facility_id
+                FROM unnest(
+                    CAST(:user_ids AS bigint[]),
+                    CAST(:facility_ids AS bigint[])
+                ) AS p(user_id, facility_id)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM assignments a
+                    WHERE a.user_id = p.user_id AND a.facility_id = p.facility_id
+                )
+                ON CONFLICT DO NOTHING
+                """
+                params: Any = {
+                    "user_ids": [user_id for user_id, _ in pairs],
+                    "facility_ids": [facility_id for _, facility_id in pairs],
+                }
+            else:
+                # Without arrays the pairs are inserted with one executemany
+                query = """
+                INSERT INTO assignments (user_id, facility_id)
+                VALUES (:user_id, :facility_id)
+                ON CONFLICT DO NOTHING
+                """
+                params = [
+                    {"user_id": user_id, "facility_id": facility_id}
+                    for user_id, facility_id in pairs
+                ]
+            created = self._execute_query(query, params)
+
+        return APIBulkResult(created=created, errors=errors)
 
     def remove_user_from_facility(self, user_email: str, facility_name: str) -> None:
         """Remove a user from a facility.
@@ -480,17 +1812,17 @@ class DataBase:
             user_email: Email of the user
             facility_name: Name of the facility
         """
-        user_id = self._get_user_id(user_email)
-        facility_id = self._get_facility_id(facility_name)
-
         query = """
         DELETE FROM assignments
         WHERE user_id = :user_id AND facility_id = :facility_id
         """
 
-        params = {"user_id": user_id, "facility_id": facility_id}
-
-        self._execute_query(query, params)
+        with self.unit_of_work():
+            params = {
+                "user_id": self._get_user_id(user_email),
+                "facility_id": self._get_facility_id(facility_name),
+            }
+            self._execute_query(query, params)
 
     def update_facility(self, facility_data: APIFacility) -> None:
         """Update facility information.
@@ -554,31 +1886,22 @@ class DataBase:
         Args:
             user_data: APIUser object with user data
         """
-        if self._fetch_query_results(
-            "SELECT 1 FROM users WHERE email = :email",
-            {"email": user_data.email}
-        ):
-            raise ValueError(f"User with email {user_data.email} already exists.")
-        
-        user_id = self._generate_unique_id()
-
-        query = """
-        INSERT INTO users (user_id, email, password, access_level)
-        VALUES (:user_id, :email, :password, :access_level)
-        """
-
         params = {
-            "user_id": user_id,
             "email": user_data.email,
-            "password": bcrypt.hash(user_data.password),
+            # Hashed before the unit of work, no connection is held meanwhile
+            "password": self._hash_password(user_data.password),
             "access_level": user_data.access_level,
         }
-        self._execute_query(query, params)
-
-        # If user is admin (access_level=1), assign to all facilities
-        if user_data.access_level == 1:
-            for facility in self.get_all_facilities():
-                self.assign_user_to_facility(user_data.email, facility.name)
+        with self.unit_of_work():
+            user_id = self._insert_unless_exists("users", params, "email", "user_id")
+            if user_id is None:
+                raise ValueError(f"User with email {user_data.email} already exists.")
+            # If user is admin (access_level=1), assign to all facilities
+            if user_data.access_level == 1:
+                self._execute_query(
+                    self._assign_user_to_all_facilities_query(), {"user_id": user_id}
+                )
+        self._cache_id("users", user_data.email, user_id)
 
     def delete_user(self, email: str) -> None:
         """Delete a user by email.
@@ -586,9 +1909,11 @@ class DataBase:
         Args:
             email: Email of the user to delete
         """
-        user_id = self._get_user_id(email)
-        query = "DELETE FROM users WHERE user_id = :user_id"
-        self._execute_query(query, {"user_id": user_id})
+        with self.unit_of_work():
+            user_id = self._get_user_id(email)
+            query = "DELETE FROM users WHERE user_id = :user_id"
+            self._execute_query(query, {"user_id": user_id})
+        self.id_cache.invalidate("users", email)
 
     def update_user(
         self,
@@ -600,7 +1925,7 @@ class DataBase:
 
         if hashed_password is not None:
             # Haszowanie nowego hasła (plain text)
-            hashed = bcrypt.hash(hashed_password)
+            hashed = self._hash_password(hashed_password)
             query = """
             UPDATE users
             SET password = :password
@@ -621,6 +1946,35 @@ class DataBase:
 
         self._execute_query(query, params)
 
+    def block_user(self, email: str) -> None:
+        """Block a user, who can no longer log in or refresh their tokens.
+
+        Args:
+            email: Email of the user to block
+
+        Raises:
+            ValueError: If user not found
+        """
+        query = "UPDATE users SET blocked = :blocked WHERE email = :email"
+        if not self._execute_query(query, {"blocked": True, "email": email}):
+            raise ValueError(f"User with email {email} not found")
+
+    def get_active_user(self, email: str) -> Optional[APIUser]:
+        """Get a user who may sign in, without their password.
+
+        Args:
+            email: Email of the user
+
+        Returns:
+            APIUser object, None if the user does not exist or is blocked
+        """
+        query = "SELECT email, access_level FROM users WHERE email = :email AND NOT blocked"
+        result = self._fetch_query_results(query, {"email": email})
+
+        if result:
+            return APIUser(email=result[0][0], password="", access_level=result[0][1])
+        return None
+
     def login_user(self, email: str, password: str) -> Optional[APIUser]:
         """Login a user by verifying email and hashed password.
 
@@ -629,17 +1983,28 @@ class DataBase:
             password: Password of the user
         Returns:
             APIUser object if the email exists and the provided password matches the bcrypt hash.
-            None if the user is not found or the password is incorrect.
+            None if the user is not found, is blocked or the password is incorrect.
         Notes:
-            The password stored in the database is hashed using bcrypt.
+            The password stored in the database is hashed using bcrypt. A hash
+            made with a cost factor other than BCRYPT_ROUNDS is replaced by a
+            new one on successful login.
+        """
+        query = """
+        SELECT email, password, access_level FROM users
+        WHERE email = :email AND NOT blocked
         """
-        query = "SELECT email, password, access_level FROM users WHERE email = :email"
         result = self._fetch_query_results(query, {"email": email})
 
         if result:
             stored_email, stored_hashed_password, access_level = result[0]
 
-            if bcrypt.verify(password, stored_hashed_password):
+            valid, new_hash = self._verify_password(password, stored_hashed_password)
+            if valid:
+                if new_hash is not None:
+                    self._execute_query(
+                        "UPDATE users SET password = :password WHERE email = :email",
+                        {"password": new_hash, "email": stored_email},
+                    )
                 return APIUser(
                     email=stored_email, password="", access_level=access_level
                 )
@@ -657,6 +2022,199 @@ class DataBase:
     #         )
 
 
+class _GreenletDataBase(DataBase):
+    """DataBase whose methods are run by AsyncDataBase inside greenlet_spawn.
+
+    Queries go through the asyncio engine's ``sync_engine`` and are awaited
+    on the event loop by SQLAlchemy; CPU-bound bcrypt work is awaited in the
+    process pool of a PasswordHasher so it does not stall the loop.
+    """
+
+    def __init__(
+        self, pool: sqlalchemy.engine.Engine, hasher: passwords.PasswordHasher
+    ) -> None:
+        super().__init__(pool=pool)
+        self.hasher = hasher
+
+    def _hash_password(self, password: str) -> str:
+        """Hash a password with bcrypt in a worker process."""
+        return await_only(self.hasher.hash(password))
+
+    def _verify_password(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password against its bcrypt hash in a worker process."""
+        return await_only(self.hasher.verify(password, hashed_password))
+
+
+def _awaitable(name: str) -> Callable[..., Awaitable[Any]]:
+    """Expose the DataBase method ``name`` as a coroutine on AsyncDataBase."""
+
+    async def method(self: "AsyncDataBase", *args: Any, **kwargs: Any) -> Any:
+        return await greenlet_spawn(getattr(self.database, name), *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(DataBase, name).__doc__
+    return method
+
+
+class AsyncDataBase:
+    """Asynchronous database client for Smart Energy application.
+
+    Runs the DataBase queries on an asyncio engine (asyncpg) through
+    SQLAlchemy's greenlet bridge, so a request waiting on PostgreSQL does
+    not hold a threadpool worker. The SQL itself lives in DataBase; every
+    public DataBase method is available here as a coroutine.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine] = None) -> None:
+        """Initialize the asyncio connection pool of the configured backend.
+
+        For Cloud SQL the connector is created on the first connection,
+        inside the running event loop, as required by its async mode.
+
+        Args:
+            engine: Optional asyncio engine to use instead of the configured
+                backend
+        """
+        self.connector = None
+        if engine is None and backends.backend_name() != backends.CLOUD_SQL:
+            engine = backends.create_asyncio_engine(backends.backend_name())
+        if engine is None:
+            engine = create_async_engine(
+                "postgresql+asyncpg://",
+                async_creator=self._connect_cloud_sql,
+                **pooling.pool_options(),
+            )
+        self.engine = engine
+        self.hasher = passwords.PasswordHasher()
+        self.database = _GreenletDataBase(pool=engine.sync_engine, hasher=self.hasher)
+
+    async def _connect_cloud_sql(self) -> Any:
+        """Open an asyncpg connection through the Cloud SQL connector."""
+        if self.connector is None:
+            from google.cloud.sql.connector import Connector
+
+            self.connector = Connector(loop=asyncio.get_running_loop())
+        return await self.connector.connect_async(
+            os.environ.get("INSTANCE_CONNECTION_NAME"),
+            "asyncpg",
+            user=os.environ.get("DB_USER"),
+            password=os.environ.get("DB_PASSWORD"),
+            db=os.environ.get("DB_NAME"),
+        )
+
+    async def close(self) -> None:
+        """Dispose of the connection pool, close the connector and stop the
+        password hashing workers."""
+        await self.engine.dispose()
+        if self.connector is not None:
+            await self.connector.close_async()
+        await asyncio.to_thread(self.hasher.shutdown)
+
+    @property
+    def pool(self) -> sqlalchemy.engine.Engine:
+        """Synchronous facade of the asyncio engine used by DataBase."""
+        return self.database.pool
+
+    @property
+    def id_cache(self) -> IdCache:
+        """ID resolution cache shared with the underlying DataBase."""
+        return self.database.id_cache
+
+    async def iterate(
+        self, iterator: Iterator[Any], chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[Any]:
+        """Consume a DataBase iterator that reads lazily from the database.
+
+        The iterator is advanced ``chunk_size`` items at a time inside the
+        greenlet bridge, so its queries are awaited on the event loop. When
+        iteration stops early, e.g. a client disconnecting from a streamed
+        response, the iterator is closed in the bridge as well, which returns
+        its connection to the pool; the close is shielded from the
+        cancellation that stopped the iteration.
+
+        Args:
+            iterator: Iterator returned by a DataBase method
+            chunk_size: Items fetched per step
+
+        Yields:
+            Items of the iterator
+        """
+        try:
+            while True:
+                chunk = await greenlet_spawn(list, itertools.islice(iterator, chunk_size))
+                if not chunk:
+                    return
+                for item in chunk:
+                    yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await asyncio.shield(greenlet_spawn(close))
+
+    async def iter_consumption_report(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[APIConsumptionRow]:
+        """Stream the consumption report rows through a server-side cursor.
+
+        See DataBase.iter_consumption_report; the facility and user are
+        validated before this coroutine returns.
+
+        Returns:
+            Async iterator of APIConsumptionRow objects
+        """
+        rows = await greenlet_spawn(self.database.iter_consumption_report, *args, **kwargs)
+        return self.iterate(rows)
+
+    create_schema = _awaitable("create_schema")
+
+    # ==================== Reading Methods ====================
+    get_readings = _awaitable("get_readings")
+    get_reading_columns = _awaitable("get_reading_columns")
+    search_readings = _awaitable("search_readings")
+    search_reading_columns = _awaitable("search_reading_columns")
+    get_readings_batch = _awaitable("get_readings_batch")
+    make_reading = _awaitable("make_reading")
+    make_readings = _awaitable("make_readings")
+    delete_reading = _awaitable("delete_reading")
+    update_reading = _awaitable("update_reading")
+    rebuild_monthly_consumption = _awaitable("rebuild_monthly_consumption")
+
+    # ==================== Report Methods ====================
+    get_consumption_report = _awaitable("get_consumption_report")
+
+    # ==================== Meter Methods ====================
+    get_all_meters = _awaitable("get_all_meters")
+    get_meters_by_type = _awaitable("get_meters_by_type")
+    search_meters = _awaitable("search_meters")
+    add_meter = _awaitable("add_meter")
+    delete_meter = _awaitable("delete_meter")
+    update_meter = _awaitable("update_meter")
+
+    # ==================== Facility Methods ====================
+    get_all_user_facilities = _awaitable("get_all_user_facilities")
+    get_facility = _awaitable("get_facility")
+    get_all_facilities = _awaitable("get_all_facilities")
+    add_facility = _awaitable("add_facility")
+    delete_facility = _awaitable("delete_facility")
+    assign_user_to_facility = _awaitable("assign_user_to_facility")
+    assign_user_to_facilities = _awaitable("assign_user_to_facilities")
+    assign_users_to_facilities = _awaitable("assign_users_to_facilities")
+    remove_user_from_facility = _awaitable("remove_user_from_facility")
+    update_facility = _awaitable("update_facility")
+
+    # ==================== User Methods ====================
+    get_all_users = _awaitable("get_all_users")
+    get_user_by_email = _awaitable("get_user_by_email")
+    add_user = _awaitable("add_user")
+    delete_user = _awaitable("delete_user")
+    update_user = _awaitable("update_user")
+    block_user = _awaitable("block_user")
+    get_active_user = _awaitable("get_active_user")
+    login_user = _awaitable("login_user")
+
+
 class DatabaseError(Exception):
     """Exception raised for database operation errors."""
 
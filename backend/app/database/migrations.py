@@ -0,0 +1,373 @@
+"""Versioned schema migrations.
+
+Every change to the database schema is a numbered migration below. The
+versions applied to a database are recorded in ``schema_migrations``;
+``upgrade`` applies the missing ones in order, each in its own transaction,
+so a failed migration leaves the database at the previous version.
+
+Migration 1 creates missing tables from the current table definitions in
+``app.database.schema``, so on a new database the later migrations find
+their changes already in place. Migrations are therefore written to be
+idempotent (``IF NOT EXISTS``, checks before altering).
+
+New migrations are appended to MIGRATIONS with the next version number;
+applied migrations are never edited.
+
+Partitioning the readings table by month is optional and not a numbered
+migration: ``partition_readings`` converts it on PostgreSQL when run, and
+adds the partitions of the coming months on every later run.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import rollup, schema
+
+# Key of the PostgreSQL advisory lock held while a migration runs, so that
+# workers starting at the same time do not apply a migration twice
+_LOCK_KEY = 5_172_839
+
+# Monthly partitions of readings created ahead of the current month
+MONTHS_AHEAD = 3
+
+
+class MigrationError(Exception):
+    """Raised when existing data prevents a migration."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _create_tables(conn: Connection) -> None:
+    schema.metadata.create_all(
+        conn,
+        tables=[
+            schema.users,
+            schema.facilities,
+            schema.assignments,
+            schema.meters,
+            schema.readings,
+            schema.monthly_consumption,
+        ],
+    )
+
+
+def _generated_ids(conn: Connection) -> None:
+    schema.migrate_ids(conn)
+
+
+def _require_unique(conn: Connection, table: str, column: str) -> None:
+    """Raise MigrationError listing values of ``column`` stored more than once."""
+    duplicates = conn.execute(
+        text(f"SELECT {column} FROM {table} GROUP BY {column} HAVING COUNT(*) > 1 LIMIT 5")
+    ).scalars().all()
+    if duplicates:
+        raise MigrationError(
+            f"Cannot add a unique index on {table}.{column}, duplicated values: "
+            + ", ".join(map(str, duplicates))
+        )
+
+
+def _indexes(conn: Connection) -> None:
+    # Repeated assignments carry no information, older versions of
+    # assign_user_to_facility did not prevent them
+    conn.execute(text("""
+        DELETE FROM assignments
+        WHERE assignment_id NOT IN (
+            SELECT MIN(assignment_id) FROM assignments GROUP BY user_id, facility_id
+        )
+    """))
+    for table, column in (("users", "email"), ("facilities", "name"), ("meters", "serial_number")):
+        _require_unique(conn, table, column)
+
+    include = " INCLUDE (value, user_id)" if conn.dialect.name == "postgresql" else ""
+    statements = [
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_email ON users (email)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_facilities_name ON facilities (name)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_meters_serial_number ON meters (serial_number)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_assignments_user_id_facility_id"
+        " ON assignments (user_id, facility_id)",
+        "CREATE INDEX IF NOT EXISTS ix_assignments_facility_id ON assignments (facility_id)",
+        "CREATE INDEX IF NOT EXISTS ix_meters_facility_id_meter_type"
+        " ON meters (facility_id, meter_type)",
+        "CREATE INDEX IF NOT EXISTS ix_readings_meter_id_reading_date_reading_id"
+        f" ON readings (meter_id, reading_date, reading_id){include}",
+        "CREATE INDEX IF NOT EXISTS ix_readings_user_id ON readings (user_id)",
+        # Superseded by the indexes above
+        "DROP INDEX IF EXISTS ix_users_email",
+        "DROP INDEX IF EXISTS ix_facilities_name",
+        "DROP INDEX IF EXISTS ix_meters_serial_number",
+        "DROP INDEX IF EXISTS ix_assignments_user_id_facility_id",
+        "DROP INDEX IF EXISTS ix_readings_meter_id_reading_date",
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _trigram_indexes(conn: Connection) -> None:
+    # Serve the case-insensitive prefix and substring filters of
+    # search_meters; without pg_trgm they scan the meters of the facility
+    if conn.dialect.name != "postgresql":
+        return
+    available = conn.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).scalar()
+    if not available:
+        return
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in ("serial_number", "ppe", "description"):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_meters_{column}_trgm"
+            f" ON meters USING gin ({column} gin_trgm_ops)"
+        ))
+
+
+def _fill_monthly_consumption(conn: Connection) -> None:
+    # Migration 1 creates the rollup table empty; on a database that had
+    # readings before, reports would stay empty until the next rebuild
+    for statement, params in rollup.rebuild_queries(conn.dialect.name):
+        conn.execute(statement, params or {})
+
+
+def _blocked_users(conn: Connection) -> None:
+    # PUT /users/{email}/block needs somewhere to record the block
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "blocked" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN blocked BOOLEAN NOT NULL DEFAULT FALSE"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "database-generated IDs", _generated_ids),
+    Migration(3, "unique natural keys and query indexes", _indexes),
+    Migration(4, "trigram indexes for meter search", _trigram_indexes),
+    Migration(5, "fill the monthly consumption rollup", _fill_monthly_consumption),
+    Migration(6, "blocked users", _blocked_users),
+]
+
+
+def _month_after(month: datetime.date) -> datetime.date:
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _partition_name(month: datetime.date) -> str:
+    return f"readings_{month:%Y_%m}"
+
+
+def _is_partitioned(conn: Connection) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('readings')")
+    ).scalar())
+
+
+def _create_partitioned_readings(conn: Connection, first_month: datetime.date) -> List[str]:
+    """Replace the flat readings table with one partitioned by month.
+
+    The partitions cover the months from ``first_month``, earlier and later
+    readings go to ``readings_default``. The rows are copied in this
+    transaction, which holds an exclusive lock on readings until it ends.
+
+    Returns:
+        Names of the monthly partitions created
+    """
+    # The partition key is part of the primary key, which rules out NULL
+    missing = conn.execute(
+        text("SELECT COUNT(*) FROM readings WHERE reading_date IS NULL")
+    ).scalar()
+    if missing:
+        raise MigrationError(
+            f"Cannot partition readings by reading_date, {missing} readings have no date"
+        )
+
+    conn.execute(text("LOCK TABLE readings IN ACCESS EXCLUSIVE MODE"))
+    conn.execute(text("""
+        CREATE TABLE readings_partitioned (
+            reading_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            value DOUBLE PRECISION,
+            reading_date DATE NOT NULL,
+            meter_id BIGINT,
+            user_id BIGINT,
+            CONSTRAINT readings_partitioned_pkey PRIMARY KEY (reading_id, reading_date),
+            CONSTRAINT readings_meter_id_fkey FOREIGN KEY (meter_id)
+                REFERENCES meters (meter_id) ON DELETE CASCADE,
+            CONSTRAINT readings_user_id_fkey FOREIGN KEY (user_id)
+                REFERENCES users (user_id) ON DELETE SET NULL
+        ) PARTITION BY RANGE (reading_date)
+    """))
+    created = []
+    month = first_month
+    last_month = datetime.date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last_month = _month_after(last_month)
+    while month <= last_month:
+        conn.execute(text(
+            f"CREATE TABLE {_partition_name(month)} PARTITION OF readings_partitioned"
+            f" FOR VALUES FROM ('{month}') TO ('{_month_after(month)}')"
+        ))
+        created.append(_partition_name(month))
+        month = _month_after(month)
+    conn.execute(text("CREATE TABLE readings_default PARTITION OF readings_partitioned DEFAULT"))
+
+    conn.execute(text("""
+        INSERT INTO readings_partitioned (reading_id, value, reading_date, meter_id, user_id)
+        OVERRIDING SYSTEM VALUE
+        SELECT reading_id, value, reading_date, meter_id, user_id FROM readings
+    """))
+    conn.execute(text("""
+        SELECT setval(
+            pg_get_serial_sequence('readings_partitioned', 'reading_id'),
+            COALESCE((SELECT MAX(reading_id) FROM readings_partitioned), 0) + 1,
+            false
+        )
+    """))
+    conn.execute(text("DROP TABLE readings"))
+    conn.execute(text("ALTER TABLE readings_partitioned RENAME TO readings"))
+    conn.execute(text(
+        "ALTER TABLE readings RENAME CONSTRAINT readings_partitioned_pkey TO readings_pkey"
+    ))
+    conn.execute(text(
+        "ALTER SEQUENCE readings_partitioned_reading_id_seq RENAME TO readings_reading_id_seq"
+    ))
+    # Created on the parent, so every partition gets them, also later ones
+    conn.execute(text(
+        "CREATE INDEX ix_readings_meter_id_reading_date_reading_id"
+        " ON readings (meter_id, reading_date, reading_id) INCLUDE (value, user_id)"
+    ))
+    conn.execute(text("CREATE INDEX ix_readings_user_id ON readings (user_id)"))
+    return created
+
+
+def _add_partition(conn: Connection, month: datetime.date) -> None:
+    """Add the partition of ``month`` to partitioned readings.
+
+    Readings of the month already stored in ``readings_default`` are moved
+    into the new partition before it is attached.
+    """
+    name = _partition_name(month)
+    params = {"month": month, "next_month": _month_after(month)}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE readings)"))
+    conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM readings_default
+            WHERE reading_date >= :month AND reading_date < :next_month
+            RETURNING reading_id, value, reading_date, meter_id, user_id
+        )
+        INSERT INTO {name} (reading_id, value, reading_date, meter_id, user_id)
+        SELECT * FROM moved
+    """), params)
+    conn.execute(text(
+        f"ALTER TABLE readings ATTACH PARTITION {name}"
+        f" FOR VALUES FROM ('{month}') TO ('{_month_after(month)}')"
+    ))
+
+
+def partition_readings(engine: Engine) -> List[str]:
+    """Partition the readings table by month of reading_date.
+
+    Date-bounded reads of readings then only scan the partitions of the
+    months they cover. The first run converts the table, copying all
+    readings; later runs add the partitions of the current month and the
+    MONTHS_AHEAD months after it, so run it at least monthly, e.g. from cron.
+
+    Args:
+        engine: Engine of the target database
+
+    Returns:
+        Names of the monthly partitions created
+
+    Raises:
+        MigrationError: If the database is not PostgreSQL or readings
+            without a date prevent the conversion
+    """
+    if engine.dialect.name != "postgresql":
+        raise MigrationError("Partitioned readings need PostgreSQL")
+
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        current_month = datetime.date.today().replace(day=1)
+        if not _is_partitioned(conn):
+            first_date = conn.execute(text("SELECT MIN(reading_date) FROM readings")).scalar()
+            first_month = first_date.replace(day=1) if first_date else current_month
+            return _create_partitioned_readings(conn, min(first_month, current_month))
+
+        created = []
+        month = current_month
+        for _ in range(MONTHS_AHEAD + 1):
+            name = _partition_name(month)
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                _add_partition(conn, month)
+                created.append(name)
+            month = _month_after(month)
+        return created
+
+
+def _applied_versions(conn: Connection) -> List[int]:
+    schema.schema_migrations.create(conn, checkfirst=True)
+    return list(
+        conn.execute(text("SELECT version FROM schema_migrations ORDER BY version")).scalars()
+    )
+
+
+def status(engine: Engine) -> List[Tuple[Migration, bool]]:
+    """Return every migration and whether it is applied to the database."""
+    with engine.begin() as conn:
+        applied = set(_applied_versions(conn))
+    return [(migration, migration.version in applied) for migration in MIGRATIONS]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[Migration]:
+    """Apply the migrations missing from the database, in order.
+
+    Args:
+        engine: Engine of the target database
+        target: Last version to apply, the latest if None
+
+    Returns:
+        The migrations applied
+
+    Raises:
+        MigrationError: If existing data prevents a migration
+    """
+    applied: List[Migration] = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+            if migration.version in _applied_versions(conn):
+                continue
+            migration.upgrade(conn)
+            conn.execute(
+                schema.schema_migrations.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    # In UTC; the column has no time zone, which asyncpg
+                    # will not convert an aware datetime to
+                    applied_at=datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+                )
+            )
+        applied.append(migration)
+    return applied
+
+
+def create_schema(engine: Engine, drop: bool = False) -> None:
+    """Bring the database schema up to date.
+
+    Works on PostgreSQL and SQLite, so the data layer can run against a
+    local database without Cloud SQL.
+
+    Args:
+        engine: Engine of the target database
+        drop: Drop the existing tables first (deletes all data)
+    """
+    if drop:
+        schema.metadata.drop_all(engine)
+    upgrade(engine)
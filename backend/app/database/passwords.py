@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.hash import bcrypt
+
+# passlib's default cost; every step up doubles the time of a hash
+DEFAULT_ROUNDS = 12
+
+
+def bcrypt_rounds() -> int:
+    """Return the bcrypt cost factor set by BCRYPT_ROUNDS (default 12)."""
+    return int(os.environ.get("BCRYPT_ROUNDS", DEFAULT_ROUNDS))
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hash a password with bcrypt at the given cost."""
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def verify_password(
+    password: str, hashed_password: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    """Check a password and rehash it if it was hashed at another cost.
+
+    Args:
+        password: Password sent by the user
+        hashed_password: Stored bcrypt hash
+        rounds: Configured cost factor
+
+    Returns:
+        Whether the password matches, and a new hash to store if the
+        password matches and the stored hash uses a different cost
+    """
+    handler = bcrypt.using(rounds=rounds)
+    if not handler.verify(password, hashed_password):
+        return False, None
+    if handler.needs_update(hashed_password):
+        return True, handler.hash(password)
+    return True, None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a small pool of worker processes.
+
+    A bcrypt call keeps a core busy for hundreds of milliseconds. Running it
+    in separate processes leaves the event loop and the threadpool free, and
+    the pool size caps how many cores logins can take at once; further
+    requests queue for a free worker. Workers are started on first use.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, rounds: Optional[int] = None
+    ) -> None:
+        """Initialize the hasher.
+
+        Args:
+            max_workers: Worker processes, BCRYPT_WORKERS or up to 4 if None
+            rounds: bcrypt cost factor, BCRYPT_ROUNDS if None
+        """
+        if max_workers is None:
+            max_workers = int(
+                os.environ.get("BCRYPT_WORKERS", min(4, os.cpu_count() or 1))
+            )
+        self.max_workers = max_workers
+        self.rounds = rounds if rounds is not None else bcrypt_rounds()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs the event loop and connector
+                # threads is unsafe, the workers start from a clean interpreter
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in a worker process."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), hash_password, password, self.rounds
+        )
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password in a worker process, see ``verify_password``."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), verify_password, password, hashed_password, self.rounds
+        )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
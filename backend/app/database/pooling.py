@@ -0,0 +1,133 @@
+import os
+import time
+from typing import Any, Dict, Iterator
+
+import sqlalchemy
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to check a connection out of the pool, including pre-ping and new connections",
+    buckets=CHECKOUT_BUCKETS,
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Checkout time of requests that found the pool exhausted and had to wait",
+    buckets=CHECKOUT_BUCKETS,
+)
+POOL_EXHAUSTED = Counter(
+    "db_pool_exhausted_total",
+    "Checkouts that found every connection in use and no overflow left",
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds",
+)
+POOL_CONNECTIONS = Counter(
+    "db_pool_connections_created_total",
+    "Physical database connections opened (Cloud SQL handshakes)",
+)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_options() -> Dict[str, Any]:
+    """Return connection pool settings for create_engine from the environment.
+
+    Environment variables:
+        DB_POOL_SIZE: Connections kept open (default 5)
+        DB_MAX_OVERFLOW: Extra connections opened under load (default 10)
+        DB_POOL_TIMEOUT: Seconds to wait for a free connection (default 30)
+        DB_POOL_RECYCLE: Seconds after which a connection is replaced,
+            -1 to never recycle (default 1800)
+        DB_POOL_PRE_PING: Test connections on checkout (default true)
+
+    Returns:
+        Keyword arguments for create_engine / create_async_engine
+    """
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+        "pool_pre_ping": _env_flag("DB_POOL_PRE_PING", True),
+    }
+
+
+def _is_exhausted(pool: Any) -> bool:
+    """Check whether a checkout from ``pool`` would have to wait."""
+    if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+        return False
+    return pool.checkedout() >= pool.size() + pool._max_overflow
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count physical connections opened by ``engine``."""
+    if isinstance(engine, sqlalchemy.engine.Engine):
+        event.listen(engine, "connect", lambda dbapi_connection, record: POOL_CONNECTIONS.inc())
+
+
+def checkout(engine: Any) -> sqlalchemy.engine.Connection:
+    """Check out a connection from ``engine``, recording pool metrics.
+
+    Args:
+        engine: Engine to connect with
+
+    Returns:
+        Connection to be used as a context manager
+
+    Raises:
+        sqlalchemy.exc.TimeoutError: If no connection became free in time
+    """
+    exhausted = _is_exhausted(getattr(engine, "pool", None))
+    start = time.perf_counter()
+    try:
+        conn = engine.connect()
+    except sqlalchemy.exc.TimeoutError:
+        POOL_TIMEOUTS.inc()
+        raise
+    elapsed = time.perf_counter() - start
+
+    POOL_CHECKOUT_SECONDS.observe(elapsed)
+    if exhausted:
+        POOL_EXHAUSTED.inc()
+        POOL_WAIT_SECONDS.observe(elapsed)
+    return conn
+
+
+class DataBaseCollector:
+    """Prometheus collector reporting pool state and ID cache counters.
+
+    Values are read at scrape time from the client's current engine, so the
+    collector stays valid after the engine is disposed and recreated.
+    """
+
+    def __init__(self, database: Any) -> None:
+        """Collect from ``database``, a DataBase or AsyncDataBase."""
+        self.database = database
+
+    def collect(self) -> Iterator[Any]:
+        pool = self.database.pool.pool
+        if isinstance(pool, QueuePool):
+            for name, documentation, value in (
+                ("db_pool_size", "Configured number of pooled connections", pool.size()),
+                ("db_pool_checked_out", "Connections currently in use", pool.checkedout()),
+                ("db_pool_checked_in", "Idle connections in the pool", pool.checkedin()),
+                ("db_pool_overflow", "Current overflow beyond the pool size", pool.overflow()),
+            ):
+                yield GaugeMetricFamily(name, documentation, value=value)
+
+        stats = self.database.id_cache.stats()
+        yield CounterMetricFamily("id_cache_hits", "ID cache hits", value=stats["hits"])
+        yield CounterMetricFamily("id_cache_misses", "ID cache misses", value=stats["misses"])
+        yield GaugeMetricFamily("id_cache_size", "Cached IDs", value=stats["size"])
@@ -0,0 +1,181 @@
+"""Timing of the SQL statements run by DataBase.
+
+The query helpers of DataBase record the duration, row count and failures
+of their statements, labelled by the public DataBase method that issued
+them (``get_readings``, ``make_reading``, ...) and by the kind of helper.
+The calling method is found by walking up the stack to the first public
+function defined in db_client.py, so private helpers and comprehensions in
+between are attributed to the method that called them.
+
+Recording costs a few microseconds per statement; set DB_QUERY_METRICS=0
+to turn it off.
+
+Separately, the statements sent through an instrumented engine are counted
+by SQL text within ``track_statements()``, which the API uses to count the
+statements of every request.
+"""
+import collections
+import contextvars
+import functools
+import os
+import sys
+import time
+from contextlib import contextmanager
+from types import FrameType
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+import sqlalchemy
+from prometheus_client import Counter, Histogram
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Duration of SQL statements, including the connection checkout",
+    ["method", "kind"],
+    buckets=QUERY_BUCKETS,
+)
+DB_QUERY_ROWS = Counter(
+    "db_query_rows_total",
+    "Rows returned or affected by SQL statements",
+    ["method", "kind"],
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "SQL statements that raised",
+    ["method", "kind"],
+)
+
+enabled = os.environ.get("DB_QUERY_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+_DB_CLIENT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db_client.py")
+# Frames searched for the calling method before giving up
+_MAX_DEPTH = 12
+
+# Metric children by (method, kind); labels() takes a lock on every call
+_children: Dict[Tuple[str, str], Tuple[Any, Any, Any]] = {}
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def calling_method(frame: Optional[FrameType]) -> str:
+    """Return the name of the first public DataBase method at or above ``frame``."""
+    for _ in range(_MAX_DEPTH):
+        if frame is None:
+            break
+        code = frame.f_code
+        if code.co_filename == _DB_CLIENT and code.co_name[0] not in "_<":
+            return code.co_name
+        frame = frame.f_back
+    return "unknown"
+
+
+def _metrics(method: str, kind: str) -> Tuple[Any, Any, Any]:
+    children = _children.get((method, kind))
+    if children is None:
+        children = _children[(method, kind)] = (
+            DB_QUERY_SECONDS.labels(method, kind),
+            DB_QUERY_ROWS.labels(method, kind),
+            DB_QUERY_ERRORS.labels(method, kind),
+        )
+    return children
+
+
+def record(
+    kind: str,
+    start: float,
+    rows: Optional[int],
+    frame: Optional[FrameType],
+    failed: bool = False,
+) -> None:
+    """Record a statement that started at ``start``.
+
+    Args:
+        kind: Kind of helper that ran the statement
+        start: perf_counter() when the statement started
+        rows: Rows returned or affected, None or negative if unknown
+        frame: Frame of the helper's caller, it and the frames above are
+            searched for the DataBase method
+        failed: The statement raised
+    """
+    seconds, row_count, errors = _metrics(calling_method(frame), kind)
+    seconds.observe(time.perf_counter() - start)
+    if failed:
+        errors.inc()
+    elif isinstance(rows, int) and rows > 0:
+        # Drivers report -1 when the count is unknown
+        row_count.inc(rows)
+
+
+def timed(kind: str, rows: Callable[[Any], Optional[int]]) -> Callable[[F], F]:
+    """Decorate a DataBase query helper to record its statements.
+
+    Args:
+        kind: Label of the helper
+        rows: Function returning the row count from the helper's result
+    """
+
+    def decorate(helper: F) -> F:
+        @functools.wraps(helper)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled:
+                return helper(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = helper(*args, **kwargs)
+            except BaseException:
+                record(kind, start, None, sys._getframe(1), failed=True)
+                raise
+            record(kind, start, rows(result), sys._getframe(1))
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class StatementLog:
+    """Statements sent to the database while tracking, by SQL text."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.statements: "collections.Counter[str]" = collections.Counter()
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        """Return the statement sent most often and its count."""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+# Log of the request or block being tracked in the current task or thread;
+# greenlet_spawn runs AsyncDataBase methods in the caller's context
+_statement_log: "contextvars.ContextVar[Optional[StatementLog]]" = contextvars.ContextVar(
+    "statement_log", default=None
+)
+
+
+@contextmanager
+def track_statements() -> Iterator[StatementLog]:
+    """Count the statements of instrumented engines sent within the block."""
+    log = StatementLog()
+    token = _statement_log.set(log)
+    try:
+        yield log
+    finally:
+        _statement_log.reset(token)
+
+
+def _count_statement(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    log = _statement_log.get()
+    if log is not None:
+        log.total += 1
+        log.statements[statement] += 1
+
+
+def instrument_engine(engine: Any) -> None:
+    """Count the statements of ``engine`` in track_statements() blocks."""
+    if isinstance(engine, sqlalchemy.engine.Engine):
+        sqlalchemy.event.listen(engine, "before_cursor_execute", _count_statement)
@@ -0,0 +1,97 @@
+"""Queries rebuilding the monthly_consumption rollup from readings.
+
+Shared by DataBase, which rebuilds the rollup of the meters touched by a
+bulk insert, and by the migration filling the rollup of an existing
+database. The queries depend on the SQL dialect only.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlalchemy
+from sqlalchemy.sql.elements import TextClause
+
+Queries = List[Tuple[TextClause, Optional[Dict[str, Any]]]]
+
+
+def _meters_in(query: str) -> TextClause:
+    """Bind ``:meter_ids`` of ``query`` as an expanding ``IN`` list, which
+    unlike ``= ANY(:meter_ids)`` works on SQLite as well."""
+    return sqlalchemy.text(query).bindparams(sqlalchemy.bindparam("meter_ids", expanding=True))
+
+
+def month_start(dialect: str, column: str) -> str:
+    """Return SQL truncating the date ``column`` to the first of its month."""
+    if dialect == "sqlite":
+        return f"date({column}, 'start of month')"
+    return f"CAST(date_trunc('month', {column}) AS date)"
+
+
+def lock_queries(dialect: str, meter_ids: Optional[List[int]] = None) -> Queries:
+    """Build the queries serializing rollup updates of ``meter_ids``.
+
+    Two transactions refreshing the same meter month would otherwise
+    both delete and re-insert its row. The meter rows are locked in a
+    mode that does not conflict with the key share lock taken by the
+    foreign key of an inserted reading; a full rebuild locks the rollup
+    table. SQLite serializes all writes already.
+
+    Args:
+        dialect: Name of the SQL dialect
+        meter_ids: Meters about to be refreshed, all meters if None
+
+    Returns:
+        (statement, params) pairs to run first in the transaction
+    """
+    if dialect == "sqlite":
+        return []
+    if meter_ids is None:
+        return [(sqlalchemy.text("LOCK TABLE monthly_consumption IN EXCLUSIVE MODE"), None)]
+    return [
+        (
+            _meters_in("""
+            SELECT meter_id FROM meters WHERE meter_id IN :meter_ids
+            ORDER BY meter_id FOR NO KEY UPDATE
+            """),
+            {"meter_ids": sorted(meter_ids)},
+        )
+    ]
+
+
+def rebuild_queries(dialect: str, meter_ids: Optional[List[int]] = None) -> Queries:
+    """Build the queries recomputing monthly_consumption from readings.
+
+    Args:
+        dialect: Name of the SQL dialect
+        meter_ids: Optional meters to recompute, all meters if None
+
+    Returns:
+        (statement, params) pairs to run in one transaction
+    """
+    where, params, statement = "", None, sqlalchemy.text
+    if meter_ids is not None:
+        where, params = "WHERE meter_id IN :meter_ids", {"meter_ids": list(meter_ids)}
+        statement = _meters_in
+    month = month_start(dialect, "reading_date")
+    return lock_queries(dialect, meter_ids) + [
+        (statement(f"DELETE FROM monthly_consumption {where}"), params),
+        (
+            statement(f"""
+            INSERT INTO monthly_consumption (meter_id, month, closing_value, delta, usage)
+            SELECT ranked.meter_id, ranked.month, ranked.value,
+                   ranked.value - LAG(ranked.value) OVER w,
+                   (ranked.value - LAG(ranked.value) OVER w) * m.multiply_factor
+            FROM (
+                SELECT meter_id, {month} AS month, value,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY meter_id, {month}
+                           ORDER BY reading_date DESC, reading_id DESC
+                       ) AS rn
+                FROM readings
+                {where}
+            ) ranked
+            JOIN meters m ON m.meter_id = ranked.meter_id
+            WHERE ranked.rn = 1
+            WINDOW w AS (PARTITION BY ranked.meter_id ORDER BY ranked.month)
+            """),
+            params,
+        ),
+    ]
@@ -0,0 +1,171 @@
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    false,
+    text,
+)
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+# IDs are generated by the database: identity columns on PostgreSQL, the
+# rowid on SQLite, where only a column typed INTEGER becomes its alias.
+ID = BigInteger().with_variant(Integer, "sqlite")
+
+users = Table(
+    "users",
+    metadata,
+    Column("user_id", ID, Identity(), primary_key=True),
+    Column("email", Text, nullable=False),
+    Column("password", Text),
+    Column("access_level", Integer),
+    # A blocked user cannot log in or refresh their tokens
+    Column("blocked", Boolean, nullable=False, server_default=false()),
+    Index("ux_users_email", "email", unique=True),
+)
+
+facilities = Table(
+    "facilities",
+    metadata,
+    Column("facility_id", ID, Identity(), primary_key=True),
+    Column("name", Text, nullable=False),
+    Column("address", Text),
+    Column("email", Text),
+    Index("ux_facilities_name", "name", unique=True),
+)
+
+assignments = Table(
+    "assignments",
+    metadata,
+    Column("assignment_id", ID, Identity(), primary_key=True),
+    Column("user_id", BigInteger, ForeignKey("users.user_id", ondelete="CASCADE")),
+    Column("facility_id", BigInteger, ForeignKey("facilities.facility_id", ondelete="CASCADE")),
+    # Also covers the facility IDs of a user in get_all_user_facilities
+    Index("ux_assignments_user_id_facility_id", "user_id", "facility_id", unique=True),
+    Index("ix_assignments_facility_id", "facility_id"),
+)
+
+meters = Table(
+    "meters",
+    metadata,
+    Column("meter_id", ID, Identity(), primary_key=True),
+    Column("serial_number", Text, nullable=False),
+    Column("meter_type", Text, nullable=False),
+    Column("facility_id", BigInteger, ForeignKey("facilities.facility_id", ondelete="CASCADE")),
+    Column("ppe", Text),
+    Column("multiply_factor", Float),
+    Column("description", Text),
+    Index("ux_meters_serial_number", "serial_number", unique=True),
+    Index("ix_meters_facility_id_meter_type", "facility_id", "meter_type"),
+    # The trigram indexes of the search filters need the pg_trgm extension
+    # and are created by migration 4 on PostgreSQL only
+)
+
+readings = Table(
+    "readings",
+    metadata,
+    Column("reading_id", ID, Identity(), primary_key=True),
+    Column("value", Float),
+    Column("reading_date", Date),
+    Column("meter_id", BigInteger, ForeignKey("meters.meter_id", ondelete="CASCADE")),
+    Column("user_id", BigInteger, ForeignKey("users.user_id", ondelete="SET NULL")),
+    # Backs the per-meter date range scans of the paginated readings
+    # endpoints in keyset order; on PostgreSQL the remaining columns read by
+    # get_readings are included, so the scan does not visit the table
+    Index(
+        "ix_readings_meter_id_reading_date_reading_id",
+        "meter_id",
+        "reading_date",
+        "reading_id",
+        postgresql_include=["value", "user_id"],
+    ),
+    Index("ix_readings_user_id", "user_id"),
+)
+
+# Month-end value of every meter and the usage since the previous month with
+# a reading, kept up to date by DataBase when readings change.
+monthly_consumption = Table(
+    "monthly_consumption",
+    metadata,
+    Column("meter_id", BigInteger, ForeignKey("meters.meter_id", ondelete="CASCADE"), primary_key=True),
+    Column("month", Date, primary_key=True),
+    Column("closing_value", Float),
+    Column("delta", Float),
+    Column("usage", Float),
+)
+
+# Versions applied by app.database.migrations
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", Text, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# Primary key of every table with a generated ID, and the columns referencing it
+_ID_COLUMNS = {
+    "users": ("user_id", [("assignments", "user_id"), ("readings", "user_id")]),
+    "facilities": ("facility_id", [("assignments", "facility_id"), ("meters", "facility_id")]),
+    "meters": ("meter_id", [("readings", "meter_id"), ("monthly_consumption", "meter_id")]),
+    "assignments": ("assignment_id", []),
+    "readings": ("reading_id", []),
+}
+
+
+def migrate_ids(conn: Connection) -> int:
+    """Switch a PostgreSQL database with client-generated IDs to identity columns.
+
+    Databases created before IDs were generated by the database hold random
+    31-bit integer keys. All ID and foreign key columns are widened to
+    bigint, so identity sequences can continue above the highest existing
+    key, and every primary key gets an identity sequence starting there.
+    Existing rows keep their IDs. Tables that already have an identity
+    column are skipped, so the migration can be run again. SQLite needs no
+    migration, its integer primary keys already alias the rowid.
+
+    Args:
+        conn: Connection to the target database, in a transaction
+
+    Returns:
+        Number of tables migrated
+    """
+    if conn.dialect.name != "postgresql":
+        return 0
+    migrated = 0
+    for table, (key, references) in _ID_COLUMNS.items():
+        is_identity = conn.execute(
+            text(
+                "SELECT is_identity FROM information_schema.columns"
+                " WHERE table_schema = current_schema()"
+                " AND table_name = :table AND column_name = :column"
+            ),
+            {"table": table, "column": key},
+        ).scalar()
+        if is_identity == "YES":
+            continue
+        for column_table, column in [(table, key)] + references:
+            conn.execute(text(f"ALTER TABLE {column_table} ALTER COLUMN {column} TYPE bigint"))
+        conn.execute(
+            text(f"ALTER TABLE {table} ALTER COLUMN {key} ADD GENERATED BY DEFAULT AS IDENTITY")
+        )
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{key}'),"
+                f" COALESCE((SELECT MAX({key}) FROM {table}), 0) + 1, false)"
+            )
+        )
+        migrated += 1
+    return migrated
@@ -0,0 +1,86 @@
+"""Prometheus metrics of the HTTP requests served by the API.
+
+Requests are labelled by the route template (``/readings/{facility_name}``)
+rather than the requested path, so the number of series stays bounded.
+Requests that match no route are reported under ``unmatched``.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "Time to serve a request, until the response is sent",
+    ["method", "route"],
+    buckets=REQUEST_BUCKETS,
+)
+HTTP_RESPONSES = Counter(
+    "http_responses_total",
+    "Responses sent, by status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being served",
+    ["method"],
+)
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests per route.
+
+    Written as plain ASGI rather than with BaseHTTPMiddleware, which would
+    add a task and a stream per request.
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]]) -> None:
+        self.app = app
+        # Metric children by label values; labels() takes a lock on every call
+        self._in_flight: Dict[str, Any] = {}
+        self._seconds: Dict[Tuple[str, str], Any] = {}
+        self._responses: Dict[Tuple[str, str, int], Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = self._in_flight.get(method)
+        if in_flight is None:
+            in_flight = self._in_flight[method] = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            # Set by the router once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            seconds = self._seconds.get((method, route))
+            if seconds is None:
+                seconds = self._seconds[(method, route)] = HTTP_REQUEST_SECONDS.labels(method, route)
+            seconds.observe(elapsed)
+            responses = self._responses.get((method, route, status))
+            if responses is None:
+                responses = self._responses[(method, route, status)] = HTTP_RESPONSES.labels(
+                    method, route, str(status)
+                )
+            responses.inc()
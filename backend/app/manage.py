@@ -0,0 +1,90 @@
+"""Maintenance commands for the Smart Energy database.
+
+Usage:
+    poetry run manage create-schema [--drop]
+    poetry run manage migrate [--to VERSION]
+    poetry run manage migrations
+    poetry run manage rebuild-rollup
+    poetry run manage partition-readings
+
+The database is selected like for the server, see ``app.database.backends``.
+"""
+import argparse
+from typing import List, Optional
+
+from app.database import migrations
+from app.database.db_client import DataBase
+
+
+def create_schema(database: DataBase, args: argparse.Namespace) -> None:
+    """Create missing tables and indexes by applying all migrations."""
+    database.create_schema(drop=args.drop)
+    print("Schema created")
+
+
+def migrate(database: DataBase, args: argparse.Namespace) -> None:
+    """Apply pending schema migrations."""
+    applied = migrations.upgrade(database.pool, target=args.to)
+    for migration in applied:
+        print(f"Applied {migration.version:03d} {migration.name}")
+    if not applied:
+        print("Schema is up to date")
+
+
+def show_migrations(database: DataBase, args: argparse.Namespace) -> None:
+    """List schema migrations and whether they are applied."""
+    for migration, applied in migrations.status(database.pool):
+        print(f"[{'x' if applied else ' '}] {migration.version:03d} {migration.name}")
+
+
+def rebuild_rollup(database: DataBase, args: argparse.Namespace) -> None:
+    """Recompute the monthly_consumption rollup, e.g. after a backfill."""
+    count = database.rebuild_monthly_consumption()
+    print(f"monthly_consumption rebuilt: {count} meter months")
+
+
+def partition_readings(database: DataBase, args: argparse.Namespace) -> None:
+    """Partition readings by month (PostgreSQL), or add the coming months' partitions."""
+    created = migrations.partition_readings(database.pool)
+    for name in created:
+        print(f"Created {name}")
+    if not created:
+        print("Partitions are up to date")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a maintenance command."""
+    parser = argparse.ArgumentParser(prog="manage", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    schema_parser = commands.add_parser("create-schema", help=create_schema.__doc__)
+    schema_parser.add_argument(
+        "--drop", action="store_true", help="drop existing tables first (deletes all data)"
+    )
+    schema_parser.set_defaults(handler=create_schema)
+
+    rollup_parser = commands.add_parser("rebuild-rollup", help=rebuild_rollup.__doc__)
+    rollup_parser.set_defaults(handler=rebuild_rollup)
+
+    partition_parser = commands.add_parser("partition-readings", help=partition_readings.__doc__)
+    partition_parser.set_defaults(handler=partition_readings)
+
+    migrate_parser = commands.add_parser("migrate", help=migrate.__doc__)
+    migrate_parser.add_argument(
+        "--to", type=int, metavar="VERSION", help="stop after this version"
+    )
+    migrate_parser.set_defaults(handler=migrate)
+
+    status_parser = commands.add_parser("migrations", help=show_migrations.__doc__)
+    status_parser.set_defaults(handler=show_migrations)
+
+    args = parser.parse_args(argv)
+    database = DataBase()
+    try:
+        args.handler(database, args)
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
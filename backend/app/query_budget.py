@@ -0,0 +1,110 @@
+"""SQL statements per HTTP request and per-route statement budgets.
+
+QueryBudgetMiddleware counts the statements every request sends to the
+database and records them in ``http_request_queries`` by route template.
+A request is logged when it runs more than QUERY_LOG_THRESHOLD statements
+or repeats one statement QUERY_REPEAT_THRESHOLD times, the usual sign of
+a lookup run once per item (N+1).
+
+Routes declare how many statements they may run with ``@query_budget(n)``
+below the route decorator. A request over budget is logged and counted in
+``http_query_budget_exceeded_total``; with enforcement on (the test suite,
+or QUERY_BUDGET_ENFORCE=1) it raises QueryBudgetExceeded instead.
+"""
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional, Tuple, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+from app.database import query_metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+HTTP_REQUEST_QUERIES = Histogram(
+    "http_request_queries",
+    "SQL statements run to serve a request",
+    ["method", "route"],
+    buckets=QUERY_BUCKETS,
+)
+HTTP_QUERY_BUDGET_EXCEEDED = Counter(
+    "http_query_budget_exceeded_total",
+    "Requests that ran more SQL statements than their route's budget",
+    ["method", "route"],
+)
+
+QUERY_LOG_THRESHOLD = int(os.environ.get("QUERY_LOG_THRESHOLD", 10))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 5))
+enforce = os.environ.get("QUERY_BUDGET_ENFORCE", "0").strip().lower() in ("1", "true", "yes", "on")
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when enforcing budgets and a request ran too many statements."""
+
+
+def query_budget(statements: int) -> Callable[[F], F]:
+    """Declare the most SQL statements a route may run per request.
+
+    Args:
+        statements: Budget of a request with a cold ID cache, including
+            the lookup that tells an empty result from an unknown facility
+            or user
+    """
+
+    def declare(endpoint: F) -> F:
+        endpoint.query_budget = statements  # type: ignore[attr-defined]
+        return endpoint
+
+    return declare
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware counting the SQL statements of every request."""
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]]) -> None:
+        self.app = app
+        self._queries: Dict[Tuple[str, str], Any] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_metrics.track_statements() as log:
+            await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        queries = self._queries.get((method, path))
+        if queries is None:
+            queries = self._queries[(method, path)] = HTTP_REQUEST_QUERIES.labels(method, path)
+        queries.observe(log.total)
+
+        statement, repeats = log.most_repeated()
+        if log.total > QUERY_LOG_THRESHOLD or repeats >= QUERY_REPEAT_THRESHOLD:
+            logger.warning(
+                "%s %s ran %d SQL statements, %d times: %s",
+                method, path, log.total, repeats, _one_line(statement),
+            )
+
+        budget: Optional[int] = getattr(getattr(route, "endpoint", None), "query_budget", None)
+        if budget is not None and log.total > budget:
+            HTTP_QUERY_BUDGET_EXCEEDED.labels(method, path).inc()
+            message = f"{method} {path} ran {log.total} SQL statements, its budget is {budget}"
+            if enforce:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+
+def _one_line(statement: Optional[str]) -> str:
+    return " ".join((statement or "").split())
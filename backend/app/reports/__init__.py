@@ -0,0 +1,3 @@
+__all__ = [ 'csv_export']
+
+from . import csv_export
\ No newline at end of file
@@ -0,0 +1,162 @@
+import csv
+import io
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+from app.api_models.models import APIConsumptionRow
+
+# Unit shown in the "jednostka" column, keyed by meter type.
+METER_UNITS = {
+    "Energia elektryczna": "kWh",
+    "Energia klimatyzacja": "kWh",
+    "Woda zimna": "m3",
+    "Woda ciepła": "m3",
+    "Licznik ciepła": "GJ",
+}
+
+MONTH_NAMES = [
+    "styczen", "luty", "marzec", "kwiecien", "maj", "czerwiec",
+    "lipiec", "sierpien", "wrzesien", "pazdziernik", "listopad", "grudzien",
+]
+
+# Number of CSV lines written to the buffer before it is flushed downstream.
+FLUSH_EVERY = 500
+
+
+def format_pl(value: Optional[float], decimals: Optional[int] = None) -> str:
+    """Format a number like ``Number.toLocaleString('pl-PL')``.
+
+    Uses a decimal comma and groups thousands with a non-breaking space
+    once the integer part has at least five digits.
+
+    Args:
+        value: Number to format, "-" is returned for None
+        decimals: Fixed number of fraction digits, up to 3 significant
+            fraction digits if None
+
+    Returns:
+        Formatted number
+    """
+    if value is None:
+        return "-"
+    if decimals is None:
+        text = f"{abs(value):.3f}".rstrip("0").rstrip(".")
+    else:
+        text = f"{abs(value):.{decimals}f}"
+
+    integer, _, fraction = text.partition(".")
+    if len(integer) >= 5:
+        groups = []
+        while integer:
+            groups.insert(0, integer[-3:])
+            integer = integer[:-3]
+        integer = " ".join(groups)
+
+    sign = "-" if value < 0 and text.strip("0.") else ""
+    return sign + integer + ("," + fraction if fraction else "")
+
+
+def _format_factor(value: Optional[float]) -> str:
+    """Format the multiply factor the way the report pages print it."""
+    if value is None:
+        return "-"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def report_header(year: int) -> List[str]:
+    """Return the header columns of the consumption report."""
+    months = [f"Grudzien '{str(year - 1)[-2:]}"] + MONTH_NAMES
+    return ["Lokal", "nr licznika", "PPE", "jednostka", "mnozna"] + [
+        column for month in months for column in (month, "zuzycie")
+    ]
+
+
+class ConsumptionCsvWriter:
+    """Incremental writer of the semicolon separated consumption report.
+
+    The header is written on creation, the SUM row is accumulated while
+    rows are added and written by ``close``. Output is handed back in chunks
+    of about ``FLUSH_EVERY`` lines, so only one buffer is held in memory.
+    """
+
+    def __init__(self, year: int, unit: str) -> None:
+        """Start a report.
+
+        Args:
+            year: Reported year
+            unit: Unit shown in the "jednostka" column
+        """
+        self.unit = unit
+        self.total: List[Optional[float]] = [None] * 13
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, delimiter=";", lineterminator="\r\n")
+        self._writer.writerow(report_header(year))
+        self._pending = 1
+
+    def _flush(self) -> str:
+        chunk = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._pending = 0
+        return chunk
+
+    def write(self, row: APIConsumptionRow) -> Optional[str]:
+        """Add a meter row; returns a chunk once the buffer is full."""
+        cells = [
+            row.facility_name or "-",
+            row.serial_number or "-",
+            row.ppe or "-",
+            self.unit,
+            _format_factor(row.multiply_factor),
+        ]
+        for i, month in enumerate(row.months):
+            cells.append(format_pl(month.value))
+            cells.append(format_pl(month.usage, 2))
+            if month.usage is not None:
+                self.total[i] = (self.total[i] or 0.0) + month.usage
+        self._writer.writerow(cells)
+
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            return self._flush()
+        return None
+
+    def close(self) -> str:
+        """Write the SUM row and return the remaining output."""
+        self._writer.writerow(
+            ["SUMA", "", "", "", ""]
+            + [cell for value in self.total for cell in ("", format_pl(value, 2))]
+        )
+        return self._flush()
+
+
+def iter_consumption_csv(
+    rows: Iterable[APIConsumptionRow], year: int, unit: str
+) -> Iterator[str]:
+    """Write the consumption report as CSV, chunk by chunk.
+
+    Args:
+        rows: Report rows, typically streamed from the database
+        year: Reported year
+        unit: Unit shown in the "jednostka" column
+
+    Yields:
+        CSV text chunks
+    """
+    writer = ConsumptionCsvWriter(year, unit)
+    for row in rows:
+        chunk = writer.write(row)
+        if chunk:
+            yield chunk
+    yield writer.close()
+
+
+async def aiter_consumption_csv(
+    rows: AsyncIterable[APIConsumptionRow], year: int, unit: str
+) -> AsyncIterator[str]:
+    """Async counterpart of ``iter_consumption_csv`` for AsyncDataBase rows."""
+    writer = ConsumptionCsvWriter(year, unit)
+    async for row in rows:
+        chunk = writer.write(row)
+        if chunk:
+            yield chunk
+    yield writer.close()
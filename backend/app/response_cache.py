@@ -0,0 +1,206 @@
+"""Server-side cache of JSON responses with strong ETags.
+
+Read endpoints whose data rarely changes store their rendered response
+body under a namespace, e.g. ``meters:<facility name>``. Handlers that
+change that data invalidate the namespace, so a cached body is never
+served after a write made through the API. A request whose
+``If-None-Match`` matches the cached ETag is answered with 304 and no body.
+
+Namespaces are hierarchical: invalidating ``meters`` also drops every
+``meters:<facility name>`` entry.
+"""
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Cacheable requests by outcome",
+    ["namespace", "result"],
+)
+
+
+def _split_entry(entry: bytes) -> Tuple[str, bytes]:
+    """Split a stored entry into its ETag and body."""
+    etag, _, body = entry.partition(b"\n")
+    return etag.decode(), body
+
+
+def _belongs_to(key: str, namespace: str) -> bool:
+    """Check whether ``key`` is stored under ``namespace`` or a child of it."""
+    key_namespace = key.split("|", 1)[0]
+    return key_namespace == namespace or key_namespace.startswith(namespace + ":")
+
+
+class MemoryBackend:
+    """Bounded in-process store, least recently used entries are evicted.
+
+    Every worker process has its own copy, so a write handled by one worker
+    only invalidates that worker's entries; entries elsewhere expire after
+    ``ttl`` seconds. Use RedisBackend when running several workers.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0) -> None:
+        """Initialize an empty store.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl: Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete_namespace(self, namespace: str) -> None:
+        for key in [key for key in self._entries if _belongs_to(key, namespace)]:
+            del self._entries[key]
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Store shared by all workers in Redis or a Redis-compatible server."""
+
+    def __init__(
+        self, client: Any, ttl: float = 300.0, prefix: str = "smart-energy:response:"
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            client: ``redis.asyncio.Redis`` client or a compatible object
+            ttl: Seconds an entry stays valid
+            prefix: Prefix of all keys written by this cache
+        """
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+
+    async def _delete_matching(self, pattern: str) -> None:
+        keys = [key async for key in self.client.scan_iter(match=pattern)]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def delete_namespace(self, namespace: str) -> None:
+        # Facility names and emails may contain glob characters
+        escaped = re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix + namespace)
+        await self._delete_matching(escaped + "|*")
+        await self._delete_matching(escaped + ":*")
+
+    async def clear(self) -> None:
+        await self._delete_matching(re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix) + "*")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def backend_from_env() -> Any:
+    """Create the cache backend configured by the environment.
+
+    Environment variables:
+        RESPONSE_CACHE_URL: redis:// URL of a shared cache, the in-memory
+            backend is used if not set
+        RESPONSE_CACHE_SIZE: Maximum entries of the in-memory backend
+            (default 1024)
+        RESPONSE_CACHE_TTL: Seconds an entry stays valid (default 300)
+    """
+    ttl = float(os.environ.get("RESPONSE_CACHE_TTL", 300))
+    url = os.environ.get("RESPONSE_CACHE_URL")
+    if url:
+        import redis.asyncio
+
+        return RedisBackend(redis.asyncio.Redis.from_url(url), ttl=ttl)
+    return MemoryBackend(int(os.environ.get("RESPONSE_CACHE_SIZE", 1024)), ttl=ttl)
+
+
+class ResponseCache:
+    """Caches JSON responses of read endpoints and answers conditional GETs."""
+
+    def __init__(self, backend: Any) -> None:
+        """Initialize the cache on top of ``backend``."""
+        self.backend = backend
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        build: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """Return the cached response for ``request`` or build and cache it.
+
+        Args:
+            request: Incoming GET request, keyed by its path and query
+            namespace: Namespace invalidated when the underlying data changes
+            build: Coroutine function returning the JSON payload; exceptions
+                propagate and nothing is cached
+
+        Returns:
+            200 response with an ETag, or 304 if If-None-Match matches
+        """
+        key = f"{namespace}|{request.url.path}?{request.url.query}"
+        entry = await self.backend.get(key)
+        if entry is None:
+            body = JSONResponse(content=jsonable_encoder(await build())).body
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            await self.backend.set(key, etag.encode() + b"\n" + body)
+            result = "miss"
+        else:
+            etag, body = _split_entry(entry)
+            result = "hit"
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+            RESPONSE_CACHE_REQUESTS.labels(namespace.split(":", 1)[0], "not_modified").inc()
+            return Response(status_code=304, headers=headers)
+        RESPONSE_CACHE_REQUESTS.labels(namespace.split(":", 1)[0], result).inc()
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """Drop the cached responses of ``namespaces`` and their children."""
+        for namespace in namespaces:
+            await self.backend.delete_namespace(namespace)
+
+    async def clear(self) -> None:
+        """Drop every cached response."""
+        await self.backend.clear()
+
+    async def close(self) -> None:
+        """Release the backend."""
+        await self.backend.close()
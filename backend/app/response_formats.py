@@ -0,0 +1,87 @@
+"""Compact response formats of the bulk reading endpoints.
+
+By default readings are returned as a JSON list of objects, one per
+reading. Clients fetching many readings can ask for a columnar payload
+instead, with one list per field, through the ``Accept`` header:
+
+    application/vnd.smart-energy.columnar+json    columnar JSON
+    application/x-msgpack                         columnar MessagePack
+
+Columnar payloads are built straight from the query rows and encoded with
+orjson or msgpack, skipping the per-reading models and FastAPI's
+validation and encoding of them. MessagePack needs the optional
+``msgpack`` package; without it, clients that accept it get columnar JSON
+if they accept that, and the default format otherwise.
+"""
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+COLUMNAR_JSON = "application/vnd.smart-energy.columnar+json"
+MSGPACK = "application/x-msgpack"
+
+# Media types of the compact formats and the names they are also known by
+_ALIASES = {
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+def _accepted(header: str) -> List[tuple]:
+    """Parse an Accept header into (quality, position, media type), best first."""
+    ranges = []
+    for position, part in enumerate(header.split(",")):
+        media_type, *parameters = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    return sorted(ranges)
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """Return the compact format preferred by ``request``, None for the default.
+
+    A compact format is only chosen if the client names it explicitly and
+    prefers it to application/json; wildcards select the default format.
+    """
+    for _, _, media_type in _accepted(request.headers.get("accept", "")):
+        compact = _ALIASES.get(media_type)
+        if compact == MSGPACK and msgpack is None:
+            continue
+        if compact is not None:
+            return compact
+        if media_type in ("application/json", "application/*", "*/*"):
+            return None
+    return None
+
+
+def render(payload: Dict[str, Any], media_type: str) -> Response:
+    """Encode a columnar ``payload`` in the format chosen by ``negotiate``.
+
+    Args:
+        payload: Dict of plain lists, strings, numbers and None
+        media_type: COLUMNAR_JSON or MSGPACK
+
+    Returns:
+        Response with the encoded payload
+    """
+    if media_type == MSGPACK:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = orjson.dumps(payload)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
@@ -1,15 +1,47 @@
-from fastapi import FastAPI, HTTPException, status
+import base64
+import datetime
+import json
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
 import uvicorn
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Callable, Dict, List, Any, Literal, Optional, Tuple
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 
-from app.database import db_client
+from app import auth, http_metrics, response_cache as caching, response_formats
+from app.query_budget import QueryBudgetMiddleware, query_budget
+from app.database import db_client, pooling
+from app.reports import csv_export
 from app.api_models.models import *
 
+# Created by the lifespan handler, so importing this module does not open
+# connections or start the Cloud SQL connector.
+database: Optional[db_client.AsyncDataBase] = None
+response_cache = caching.ResponseCache(caching.backend_from_env())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create the database client on startup and release it on shutdown."""
+    global database
+    database = db_client.AsyncDataBase()
+    collector = pooling.DataBaseCollector(database)
+    REGISTRY.register(collector)
+    try:
+        yield
+    finally:
+        REGISTRY.unregister(collector)
+        await database.close()
+        database = None
+        await response_cache.clear()
+
+
 app = FastAPI(
     title="Smart Energy API",
     description="API for managing energy readings and meters",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,84 +51,344 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-database = db_client.DataBase()
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(http_metrics.PrometheusMiddleware)
 
 # ==================== Root Endpoint ====================
 
 
 @app.get("/", tags=["Root"])
-def root() -> Dict[str, str]:
+async def root() -> Dict[str, str]:
     """Root endpoint to check API availability."""
     return {"status": "Smart Energy API is running"}
 
 
+@app.get("/metrics", tags=["Monitoring"])
+async def metrics() -> Response:
+    """Expose request, SQL, connection pool and cache metrics in Prometheus format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # ==================== Reading Endpoints ====================
 
+# Readings per page of the /readings endpoints, by default and at most.
+READINGS_PAGE_SIZE = 1000
+MAX_READINGS_PAGE_SIZE = 5000
+# Facilities per /readings/batch request, at most.
+MAX_BATCH_FACILITIES = 100
+
+
+def _encode_cursor(reading_date: str, reading_id: int) -> str:
+    """Return the opaque cursor pointing after the reading with these keys."""
+    key = f"{reading_date}|{reading_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime.date, int]:
+    """Return the (reading_date, reading_id) encoded in ``cursor``."""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        reading_date, reading_id = key.split("|")
+        return datetime.date.fromisoformat(reading_date), int(reading_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _first_rows(
+    columns: Dict[str, List[Any]], limit: int
+) -> Tuple[Dict[str, List[Any]], bool]:
+    """Cut columnar readings to ``limit`` rows and tell whether rows were cut."""
+    if len(columns["reading_id"]) <= limit:
+        return columns, False
+    return {field: values[:limit] for field, values in columns.items()}, True
+
+
+def _first_batch_rows(
+    readings: Dict[str, List[APIReading]], limit: int
+) -> Tuple[Dict[str, List[APIReading]], Optional[str]]:
+    """Cut batched readings to ``limit`` rows and return the next cursor.
+
+    The readings of all facilities are paged together by (reading_date,
+    reading_id), so the extra row is the latest of the facilities' last rows.
+    """
+    def last_key(name: str) -> Tuple[str, int]:
+        return readings[name][-1].reading_date, readings[name][-1].reading_id
+
+    if sum(len(rows) for rows in readings.values()) <= limit:
+        return readings, None
+    readings[max((name for name, rows in readings.items() if rows), key=last_key)].pop()
+    last = max((name for name, rows in readings.items() if rows), key=last_key)
+    return readings, _encode_cursor(*last_key(last))
+
+
+async def _readings_page(
+    request: Request,
+    response: Response,
+    facility_name: str,
+    meter_type: Optional[str],
+    date_from: Optional[datetime.date],
+    date_to: Optional[datetime.date],
+    limit: int,
+    cursor: Optional[str],
+) -> Any:
+    """Fetch one page of readings and the cursor of the next one.
+
+    The page is rendered in the compact format negotiated by
+    ``response_formats`` if the client asks for one.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    compact = response_formats.negotiate(request)
+    if compact is not None:
+        columns, more = _first_rows(
+            await database.get_reading_columns(
+                facility_name,
+                meter_type,
+                date_from=date_from,
+                date_to=date_to,
+                after=after,
+                limit=limit + 1,
+            ),
+            limit,
+        )
+        next_cursor = None
+        if more:
+            next_cursor = _encode_cursor(columns["reading_date"][-1], columns["reading_id"][-1])
+        return response_formats.render({"readings": columns, "next_cursor": next_cursor}, compact)
+
+    response.headers["Vary"] = "Accept"
+    readings = await database.get_readings(
+        facility_name,
+        meter_type,
+        date_from=date_from,
+        date_to=date_to,
+        after=after,
+        limit=limit + 1,
+    )
+    if not readings:
+        return {"message": "No readings found"}
+
+    next_cursor = None
+    if len(readings) > limit:
+        readings = readings[:limit]
+        next_cursor = _encode_cursor(readings[-1].reading_date, readings[-1].reading_id)
+    return {"readings": readings, "next_cursor": next_cursor}
+
 
 @app.get("/readings/{facility_name}", tags=["Readings"])
-def get_all_readings(facility_name: str) -> Dict[str, Any]:
-    """Get all readings for a facility."""
-    readings = database.get_readings(facility_name)
-    if readings:
-        return {"readings": readings}
-    return {"message": "No readings found"}
+@query_budget(2)
+async def get_all_readings(
+    request: Request,
+    response: Response,
+    facility_name: str,
+    date_from: Optional[datetime.date] = Query(None, alias="from"),
+    date_to: Optional[datetime.date] = Query(None, alias="to"),
+    limit: int = Query(READINGS_PAGE_SIZE, ge=1, le=MAX_READINGS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> Any:
+    """Get readings for a facility, one page at a time.
+
+    Readings are ordered by date; pass ``next_cursor`` of the response as
+    ``cursor`` to get the following page, it is null on the last page.
+    Send ``Accept: application/vnd.smart-energy.columnar+json`` or
+    ``application/x-msgpack`` to get one list per field instead of one
+    object per reading.
+    """
+    try:
+        return await _readings_page(
+            request, response, facility_name, None, date_from, date_to, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.get("/readings/{facility_name}/{meter_type}", tags=["Readings"])
-def get_readings_by_type(facility_name: str, meter_type: str) -> Dict[str, Any]:
-    """Get readings for a specific facility and meter type."""
-    readings = database.get_readings(facility_name, meter_type)
-    if readings:
-        return {"readings": readings}
-    return {"message": "No readings found"}
+@query_budget(2)
+async def get_readings_by_type(
+    request: Request,
+    response: Response,
+    facility_name: str,
+    meter_type: str,
+    date_from: Optional[datetime.date] = Query(None, alias="from"),
+    date_to: Optional[datetime.date] = Query(None, alias="to"),
+    limit: int = Query(READINGS_PAGE_SIZE, ge=1, le=MAX_READINGS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> Any:
+    """Get readings for a specific facility and meter type, one page at a time.
+
+    Supports the compact formats of /readings/{facility_name}.
+    """
+    try:
+        return await _readings_page(
+            request, response, facility_name, meter_type, date_from, date_to, limit, cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.post("/create_reading", tags=["Readings"], status_code=status.HTTP_201_CREATED)
-def create_reading(reading: APIReading) -> Dict[str, Any]:
+@query_budget(8)
+async def create_reading(reading: APIReading) -> Dict[str, Any]:
     """Create a new meter reading."""
     try:
-        database.make_reading(reading)
-        return {"message": "Reading created successfully", "reading": reading}
+        reading_id = await database.make_reading(reading)
+        return {
+            "message": "Reading created successfully",
+            "reading": reading.model_copy(update={"reading_id": reading_id}),
+        }
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@app.post("/readings/bulk", tags=["Readings"], status_code=status.HTTP_201_CREATED)
+@query_budget(6)
+async def create_readings(readings: List[APIReading]) -> Dict[str, Any]:
+    """Create many meter readings in one transaction.
+
+    Readings that cannot be stored are listed in ``errors`` by their index
+    in the request body; the remaining ones are still created.
+    """
+    result = await database.make_readings(readings)
+    return {
+        "message": f"{result.created} readings created successfully",
+        "created": result.created,
+        "errors": result.errors,
+    }
+
+
+@app.post("/readings/batch", tags=["Readings"])
+@query_budget(2)
+async def get_readings_batch(batch: APIReadingsBatch) -> Dict[str, Any]:
+    """Get the readings of many facilities at once, grouped by facility.
+
+    Meant for dashboards: with the facilities from /facilities or
+    /facilities/user/{email}, their readings load in a second request.
+    Every requested facility is a key of ``readings``, with an empty list
+    if it has no readings on the page; unknown facilities are a 404.
+    Readings are paged by date across the facilities, ``limit`` per page;
+    send ``next_cursor`` of the response as ``cursor`` to get the following
+    page, it is null on the last page.
+    """
+    if not batch.facility_names:
+        return {"readings": {}, "next_cursor": None}
+    if len(batch.facility_names) > MAX_BATCH_FACILITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_FACILITIES} facilities per request",
+        )
+    limit = READINGS_PAGE_SIZE if batch.limit is None else batch.limit
+    if not 1 <= limit <= MAX_READINGS_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_READINGS_PAGE_SIZE}",
+        )
+    try:
+        readings = await database.get_readings_batch(
+            batch.facility_names,
+            batch.meter_types,
+            date_from=batch.date_from,
+            date_to=batch.date_to,
+            after=_decode_cursor(batch.cursor) if batch.cursor else None,
+            limit=limit + 1,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    readings, next_cursor = _first_batch_rows(readings, limit)
+    return {"readings": readings, "next_cursor": next_cursor}
+
+
 @app.delete(
     "/delete_reading/{reading_id}",
     tags=["Readings"],
     status_code=status.HTTP_200_OK,
 )
-def delete_reading(reading_id: int) -> Dict[str, str]:
+async def delete_reading(reading_id: int) -> Dict[str, str]:
     """Delete a reading by user email and meter serial number."""
     try:
-        database.delete_reading(reading_id)
+        await database.delete_reading(reading_id)
         return {"message": "Reading deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/update_reading", tags=["Readings"], status_code=status.HTTP_200_OK)
-def update_reading(reading: APIReading) -> Dict[str, str]:
+async def update_reading(reading: APIReading) -> Dict[str, str]:
     """Update a reading's information."""
     try:
-        database.update_reading(reading)
+        await database.update_reading(reading)
         return {"message": "Reading updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+# ==================== Report Endpoints ====================
+
+
+@app.get("/reports/consumption", tags=["Reports"])
+@query_budget(2)
+async def get_consumption_report(
+    meter_type: List[str] = Query(...),
+    year: int = Query(...),
+    facility_name: Optional[str] = None,
+    email: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Get monthly meter values and usage for the given meter types.
+
+    Reports all facilities (or all facilities assigned to ``email``) when
+    ``facility_name`` is omitted or set to ``__ALL__``.
+    """
+    if facility_name == "__ALL__":
+        facility_name = None
+    try:
+        report = await database.get_consumption_report(
+            meter_type, year, facility_name=facility_name, user_email=email
+        )
+        return {"report": report}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@app.get("/reports/consumption/export", tags=["Reports"])
+@query_budget(2)
+async def export_consumption_report(
+    meter_type: List[str] = Query(...),
+    year: int = Query(...),
+    facility_name: Optional[str] = None,
+    email: Optional[str] = None,
+) -> StreamingResponse:
+    """Download the consumption report as CSV, streamed from a server-side cursor."""
+    if facility_name == "__ALL__":
+        facility_name = None
+    try:
+        rows = await database.iter_consumption_report(
+            meter_type, year, facility_name=facility_name, user_email=email
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    unit = csv_export.METER_UNITS.get(meter_type[0], "-")
+    return StreamingResponse(
+        csv_export.aiter_consumption_csv(rows, year, unit),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="Raport_{year}.csv"'},
+    )
+
+
 # ==================== Meter Endpoints ====================
 
 
 @app.get("/meters/{facility_name}", tags=["Meters"])
-def get_meters(facility_name: str) -> Dict[str, Any]:
+@query_budget(2)
+async def get_meters(request: Request, facility_name: str) -> Response:
     """Get all meters for a facility."""
-    try:
-        meters = database.get_all_meters(facility_name)
+
+    async def build() -> Dict[str, Any]:
+        meters = await database.get_all_meters(facility_name)
         if meters:
             return {"meters": meters}
         return {"message": "No meters found"}
+
+    try:
+        return await response_cache.respond(request, f"meters:{facility_name}", build)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
@@ -105,22 +397,30 @@ def get_meters(facility_name: str) -> Dict[str, Any]:
     "/meters/{facility_name}/{meter_type}",
     tags=["Meters"],
 )
-def get_meters_by_type(facility_name: str, meter_type: str) -> Dict[str, Any]:
+@query_budget(2)
+async def get_meters_by_type(
+    request: Request, facility_name: str, meter_type: str
+) -> Response:
     """Get meters of a specific type for a facility."""
-    try:
-        meters = database.get_meters_by_type(facility_name, meter_type)
+
+    async def build() -> Dict[str, Any]:
+        meters = await database.get_meters_by_type(facility_name, meter_type)
         if meters:
             return {"meters": meters}
         return {"message": "No meters found"}
+
+    try:
+        return await response_cache.respond(request, f"meters:{facility_name}", build)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.post("/create_meter", tags=["Meters"], status_code=status.HTTP_201_CREATED)
-def create_meter(meter: APIMeter) -> Dict[str, Any]:
+async def create_meter(meter: APIMeter) -> Dict[str, Any]:
     """Add a new meter."""
     try:
-        database.add_meter(meter)
+        await database.add_meter(meter)
+        await response_cache.invalidate(f"meters:{meter.facility_name}")
         return {"message": "Meter created successfully", "meter": meter}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -129,64 +429,221 @@ def create_meter(meter: APIMeter) -> Dict[str, Any]:
 @app.delete(
     "/delete_meter/{serial_number}", tags=["Meters"], status_code=status.HTTP_200_OK
 )
-def delete_meter(serial_number: str) -> Dict[str, str]:
+async def delete_meter(serial_number: str) -> Dict[str, str]:
     """Delete a meter by serial number."""
     try:
-        database.delete_meter(serial_number)
+        await database.delete_meter(serial_number)
+        # The facility of the meter is not known here
+        await response_cache.invalidate("meters")
         return {"message": "Meter deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/update_meter", tags=["Meters"], status_code=status.HTTP_200_OK)
-def update_meter(meter: APIMeter) -> Dict[str, str]:
+async def update_meter(meter: APIMeter) -> Dict[str, str]:
     """Update a meter's information."""
     try:
-        database.update_meter(meter)
+        await database.update_meter(meter)
+        await response_cache.invalidate("meters")
         return {"message": "Meter updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+# ==================== Search Endpoints ====================
+
+# Results per page of the /search endpoints, by default and at most.
+SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_PAGE_SIZE = 1000
+
+# Sort keys of the reading search: attribute of APIReading holding the sort
+# value and the parser of that value in a cursor.
+_READING_SORT_FIELDS: Dict[str, Tuple[str, Callable[[Any], Any]]] = {
+    "reading_date": ("reading_date", datetime.date.fromisoformat),
+    "value": ("value", float),
+    "serial_number": ("meter_serial_number", str),
+}
+
+
+def _encode_search_cursor(sort: str, key: Any, tiebreaker: Any) -> str:
+    """Return the opaque cursor pointing after the row with ``key`` and ``tiebreaker``."""
+    payload = json.dumps([sort, key, tiebreaker])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_search_cursor(
+    cursor: str,
+    sort: str,
+    parse_key: Callable[[Any], Any],
+    parse_tiebreaker: Callable[[Any], Any],
+) -> Tuple[Any, Any]:
+    """Return the (sort value, tiebreaker) encoded in ``cursor``.
+
+    A cursor is only valid for the sort key it was issued for. Its sort
+    value is None after a row without one, e.g. a reading without a value.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key, tiebreaker = json.loads(payload)
+        if cursor_sort != sort:
+            raise ValueError(cursor_sort)
+        return None if key is None else parse_key(key), parse_tiebreaker(tiebreaker)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/search/readings/{facility_name}", tags=["Readings"])
+@query_budget(2)
+async def search_readings(
+    request: Request,
+    response: Response,
+    facility_name: str,
+    filters: APIMeterFilter = Depends(),
+    date_from: Optional[datetime.date] = Query(None, alias="from"),
+    date_to: Optional[datetime.date] = Query(None, alias="to"),
+    sort: Literal["reading_date", "value", "serial_number"] = "reading_date",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> Any:
+    """Search the readings of a facility, one page at a time.
+
+    Readings can be filtered by the type, serial number prefix, PPE prefix
+    and description of their meter and by date. Pass ``next_cursor`` of the
+    response as ``cursor``, with the same filters and sort, to get the
+    following page; it is null on the last page. Supports the compact
+    formats of /readings/{facility_name}.
+    """
+    attribute, parse_key = _READING_SORT_FIELDS[sort]
+    after = _decode_search_cursor(cursor, sort, parse_key, int) if cursor else None
+    compact = response_formats.negotiate(request)
+    search = database.search_reading_columns if compact else database.search_readings
+    try:
+        readings = await search(
+            facility_name,
+            filters,
+            date_from=date_from,
+            date_to=date_to,
+            sort=sort,
+            descending=order == "desc",
+            after=after,
+            limit=limit + 1,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    if compact is not None:
+        columns, more = _first_rows(readings, limit)
+        next_cursor = None
+        if more:
+            next_cursor = _encode_search_cursor(
+                sort, columns[attribute][-1], columns["reading_id"][-1]
+            )
+        return response_formats.render({"readings": columns, "next_cursor": next_cursor}, compact)
+
+    response.headers["Vary"] = "Accept"
+
+    next_cursor = None
+    if len(readings) > limit:
+        readings = readings[:limit]
+        last = readings[-1]
+        next_cursor = _encode_search_cursor(sort, getattr(last, attribute), last.reading_id)
+    return {"readings": readings, "next_cursor": next_cursor}
+
+
+@app.get("/search/meters/{facility_name}", tags=["Meters"])
+@query_budget(2)
+async def search_meters(
+    request: Request,
+    facility_name: str,
+    filters: APIMeterFilter = Depends(),
+    sort: Literal["serial_number", "meter_type"] = "serial_number",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> Response:
+    """Search the meters of a facility, one page at a time.
+
+    Meters can be filtered by type, serial number prefix, PPE prefix and a
+    substring of their description. Paging works as in /search/readings.
+    """
+    after = _decode_search_cursor(cursor, sort, str, str) if cursor else None
+
+    async def build() -> Dict[str, Any]:
+        meters = await database.search_meters(
+            facility_name,
+            filters,
+            sort=sort,
+            descending=order == "desc",
+            after=after,
+            limit=limit + 1,
+        )
+        next_cursor = None
+        if len(meters) > limit:
+            meters = meters[:limit]
+            last = meters[-1]
+            next_cursor = _encode_search_cursor(sort, getattr(last, sort), last.serial_number)
+        return {"meters": meters, "next_cursor": next_cursor}
+
+    try:
+        return await response_cache.respond(request, f"meters:{facility_name}", build)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
 # ==================== Facilities Endpoints ====================
 
 
 @app.get("/facility/{name}", tags=["Facilities"])
-def get_facility(name: str) -> Dict[str, Any]:
+@query_budget(1)
+async def get_facility(name: str) -> Dict[str, Any]:
     """Get a facility by name."""
     try:
-        facility = database.get_facility(name)
+        facility = await database.get_facility(name)
         return {"facility": facility}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.get("/facilities", tags=["Facilities"])
-def get_all_facilities() -> Dict[str, Any]:
+@query_budget(1)
+async def get_all_facilities(request: Request) -> Response:
     """Get all facilities."""
-    facilities = database.get_all_facilities()
-    if facilities:
-        return {"facilities": facilities}
-    return {"message": "No facilities found"}
+
+    async def build() -> Dict[str, Any]:
+        facilities = await database.get_all_facilities()
+        if facilities:
+            return {"facilities": facilities}
+        return {"message": "No facilities found"}
+
+    return await response_cache.respond(request, "facilities", build)
 
 
 @app.get("/facilities/user/{email}", tags=["Facilities"])
-def get_user_facilities(email: str) -> Dict[str, Any]:
+@query_budget(2)
+async def get_user_facilities(request: Request, email: str) -> Response:
     """Get all facilities for a user."""
-    try:
-        facilities = database.get_all_user_facilities(email)
+
+    async def build() -> Dict[str, Any]:
+        facilities = await database.get_all_user_facilities(email)
         if facilities:
             return {"facilities": facilities}
         return {"message": "No facilities found"}
+
+    try:
+        return await response_cache.respond(request, f"user_facilities:{email}", build)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.post("/create_facility", tags=["Facilities"], status_code=status.HTTP_201_CREATED)
-def create_facility(facility: APIFacility) -> Dict[str, Any]:
+async def create_facility(facility: APIFacility) -> Dict[str, Any]:
     """Create a new facility."""
     try:
-        database.add_facility(facility)
+        await database.add_facility(facility)
+        # Managers see every facility
+        await response_cache.invalidate("facilities", "user_facilities")
         return {"message": "Facility created successfully", "facility": facility}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -195,24 +652,51 @@ def create_facility(facility: APIFacility) -> Dict[str, Any]:
 @app.post(
     "/facilities/assignments", tags=["Facilities"], status_code=status.HTTP_201_CREATED
 )
-def assign_facility(assignment: APIAssignment) -> Dict[str, Any]:
+async def assign_facility(assignment: APIAssignment) -> Dict[str, Any]:
     """Assign a facility to a user."""
     try:
-        database.assign_user_to_facility(
+        await database.assign_user_to_facility(
             assignment.email, assignment.facility_name
         )
+        await response_cache.invalidate(f"user_facilities:{assignment.email}")
         return {"message": "Facility assigned successfully", "assignment": assignment}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@app.post(
+    "/facilities/assignments/bulk",
+    tags=["Facilities"],
+    status_code=status.HTTP_201_CREATED,
+)
+@query_budget(3)
+async def assign_facilities(assignments: List[APIAssignment]) -> Dict[str, Any]:
+    """Assign many facilities to users in one transaction.
+
+    Existing assignments are skipped; pairs with an unknown user or facility
+    are reported in ``errors`` and the rest are still created.
+    """
+    result = await database.assign_users_to_facilities(assignments)
+    await response_cache.invalidate(
+        *{f"user_facilities:{assignment.email}" for assignment in assignments}
+    )
+    return {
+        "message": f"{result.created} assignments created successfully",
+        "created": result.created,
+        "errors": result.errors,
+    }
+
+
 @app.delete(
     "/facilities/{facility_name}", tags=["Facilities"], status_code=status.HTTP_200_OK
 )
-def delete_facility(facility_name: str) -> Dict[str, str]:
+async def delete_facility(facility_name: str) -> Dict[str, str]:
     """Delete a facility by name."""
     try:
-        database.delete_facility(facility_name)
+        await database.delete_facility(facility_name)
+        await response_cache.invalidate(
+            "facilities", "user_facilities", f"meters:{facility_name}"
+        )
         return {"message": "Facility deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -221,22 +705,24 @@ def delete_facility(facility_name: str) -> Dict[str, str]:
 @app.delete(
     "/unassign/facility", tags=["Facilities"], status_code=status.HTTP_200_OK
 )
-def unassign_facility(assignment: APIAssignment) -> Dict[str, str]:
+async def unassign_facility(assignment: APIAssignment) -> Dict[str, str]:
     """Unassign a facility from a user."""
     try:
-        database.remove_user_from_facility(
+        await database.remove_user_from_facility(
             assignment.email, assignment.facility_name
         )
+        await response_cache.invalidate(f"user_facilities:{assignment.email}")
         return {"message": "Facility unassigned successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/update_facility", tags=["Facilities"], status_code=status.HTTP_200_OK)
-def update_facility(facility: APIFacility) -> Dict[str, str]:
+async def update_facility(facility: APIFacility) -> Dict[str, str]:
     """Update a facility's information."""
     try:
-        database.update_facility(facility)
+        await database.update_facility(facility)
+        await response_cache.invalidate("facilities", "user_facilities")
         return {"message": "Facility updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -246,10 +732,11 @@ def update_facility(facility: APIFacility) -> Dict[str, str]:
 
 
 @app.get("/users/{email}", tags=["Users"])
-def get_user(email: str) -> Dict[str, Any]:
+@query_budget(1)
+async def get_user(email: str) -> Dict[str, Any]:
     """Get a user by email."""
     try:
-        user = database.get_user_by_email(email)
+        user = await database.get_user_by_email(email)
         return {
             "user": {
                 "email": user.email,
@@ -261,9 +748,10 @@ def get_user(email: str) -> Dict[str, Any]:
 
 
 @app.get("/users", tags=["Users"])
-def get_all_users() -> Dict[str, Any]:
+@query_budget(1)
+async def get_all_users() -> Dict[str, Any]:
     """Get all users."""
-    users = database.get_all_users()
+    users = await database.get_all_users()
     if users:
         return {
             "users": [
@@ -278,49 +766,55 @@ def get_all_users() -> Dict[str, Any]:
 
 
 @app.post("/create_user", tags=["Users"], status_code=status.HTTP_201_CREATED)
-def create_user(user: APIUser) -> Dict[str, Any]:
+async def create_user(user: APIUser) -> Dict[str, Any]:
     """Create a new user."""
     try:
-        database.add_user(user)
+        await database.add_user(user)
+        await response_cache.invalidate(f"user_facilities:{user.email}")
         return {"message": "User created successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @app.delete("/users/{email}", tags=["Users"], status_code=status.HTTP_200_OK)
-def delete_user(email: str) -> Dict[str, str]:
+async def delete_user(email: str) -> Dict[str, str]:
     """Delete a user by email."""
     try:
-        database.delete_user(email)
+        await database.delete_user(email)
+        auth.tokens.revoke_user(email)
+        await response_cache.invalidate(f"user_facilities:{email}")
         return {"message": "User deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/update_user_role", tags=["Users"], status_code=status.HTTP_200_OK)
-def update_user_role(user_email: str, user_role: int) -> Dict[str, str]:
+async def update_user_role(user_email: str, user_role: int) -> Dict[str, str]:
     """Update a user's role"""
     try:
-        database.update_user(user_email=user_email, user_role=user_role)
+        await database.update_user(user_email=user_email, user_role=user_role)
+        auth.tokens.revoke_user(user_email)
         return {"message": "User role updated successfuly"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/update_user_password", tags=["Users"], status_code=status.HTTP_200_OK)
-def update_user_password(user_email: str, new_password: str) -> Dict[str, str]:
+async def update_user_password(user_email: str, new_password: str) -> Dict[str, str]:
     try:
-        database.update_user(user_email=user_email, hashed_password=new_password)
+        await database.update_user(user_email=user_email, hashed_password=new_password)
+        auth.tokens.revoke_user(user_email)
         return {"message": "User password updated successfuly"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
 @app.put("/users/{email}/block", tags=["Users"], status_code=status.HTTP_200_OK)
-def block_user(email: str) -> Dict[str, str]:
+async def block_user(email: str) -> Dict[str, str]:
     """Block a user by email."""
     try:
-        database.block_user(email)
+        await database.block_user(email)
+        auth.tokens.revoke_user(email)
         return {"message": "User blocked successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -330,17 +824,65 @@ def block_user(email: str) -> Dict[str, str]:
 
 
 @app.post("/login", tags=["Authentication"], status_code=status.HTTP_200_OK)
-def login(user_data: APIUserLogin) -> Dict[str, Any]:
+async def login(user_data: APIUserLogin) -> Dict[str, Any]:
     """Authenticate a user."""
     try:
-        user = database.login_user(user_data.email, user_data.password)
+        user = await database.login_user(user_data.email, user_data.password)
         if not user:
             return {"message": "Invalid credentials", "access_level": None}
-        return {"message": "Login successful", "access_level": user.access_level}
+        return {
+            "message": "Login successful",
+            "access_level": user.access_level,
+            **auth.tokens.issue_pair(user.email, user.access_level),
+        }
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
 
+@app.post("/refresh", tags=["Authentication"], status_code=status.HTTP_200_OK)
+async def refresh(token: APIRefreshToken) -> Dict[str, Any]:
+    """Exchange a refresh token for a new access and refresh token."""
+    try:
+        claims = auth.tokens.validate(token.refresh_token, auth.REFRESH)
+    except auth.TokenError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    # Each refresh token is used once
+    auth.tokens.revoke(claims)
+    # The role may have changed since login, and a blocked or deleted user
+    # gets no new tokens on any worker
+    user = await database.get_active_user(claims.email)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or blocked")
+    return {
+        "message": "Token refreshed",
+        "access_level": user.access_level,
+        **auth.tokens.issue_pair(user.email, user.access_level),
+    }
+
+
+@app.post("/logout", tags=["Authentication"], status_code=status.HTTP_200_OK)
+async def logout(
+    token: Optional[APIRefreshToken] = None,
+    user: auth.TokenClaims = Depends(auth.current_user),
+) -> Dict[str, str]:
+    """Revoke the access token of the request and the given refresh token."""
+    auth.tokens.revoke(user)
+    if token is not None:
+        try:
+            refresh_claims = auth.tokens.validate(token.refresh_token, auth.REFRESH)
+            if refresh_claims.email == user.email:
+                auth.tokens.revoke(refresh_claims)
+        except auth.TokenError:
+            pass
+    return {"message": "Logged out"}
+
+
+@app.get("/me", tags=["Authentication"], status_code=status.HTTP_200_OK)
+async def me(user: auth.TokenClaims = Depends(auth.current_user)) -> Dict[str, Any]:
+    """Return the user of the bearer token."""
+    return {"email": user.email, "access_level": user.access_level}
+
+
 # ==================== Server Startup ====================
 
 
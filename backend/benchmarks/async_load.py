@@ -0,0 +1,103 @@
+"""Throughput of DataBase in a threadpool vs AsyncDataBase on the event loop.
+
+The sync side mirrors the former ``def`` route handlers: each call occupies
+one of FastAPI's 40 threadpool workers while pg8000 blocks. The async side
+awaits the same queries through AsyncDataBase. Both use the default pool
+(5 connections + 10 overflow).
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... \\
+    BENCH_ASYNC_DATABASE_URL=postgresql+asyncpg://... \\
+    python -m benchmarks.async_load [REQUESTS]
+"""
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api_models.models import APIFacility, APIMeter, APIReading, APIUser
+from app.database.db_client import AsyncDataBase
+from benchmarks.common import bench_database
+
+DEFAULT_REQUESTS = 2000
+FACILITIES = 50
+METERS_PER_FACILITY = 20
+THREADPOOL_WORKERS = 40
+CONCURRENCY_LEVELS = [1, 10, 50, 200]
+
+
+def seed(db) -> None:
+    db.add_user(APIUser(email="technik@example.com", password="haslo", access_level=3))
+    readings = []
+    for f in range(FACILITIES):
+        name = f"Obiekt {f:03d}"
+        db.add_facility(APIFacility(name=name, address="ul. Testowa 1", email="obiekt@example.com"))
+        for m in range(METERS_PER_FACILITY):
+            serial_number = f"SN{f:03d}{m:03d}"
+            db.add_meter(APIMeter(
+                serial_number=serial_number,
+                meter_type="Energia elektryczna",
+                facility_name=name,
+                ppe=None,
+                multiply_factor=1.0,
+                description=None,
+            ))
+            readings += [
+                APIReading(
+                    reading_id=0,
+                    value=float(month),
+                    reading_date=f"2025-{month:02d}-28",
+                    meter_serial_number=serial_number,
+                    email="technik@example.com",
+                )
+                for month in range(1, 13)
+            ]
+    db.make_readings(readings)
+
+
+def run_sync(db, requests: int, concurrency: int) -> float:
+    workers = min(concurrency, THREADPOOL_WORKERS)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: db.get_readings(f"Obiekt {i % FACILITIES:03d}"), range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run_async(db: AsyncDataBase, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(i: int) -> None:
+        async with semaphore:
+            await db.get_readings(f"Obiekt {i % FACILITIES:03d}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main_async(requests: int, sync_db) -> None:
+    url = os.environ.get("BENCH_ASYNC_DATABASE_URL")
+    if not url:
+        raise SystemExit("Set BENCH_ASYNC_DATABASE_URL to the same database with an async driver.")
+    async_db = AsyncDataBase(engine=create_async_engine(url))
+
+    print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12}")
+    for concurrency in CONCURRENCY_LEVELS:
+        sync_rate = await asyncio.to_thread(run_sync, sync_db, requests, concurrency)
+        async_rate = await run_async(async_db, requests, concurrency)
+        print(f"{concurrency:>11} {sync_rate:>11.0f} {async_rate:>12.0f}")
+    await async_db.close()
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REQUESTS
+    db = bench_database()
+    seed(db)
+    asyncio.run(main_async(requests, db))
+
+
+if __name__ == "__main__":
+    main()
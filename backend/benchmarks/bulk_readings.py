@@ -0,0 +1,57 @@
+"""Reading ingestion: one make_reading call per reading vs make_readings.
+
+Usage:
+    BENCH_DATABASE_URL=... python -m benchmarks.bulk_readings [ROWS]
+"""
+import sys
+
+from sqlalchemy import text
+
+from app.api_models.models import APIFacility, APIMeter, APIReading, APIUser
+from benchmarks.common import bench_database, timed
+
+DEFAULT_ROWS = 10_000
+METERS = 500
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    db = bench_database()
+
+    db.add_facility(APIFacility(name="Obiekt", address="ul. Testowa 1", email="obiekt@example.com"))
+    db.add_user(APIUser(email="technik@example.com", password="haslo", access_level=3))
+    for i in range(METERS):
+        db.add_meter(APIMeter(
+            serial_number=f"SN{i:06d}",
+            meter_type="Energia elektryczna",
+            facility_name="Obiekt",
+            ppe=None,
+            multiply_factor=1.0,
+            description=None,
+        ))
+
+    readings = [
+        APIReading(
+            reading_id=0,
+            value=float(i),
+            reading_date=f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            meter_serial_number=f"SN{i % METERS:06d}",
+            email="technik@example.com",
+        )
+        for i in range(rows)
+    ]
+
+    with timed("make_reading (per row)", rows):
+        for reading in readings:
+            db.make_reading(reading)
+
+    with db.pool.begin() as conn:
+        conn.execute(text("TRUNCATE readings"))
+
+    with timed("make_readings (bulk)", rows):
+        result = db.make_readings(readings)
+    assert result.created == rows and not result.errors
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Pool checkouts and statements per write operation of DataBase.
+
+Each operation runs once with a cold ID cache, as the first request for an
+entity on a fresh worker does, and the pool checkouts, SQL statements and
+commits it issues are counted through engine events.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... python -m benchmarks.checkouts
+"""
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+
+from app.api_models.models import APIFacility, APIMeter, APIReading, APIUser
+from app.database.db_client import DataBase
+from benchmarks.common import bench_database
+
+
+def operations(db: DataBase, state: Dict[str, int]) -> List[Tuple[str, Callable[[], None]]]:
+    meter = APIMeter(serial_number="SN-1", meter_type="Woda zimna", facility_name="Obiekt 1",
+                     ppe=None, multiply_factor=1.0, description=None)
+    reading = APIReading(reading_id=0, value=10.0, reading_date="2025-01-31",
+                         meter_serial_number="SN-1", email="technik@example.com")
+
+    def make_reading() -> None:
+        db.make_reading(reading)
+        state["reading_id"] = db._fetch_query_results("SELECT reading_id FROM readings")[0][0]
+
+    return [
+        ("add_facility", lambda: db.add_facility(
+            APIFacility(name="Obiekt 1", address="ul. Testowa 1", email="obiekt@example.com"))),
+        ("add_user (technician)", lambda: db.add_user(
+            APIUser(email="technik@example.com", password="haslo", access_level=3))),
+        ("add_user (admin)", lambda: db.add_user(
+            APIUser(email="admin@example.com", password="haslo", access_level=1))),
+        ("add_meter", lambda: db.add_meter(meter)),
+        ("assign_user_to_facility", lambda: db.assign_user_to_facility(
+            "technik@example.com", "Obiekt 1")),
+        ("make_reading", make_reading),
+        ("update_reading", lambda: db.update_reading(
+            reading.model_copy(update={"reading_id": state["reading_id"], "value": 12.0}))),
+        ("delete_reading", lambda: db.delete_reading(state["reading_id"])),
+        ("remove_user_from_facility", lambda: db.remove_user_from_facility(
+            "technik@example.com", "Obiekt 1")),
+        ("delete_meter", lambda: db.delete_meter("SN-1")),
+        ("delete_user", lambda: db.delete_user("technik@example.com")),
+        ("delete_facility", lambda: db.delete_facility("Obiekt 1")),
+    ]
+
+
+def main() -> None:
+    db = bench_database()
+    db.bcrypt_rounds = 4
+    counts: Counter = Counter()
+    event.listen(db.pool, "checkout", lambda *args: counts.update(["checkouts"]))
+    event.listen(db.pool, "before_cursor_execute", lambda *args: counts.update(["statements"]))
+    event.listen(db.pool, "commit", lambda *args: counts.update(["commits"]))
+
+    print(f"{'operation':<28} {'checkouts':>9} {'statements':>10} {'commits':>7}")
+    state: Dict[str, int] = {}
+    for label, operation in operations(db, state):
+        db.id_cache.clear()
+        counts.clear()
+        operation()
+        if label == "make_reading":
+            # Not counted: the lookup of the new reading ID by the benchmark
+            counts.subtract({"checkouts": 1, "statements": 1})
+        print(f"{label:<28} {counts['checkouts']:>9} {counts['statements']:>10} {counts['commits']:>7}")
+
+
+if __name__ == "__main__":
+    main()
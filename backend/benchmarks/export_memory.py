@@ -0,0 +1,77 @@
+"""Peak RSS of the consumption report CSV export against row count.
+
+Compares the streaming export (rows grouped and written chunk by chunk, as
+served by ``/reports/consumption/export``) with building the whole file in
+memory first. Each measurement runs in a fresh interpreter so that peak RSS
+is not inflated by earlier runs. The database cursor is simulated by a lazy
+row generator shaped like the report query result.
+
+Usage:
+    python -m benchmarks.export_memory [ROW_COUNTS...]
+"""
+import datetime
+import resource
+import subprocess
+import sys
+from typing import Iterator
+
+DEFAULT_ROW_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def synthetic_result(meter_count: int) -> Iterator[tuple]:
+    """Yield report query rows for ``meter_count`` meters, 13 months each."""
+    months = [datetime.datetime(2024, 12, 1)] + [
+        datetime.datetime(2025, m, 1) for m in range(1, 13)
+    ]
+    for meter in range(meter_count):
+        facility = f"Obiekt {meter // 50:05d}"
+        value = 1000.0 + meter
+        for i, month in enumerate(months):
+            usage = None if i == 0 else 12.5 * 1.5
+            value += 12.5
+            yield (facility, f"SN{meter:08d}", f"PPE{meter}", 1.5, month, value, usage)
+
+
+def run_child(mode: str, row_count: int) -> None:
+    """Export ``row_count`` report rows and print peak RSS in KiB."""
+    from app.database.db_client import DataBase
+    from app.reports import csv_export
+
+    db = object.__new__(DataBase)
+    months = ["2024-12"] + [f"2025-{m:02d}" for m in range(1, 13)]
+    rows = db._group_consumption_rows(synthetic_result(row_count), months)
+    chunks = csv_export.iter_consumption_csv(rows, 2025, "kWh")
+
+    written = 0
+    if mode == "streaming":
+        for chunk in chunks:
+            written += len(chunk)
+    else:
+        content = "".join(list(chunks))
+        written = len(content)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{peak} {written}")
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]))
+        return
+
+    row_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROW_COUNTS
+    print(f"{'rows':>10} {'mode':>10} {'peak RSS MiB':>13} {'CSV MiB':>9}")
+    for row_count in row_counts:
+        for mode in ("streaming", "buffered"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.export_memory", "--child", mode, str(row_count)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            peak, written = int(output[0]), int(output[1])
+            print(f"{row_count:>10} {mode:>10} {peak / 1024:>13.1f} {written / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
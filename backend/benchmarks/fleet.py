@@ -0,0 +1,165 @@
+"""Synthetic fleets of facilities, meters and monthly readings.
+
+A fleet has N facilities with M meters each, spread over the meter types
+offered in the UI, and one reading per meter at the end of every month
+over K years. Meter values grow by a seasonal monthly usage, as real
+cumulative meters do, so consumption reports over the fleet have
+realistic shapes. Generation is deterministic for a given FleetSpec.
+
+Usage:
+    BENCH_DATABASE_URL=... python -m benchmarks.fleet [FACILITIES] [METERS] [YEARS]
+"""
+import calendar
+import datetime
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator, List
+
+from app.api_models.models import APIAssignment, APIFacility, APIMeter, APIReading, APIUser
+from app.database.db_client import DataBase
+from benchmarks.common import bench_database
+
+# Meter types of the UI with the typical monthly usage of one meter and
+# how much of it depends on the season (1.0: none in summer).
+METER_TYPES = {
+    "Energia elektryczna": (2500.0, 0.2),
+    "Energia klimatyzacja": (800.0, -0.8),
+    "Woda zimna": (60.0, 0.0),
+    "Woda ciepła": (25.0, 0.3),
+    "Licznik ciepła": (40.0, 1.0),
+}
+
+PASSWORD = "haslo-bench"
+# Readings sent per make_readings call when loading a fleet
+LOAD_BATCH = 5000
+
+
+@dataclass(frozen=True)
+class FleetSpec:
+    facilities: int = 20
+    meters_per_facility: int = 25
+    years: int = 2
+    technicians: int = 10
+    last_year: int = 2025
+    seed: int = 7
+
+    @property
+    def readings(self) -> int:
+        return self.facilities * self.meters_per_facility * self.years * 12
+
+
+@dataclass
+class Fleet:
+    spec: FleetSpec
+    facilities: List[APIFacility]
+    users: List[APIUser]
+    meters: List[APIMeter]
+    assignments: List[APIAssignment]
+
+    def readings(self) -> Iterator[APIReading]:
+        """Yield the monthly readings of every meter, month by month."""
+        rnd = random.Random(self.spec.seed)
+        values = [rnd.uniform(0, 10_000) for _ in self.meters]
+        technicians = [user.email for user in self.users if user.access_level == 3]
+        first_year = self.spec.last_year - self.spec.years + 1
+        for year in range(first_year, self.spec.last_year + 1):
+            for month in range(1, 13):
+                date = datetime.date(year, month, calendar.monthrange(year, month)[1])
+                # 1.0 in January, -1.0 in July
+                winter = math.cos(2 * math.pi * (month - 1) / 12)
+                for i, meter in enumerate(self.meters):
+                    usage, seasonality = METER_TYPES[meter.meter_type]
+                    values[i] += usage * (1 + seasonality * winter) * rnd.uniform(0.8, 1.2)
+                    yield APIReading(
+                        reading_id=0,
+                        value=round(values[i], 2),
+                        reading_date=date.isoformat(),
+                        meter_serial_number=meter.serial_number,
+                        email=technicians[i % len(technicians)],
+                    )
+
+
+def generate(spec: FleetSpec) -> Fleet:
+    """Generate the facilities, users, meters and assignments of a fleet."""
+    rnd = random.Random(spec.seed)
+    facilities = [
+        APIFacility(
+            name=f"Obiekt {f:04d}",
+            address=f"ul. Przemysłowa {f + 1}, Wrocław",
+            email=f"obiekt{f:04d}@example.com",
+        )
+        for f in range(spec.facilities)
+    ]
+    users = [APIUser(email="admin@example.com", password=PASSWORD, access_level=1)] + [
+        APIUser(email=f"technik{t:03d}@example.com", password=PASSWORD, access_level=3)
+        for t in range(spec.technicians)
+    ]
+    types = list(METER_TYPES)
+    meters = []
+    for f, facility in enumerate(facilities):
+        for m in range(spec.meters_per_facility):
+            meter_type = types[m % len(types)]
+            electric = meter_type == "Energia elektryczna"
+            meters.append(APIMeter(
+                serial_number=f"{meter_type[:2].upper()}-{f:04d}-{m:04d}",
+                meter_type=meter_type,
+                facility_name=facility.name,
+                ppe=f"PL{rnd.randrange(10**15):015d}" if electric else None,
+                multiply_factor=rnd.choice([1.0, 1.0, 10.0, 40.0]) if electric else 1.0,
+                description=f"{meter_type}, budynek {m % 4 + 1}, piętro {m % 3}",
+            ))
+    technicians = [user for user in users if user.access_level == 3]
+    assignments = [
+        APIAssignment(email=technicians[f % len(technicians)].email, facility_name=facility.name)
+        for f, facility in enumerate(facilities)
+    ]
+    return Fleet(spec, facilities, users, meters, assignments)
+
+
+def load(db: DataBase, fleet: Fleet, readings: bool = True) -> None:
+    """Create ``fleet`` in an empty database through the DataBase methods.
+
+    Args:
+        db: DataBase of an empty schema
+        fleet: Fleet to create
+        readings: Also load the monthly readings of the fleet
+    """
+    for facility in fleet.facilities:
+        db.add_facility(facility)
+    for user in fleet.users:
+        db.add_user(user)
+    for meter in fleet.meters:
+        db.add_meter(meter)
+    db.assign_users_to_facilities(fleet.assignments)
+    if not readings:
+        return
+
+    batch: List[APIReading] = []
+    for reading in fleet.readings():
+        batch.append(reading)
+        if len(batch) == LOAD_BATCH:
+            db.make_readings(batch)
+            batch = []
+    if batch:
+        db.make_readings(batch)
+
+
+def main() -> None:
+    counts = [int(arg) for arg in sys.argv[1:4]]
+    spec = FleetSpec(*counts)
+    db = bench_database()
+    db.bcrypt_rounds = 4
+    start = time.perf_counter()
+    load(db, generate(spec))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{spec.facilities} facilities, {spec.facilities * spec.meters_per_facility} meters, "
+        f"{spec.readings} readings loaded in {elapsed:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
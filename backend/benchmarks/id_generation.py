@@ -0,0 +1,120 @@
+"""Insert throughput and primary key index size: random vs generated IDs.
+
+Loads the same readings into two copies of the readings table, one keyed
+by random 31-bit IDs as the client used to generate them, one by an
+identity column, and reports insert throughput, rows lost to ID collisions
+and the size and leaf density of each primary key index.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... python -m benchmarks.id_generation [ROWS]
+"""
+import datetime
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from benchmarks.common import bench_database
+
+DEFAULT_ROWS = 1_000_000
+BATCH = 1000
+METERS = 2000
+
+TABLES = {
+    "random": """
+        CREATE TABLE bench_readings_random (
+            reading_id integer PRIMARY KEY,
+            value double precision, reading_date date, meter_id bigint
+        )
+    """,
+    "identity": """
+        CREATE TABLE bench_readings_identity (
+            reading_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            value double precision, reading_date date, meter_id bigint
+        )
+    """,
+}
+
+INSERTS = {
+    "random": """
+        INSERT INTO bench_readings_random (reading_id, value, reading_date, meter_id)
+        SELECT * FROM unnest(
+            CAST(:ids AS integer[]), CAST(:values AS double precision[]),
+            CAST(:dates AS date[]), CAST(:meter_ids AS bigint[])
+        )
+        ON CONFLICT DO NOTHING
+    """,
+    "identity": """
+        INSERT INTO bench_readings_identity (value, reading_date, meter_id)
+        SELECT * FROM unnest(
+            CAST(:values AS double precision[]),
+            CAST(:dates AS date[]), CAST(:meter_ids AS bigint[])
+        )
+    """,
+}
+
+
+def batches(rows: int) -> List[Dict[str, list]]:
+    rnd = random.Random(7)
+    start = datetime.date(2020, 1, 1)
+    result = []
+    for offset in range(0, rows, BATCH):
+        size = min(BATCH, rows - offset)
+        result.append({
+            "values": [rnd.random() * 1000 for _ in range(size)],
+            "dates": [start + datetime.timedelta(days=(offset + i) // METERS) for i in range(size)],
+            "meter_ids": [(offset + i) % METERS for i in range(size)],
+        })
+    return result
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    db = bench_database()
+    data = batches(rows)
+
+    # Leaf density needs the pgstattuple extension, sizes are reported without it
+    try:
+        with db.pool.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgstattuple"))
+        has_pgstattuple = True
+    except Exception:
+        has_pgstattuple = False
+
+    print(f"{rows} readings in batches of {BATCH}")
+    print(f"{'ids':<10} {'rows/s':>10} {'lost':>6} {'pk index MB':>12} {'leaf density %':>15}")
+    for name, ddl in TABLES.items():
+        table = f"bench_readings_{name}"
+        with db.pool.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            conn.execute(text(ddl))
+
+        start = time.perf_counter()
+        for batch in data:
+            params = dict(batch)
+            if name == "random":
+                params["ids"] = [uuid.uuid4().int & 0x7FFFFFFF for _ in batch["values"]]
+            with db.pool.begin() as conn:
+                conn.execute(text(INSERTS[name]), params)
+        elapsed = time.perf_counter() - start
+
+        with db.pool.connect() as conn:
+            stored = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            size = conn.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+            density = None
+            if has_pgstattuple:
+                density = conn.execute(
+                    text(f"SELECT avg_leaf_density FROM pgstatindex('{table}_pkey')")
+                ).scalar()
+        density_label = f"{density:.1f}" if density is not None else "n/a"
+        print(
+            f"{name:<10} {rows / elapsed:>10.0f} {rows - stored:>6} "
+            f"{size / 2**20:>12.1f} {density_label:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Login latency under concurrent logins: bcrypt in threads vs processes.
+
+Runs waves of concurrent ``AsyncDataBase.login_user`` calls with bcrypt in
+the default thread executor (the former behaviour) and in the bounded
+process pool of PasswordHasher, and reports login latency percentiles and
+how late a 10 ms heartbeat on the event loop fires while logins run.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... \\
+    BENCH_ASYNC_DATABASE_URL=postgresql+asyncpg://... \\
+    python -m benchmarks.login_latency [CONCURRENCY] [WAVES]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api_models.models import APIUser
+from app.database import passwords
+from app.database.db_client import AsyncDataBase
+from benchmarks.common import bench_database
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_WAVES = 4
+USERS = 10
+PASSWORD = "haslo-technika"
+HEARTBEAT = 0.01
+
+
+class ThreadHasher(passwords.PasswordHasher):
+    """bcrypt in asyncio's default thread executor, as before the process pool."""
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.to_thread(passwords.hash_password, password, self.rounds)
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await asyncio.to_thread(
+            passwords.verify_password, password, hashed_password, self.rounds
+        )
+
+
+def percentile(values: List[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - start - HEARTBEAT)
+
+
+async def run(db: AsyncDataBase, concurrency: int, waves: int) -> Tuple[List[float], List[float]]:
+    latencies: List[float] = []
+    lags: List[float] = []
+
+    async def login(i: int) -> None:
+        start = time.perf_counter()
+        user = await db.login_user(f"technik{i % USERS}@example.com", PASSWORD)
+        assert user is not None
+        latencies.append(time.perf_counter() - start)
+
+    # Warm-up: starts the worker processes and fills the connection pool
+    await asyncio.gather(*(login(i) for i in range(db.hasher.max_workers)))
+    latencies.clear()
+
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    for _ in range(waves):
+        await asyncio.gather(*(login(i) for i in range(concurrency)))
+    stop.set()
+    await beat
+    return latencies, lags
+
+
+async def main_async(concurrency: int, waves: int) -> None:
+    url = os.environ.get("BENCH_ASYNC_DATABASE_URL")
+    if not url:
+        raise SystemExit("Set BENCH_ASYNC_DATABASE_URL to the same database with an async driver.")
+
+    rounds = passwords.bcrypt_rounds()
+    print(f"bcrypt rounds {rounds}, {concurrency} concurrent logins x {waves} waves, {os.cpu_count()} CPUs")
+    print(f"{'executor':<26} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'loop lag p99 ms':>16}")
+    for label, hasher in (
+        ("threads (to_thread)", ThreadHasher(rounds=rounds)),
+        (f"processes ({passwords.PasswordHasher().max_workers} workers)", passwords.PasswordHasher(rounds=rounds)),
+    ):
+        db = AsyncDataBase(engine=create_async_engine(url))
+        db.hasher.shutdown()
+        db.hasher = db.database.hasher = hasher
+        latencies, lags = await run(db, concurrency, waves)
+        await db.close()
+        print(
+            f"{label:<26} {percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}"
+            f" {max(latencies) * 1000:>8.0f} {percentile(lags, 99) * 1000:>16.1f}"
+        )
+
+
+def main() -> None:
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONCURRENCY
+    waves = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WAVES
+    db = bench_database()
+    for i in range(USERS):
+        db.add_user(APIUser(email=f"technik{i}@example.com", password=PASSWORD, access_level=3))
+    asyncio.run(main_async(concurrency, waves))
+
+
+if __name__ == "__main__":
+    main()
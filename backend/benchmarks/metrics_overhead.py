@@ -0,0 +1,113 @@
+"""Overhead of the request and SQL metrics.
+
+The instrumentation is timed around no-op work, so the difference is not
+lost in the noise of real queries and requests, and set against the
+cheapest real work it wraps:
+
+- the ``query_metrics.timed`` wrapper around a no-op helper, against
+  ``_fetch_query_results("SELECT 1")`` on in-memory SQLite;
+- PrometheusMiddleware around a no-op ASGI app, against a request to a
+  trivial FastAPI route through httpx.
+
+Usage:
+    python -m benchmarks.metrics_overhead [CALLS]
+"""
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+import sqlalchemy
+from fastapi import FastAPI
+from sqlalchemy.pool import StaticPool
+
+from app.database import query_metrics
+from app.database.db_client import DataBase
+from app.http_metrics import PrometheusMiddleware
+
+DEFAULT_CALLS = 100_000
+REPEATS = 5
+
+
+def best_of(run: Callable[[], float]) -> float:
+    """Return the fastest of REPEATS runs, in seconds."""
+    return min(run() for _ in range(REPEATS))
+
+
+def loop_seconds(call: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return time.perf_counter() - start
+
+
+async def noop_app(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def asgi_seconds(app: Any, calls: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/ping"}
+    messages: List[Any] = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Dict[str, Any]) -> None:
+        messages.append(message)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+async def request_seconds(app: Any, calls: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await client.get("/ping")
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLS
+
+    def helper() -> List[tuple]:
+        return []
+
+    wrapped = query_metrics.timed("fetch", rows=len)(helper)
+    query_overhead = (best_of(lambda: loop_seconds(wrapped, calls))
+                      - best_of(lambda: loop_seconds(helper, calls))) / calls
+
+    db = DataBase(pool=sqlalchemy.create_engine("sqlite://", poolclass=StaticPool))
+    query_metrics.enabled = False
+    select_calls = calls // 10
+    select = best_of(lambda: loop_seconds(lambda: db._fetch_query_results("SELECT 1"), select_calls))
+    select /= select_calls
+    query_metrics.enabled = True
+
+    middleware = PrometheusMiddleware(noop_app)
+    request_overhead = (best_of(lambda: asyncio.run(asgi_seconds(middleware, calls)))
+                        - best_of(lambda: asyncio.run(asgi_seconds(noop_app, calls)))) / calls
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, Any]:
+        return {}
+
+    request_calls = calls // 50
+    request = best_of(lambda: asyncio.run(request_seconds(app, request_calls))) / request_calls
+
+    print(f"{'instrumentation':<22} {'overhead us':>11} {'wrapped work':<28} {'work us':>8} {'share':>7}")
+    print(f"{'SQL statement metrics':<22} {query_overhead * 1e6:>11.2f} {'SELECT 1, in-memory SQLite':<28} "
+          f"{select * 1e6:>8.1f} {100 * query_overhead / select:>6.1f}%")
+    print(f"{'request middleware':<22} {request_overhead * 1e6:>11.2f} {'GET of a no-op route':<28} "
+          f"{request * 1e6:>8.1f} {100 * request_overhead / request:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Date-bounded readings queries on the flat and the monthly partitioned layout.
+
+Loads daily readings of a synthetic fleet (10 million by default) into
+BENCH_DATABASE_URL, times the date-bounded reads and the write paths on
+the flat readings table, partitions it with ``manage partition-readings``
+(migrations.partition_readings) and times them again. Readings are
+generated in the database, one INSERT ... SELECT per facility, as loading
+10 million through make_readings would take most of the run.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... \\
+    python -m benchmarks.partitioning [--rows N] [--facilities F] [--years K]
+        [--iterations I]
+"""
+import argparse
+import datetime
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.api_models.models import APIMeterFilter
+from app.database import migrations
+from app.database.db_client import DataBase
+from benchmarks import fleet as fleets
+from benchmarks.common import bench_database
+from benchmarks.suite import BULK_SIZE, NewReadings, QueryCounter, measure, print_result
+
+DEFAULT_ROWS = 10_000_000
+DEFAULT_FACILITIES = 50
+DEFAULT_YEARS = 3
+DEFAULT_ITERATIONS = 50
+
+
+def load_readings(db: DataBase, fleet: fleets.Fleet) -> int:
+    """Insert one reading per meter and day of the fleet's years, return their count."""
+    first_day = datetime.date(fleet.spec.last_year - fleet.spec.years + 1, 1, 1)
+    last_day = datetime.date(fleet.spec.last_year, 12, 31)
+    query = text("""
+        INSERT INTO readings (value, reading_date, meter_id, user_id)
+        SELECT (CAST(day AS date) - CAST(:first_day AS date)) * (1 + mod(m.meter_id, 50))
+                   + random(),
+               CAST(day AS date), m.meter_id,
+               (SELECT MAX(a.user_id) FROM assignments a WHERE a.facility_id = f.facility_id)
+        FROM meters m
+        JOIN facilities f ON m.facility_id = f.facility_id
+        CROSS JOIN generate_series(CAST(:first_day AS date), CAST(:last_day AS date),
+                                   interval '1 day') AS day
+        WHERE f.name = :facility_name
+    """)
+    count = 0
+    for facility in fleet.facilities:
+        with db.pool.begin() as conn:
+            count += conn.execute(query, {
+                "first_day": first_day,
+                "last_day": last_day,
+                "facility_name": facility.name,
+            }).rowcount
+    return count
+
+
+def vacuum_analyze(db: DataBase) -> None:
+    # Index-only scans need an up to date visibility map
+    with db.pool.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM ANALYZE")
+
+
+def operations(db: DataBase, fleet: fleets.Fleet) -> Dict[str, Callable[[int], Any]]:
+    facilities = [facility.name for facility in fleet.facilities]
+    year = fleet.spec.last_year
+    new_readings = NewReadings(fleet)
+
+    def facility(i: int) -> str:
+        return facilities[i % len(facilities)]
+
+    def month(i: int) -> datetime.date:
+        return datetime.date(year, i % 12 + 1, 1)
+
+    def month_end(i: int) -> datetime.date:
+        return (month(i) + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+
+    return {
+        "get_readings(month)": lambda i: db.get_readings(
+            facility(i), date_from=month(i), date_to=month_end(i)
+        ),
+        "get_readings(meter_type, quarter)": lambda i: db.get_readings(
+            facility(i), "Woda zimna", date_from=month(i // 3 * 3),
+            date_to=month_end(i // 3 * 3 + 2),
+        ),
+        "get_readings(page after date)": lambda i: db.get_readings(
+            facility(i), after=(month(i), 0), limit=100
+        ),
+        "get_reading_columns(month)": lambda i: db.get_reading_columns(
+            facility(i), date_from=month(i), date_to=month_end(i)
+        ),
+        "search_readings(month, by value)": lambda i: db.search_readings(
+            facility(i), APIMeterFilter(meter_type="Energia elektryczna"),
+            date_from=month(i), date_to=month_end(i), sort="value", descending=True, limit=100,
+        ),
+        "get_readings_batch(10 facilities, month)": lambda i: db.get_readings_batch(
+            [facility(i + k) for k in range(10)], date_from=month(i), date_to=month_end(i)
+        ),
+        "get_consumption_report(facility)": lambda i: db.get_consumption_report(
+            ["Energia elektryczna", "Woda zimna"], year, facility_name=facility(i)
+        ),
+        "make_reading": lambda i: db.make_reading(new_readings.next(1)[0]),
+        f"make_readings({BULK_SIZE})": lambda i: db.make_readings(new_readings.next(BULK_SIZE)),
+    }
+
+
+def run(db: DataBase, fleet: fleets.Fleet, iterations: int) -> Dict[str, Dict[str, float]]:
+    print(f"{'operation':<44} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    counter = QueryCounter(db.pool)
+    results = {}
+    for name, call in operations(db, fleet).items():
+        results[name] = measure(call, iterations, counter)
+        print_result(name, results[name])
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="readings to load")
+    parser.add_argument("--facilities", type=int, default=DEFAULT_FACILITIES)
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    args = parser.parse_args(argv)
+
+    days = (datetime.date(fleets.FleetSpec.last_year + 1, 1, 1)
+            - datetime.date(fleets.FleetSpec.last_year - args.years + 1, 1, 1)).days
+    spec = fleets.FleetSpec(
+        facilities=args.facilities,
+        meters_per_facility=math.ceil(args.rows / days / args.facilities),
+        years=args.years,
+    )
+    db = bench_database()
+    db.bcrypt_rounds = 4
+    fleet = fleets.generate(spec)
+    fleets.load(db, fleet, readings=False)
+    start = time.perf_counter()
+    count = load_readings(db, fleet)
+    db.rebuild_monthly_consumption()
+    vacuum_analyze(db)
+    print(f"Loaded {count} readings of {len(fleet.meters)} meters "
+          f"in {time.perf_counter() - start:.1f} s\n")
+
+    print("Flat readings table")
+    flat = run(db, fleet, args.iterations)
+
+    start = time.perf_counter()
+    partitions = migrations.partition_readings(db.pool)
+    vacuum_analyze(db)
+    print(f"\nPartitioned into {len(partitions)} months "
+          f"in {time.perf_counter() - start:.1f} s\n")
+    print("Partitioned readings table")
+    partitioned = run(db, fleet, args.iterations)
+    db.close()
+
+    print(f"\n{'operation':<44} {'flat p50':>9} {'part p50':>9} {'change':>8}")
+    for name, result in partitioned.items():
+        before = flat[name]["p50_ms"]
+        change = 100 * (result["p50_ms"] - before) / before
+        print(f"{name:<44} {before:>9.2f} {result['p50_ms']:>9.2f} {change:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
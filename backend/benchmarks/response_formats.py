@@ -0,0 +1,109 @@
+"""Serialization time and payload size of the reading response formats.
+
+Fetches every page of a facility's readings from ``/readings/{facility}``
+in the default format (one object per reading), in columnar JSON and, if
+msgpack is installed, in MessagePack. Requests go through the real routes
+in process via httpx; the database is replaced by synthetic query rows,
+so the timings cover building and encoding the responses only.
+
+Usage:
+    python -m benchmarks.response_formats [READINGS]
+"""
+import asyncio
+import datetime
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app import response_formats, server
+from app.database.db_client import DataBase
+
+DEFAULT_READINGS = 100_000
+METERS = 200
+
+FORMATS = {
+    "objects (default)": "application/json",
+    "columnar JSON": response_formats.COLUMNAR_JSON,
+}
+if response_formats.msgpack is not None:
+    FORMATS["MessagePack"] = response_formats.MSGPACK
+
+
+def synthetic_rows(count: int) -> List[tuple]:
+    """Return reading query rows, ordered by (reading_date, reading_id)."""
+    start = datetime.date(2020, 1, 1)
+    return [
+        (i + 1, 1000.0 + i * 0.25, start + datetime.timedelta(days=i // METERS),
+         f"SN{i % METERS:08d}", f"technik{i % 7}@example.com")
+        for i in range(count)
+    ]
+
+
+class SyntheticDataBase:
+    """Answers the reading endpoints from in-memory rows through the
+    row-to-response code of DataBase."""
+
+    def __init__(self, rows: List[tuple]) -> None:
+        self.rows = rows
+        self.database = object.__new__(DataBase)
+        self.database._get_facility_id = lambda name: 1
+        self.database._fetch_query_results = self._fetch
+
+    def _fetch(self, query: str, params: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        start = 0
+        if "after_id" in params:
+            start = params["after_id"]  # reading IDs are row positions + 1
+        return self.rows[start:start + params["limit"]]
+
+    async def get_readings(self, *args: Any, **kwargs: Any) -> Any:
+        return self.database.get_readings(*args, **kwargs)
+
+    async def get_reading_columns(self, *args: Any, **kwargs: Any) -> Any:
+        return self.database.get_reading_columns(*args, **kwargs)
+
+
+async def fetch_all(client: httpx.AsyncClient, accept: str) -> Dict[str, float]:
+    """Fetch every page in the ``accept`` format; return time, bytes and pages."""
+    cursor = None
+    size = pages = 0
+    start = time.perf_counter()
+    while True:
+        params = {"limit": server.MAX_READINGS_PAGE_SIZE}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/readings/Obiekt", params=params, headers={"Accept": accept})
+        response.raise_for_status()
+        size += len(response.content)
+        pages += 1
+        if accept == response_formats.MSGPACK:
+            cursor = response_formats.msgpack.unpackb(response.content)["next_cursor"]
+        else:
+            cursor = response.json()["next_cursor"]
+        if not cursor:
+            break
+    return {"seconds": time.perf_counter() - start, "bytes": size, "pages": pages}
+
+
+async def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_READINGS
+    server.database = SyntheticDataBase(synthetic_rows(count))
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{count} readings, pages of {server.MAX_READINGS_PAGE_SIZE}")
+        print(f"{'format':<20} {'seconds':>8} {'us/reading':>11} {'payload MB':>11}")
+        for label, accept in FORMATS.items():
+            await fetch_all(client, accept)  # warm up
+            result = min(
+                [await fetch_all(client, accept) for _ in range(3)],
+                key=lambda r: r["seconds"],
+            )
+            print(
+                f"{label:<20} {result['seconds']:>8.3f} "
+                f"{result['seconds'] / count * 1e6:>11.2f} {result['bytes'] / 2**20:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
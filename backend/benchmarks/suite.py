@@ -0,0 +1,315 @@
+"""Latency and query counts of the DataBase methods and API routes on a fleet.
+
+Loads a synthetic fleet (see benchmarks.fleet) into BENCH_DATABASE_URL and
+times the read and write paths of the app, both as DataBase method calls
+and as requests to the FastAPI routes through httpx, against an
+AsyncDataBase on the same database. Every operation reports ops/s, p50 and
+p99 latency and the SQL statements it ran per call.
+
+Results are written as JSON to benchmarks/results/, named after the
+timestamp and commit, so runs on different commits can be compared with
+``--compare``.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+pg8000://... \\
+    [BENCH_ASYNC_DATABASE_URL=postgresql+asyncpg://...] \\
+    python -m benchmarks.suite [--facilities N] [--meters M] [--years K]
+        [--iterations I] [--compare RESULTS.json] [--skip-routes]
+"""
+import argparse
+import asyncio
+import dataclasses
+import datetime
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import sqlalchemy
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import server
+from app.api_models.models import APIMeterFilter, APIReading
+from app.database.db_client import AsyncDataBase, DataBase
+from benchmarks import fleet as fleets
+from benchmarks.common import bench_database
+
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+DEFAULT_ITERATIONS = 200
+# Calls made before timing, to warm up the pool, caches and plans
+WARMUP = 5
+# Readings per make_readings call
+BULK_SIZE = 100
+REPORT_TYPES = ["Energia elektryczna", "Energia klimatyzacja"]
+
+
+class QueryCounter:
+    """Count the statements sent through an engine."""
+
+    def __init__(self, engine: sqlalchemy.engine.Engine) -> None:
+        self.count = 0
+        sqlalchemy.event.listen(engine, "before_cursor_execute", self._executed)
+
+    def _executed(self, *args: Any) -> None:
+        self.count += 1
+
+
+def summarize(latencies: List[float], queries: int) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    calls = len(latencies)
+    return {
+        "calls": calls,
+        "ops_per_sec": calls / sum(latencies),
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p99_ms": 1000 * latencies[min(calls - 1, int(0.99 * calls))],
+        "queries_per_op": queries / calls,
+    }
+
+
+def measure(call: Callable[[int], Any], iterations: int, counter: QueryCounter) -> Dict[str, float]:
+    for i in range(WARMUP):
+        call(i)
+    latencies = []
+    counter.count = 0
+    for i in range(iterations):
+        start = time.perf_counter()
+        call(WARMUP + i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, counter.count)
+
+
+async def measure_async(
+    call: Callable[[int], Awaitable[Any]], iterations: int, counter: QueryCounter
+) -> Dict[str, float]:
+    for i in range(WARMUP):
+        await call(i)
+    latencies = []
+    counter.count = 0
+    for i in range(iterations):
+        start = time.perf_counter()
+        await call(WARMUP + i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, counter.count)
+
+
+class NewReadings:
+    """Readings for dates after the fleet's, one day further on every call."""
+
+    def __init__(self, fleet: fleets.Fleet) -> None:
+        self.fleet = fleet
+        self.day = datetime.date(fleet.spec.last_year + 1, 1, 1)
+
+    def next(self, count: int) -> List[APIReading]:
+        meters = self.fleet.meters[:count]
+        self.day += datetime.timedelta(days=1)
+        return [
+            APIReading(
+                reading_id=0,
+                value=1_000_000.0,
+                reading_date=self.day.isoformat(),
+                meter_serial_number=meter.serial_number,
+                email=self.fleet.assignments[0].email,
+            )
+            for meter in meters
+        ]
+
+
+def database_operations(db: DataBase, fleet: fleets.Fleet) -> Dict[str, Callable[[int], Any]]:
+    facilities = [facility.name for facility in fleet.facilities]
+    technicians = [user.email for user in fleet.users if user.access_level == 3]
+    year = fleet.spec.last_year
+    new_readings = NewReadings(fleet)
+
+    def facility(i: int) -> str:
+        return facilities[i % len(facilities)]
+
+    return {
+        "get_readings": lambda i: db.get_readings(facility(i)),
+        "get_readings(meter_type)": lambda i: db.get_readings(facility(i), "Woda zimna"),
+        "get_reading_columns": lambda i: db.get_reading_columns(facility(i)),
+        "get_readings(page)": lambda i: db.get_readings(facility(i), limit=100),
+        "search_meters": lambda i: db.search_meters(
+            facility(i), APIMeterFilter(description="budynek 2"), limit=50
+        ),
+        "search_readings": lambda i: db.search_readings(
+            facility(i), APIMeterFilter(meter_type="Energia elektryczna"),
+            sort="value", descending=True, limit=100,
+        ),
+        "get_consumption_report(facility)": lambda i: db.get_consumption_report(
+            REPORT_TYPES, year, facility_name=facility(i)
+        ),
+        "get_consumption_report(user)": lambda i: db.get_consumption_report(
+            REPORT_TYPES, year, user_email=technicians[i % len(technicians)]
+        ),
+        "get_all_user_facilities": lambda i: db.get_all_user_facilities(
+            technicians[i % len(technicians)]
+        ),
+        "make_reading": lambda i: db.make_reading(new_readings.next(1)[0]),
+        f"make_readings({BULK_SIZE})": lambda i: db.make_readings(new_readings.next(BULK_SIZE)),
+    }
+
+
+def route_operations(
+    client: httpx.AsyncClient, fleet: fleets.Fleet
+) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    facilities = [facility.name for facility in fleet.facilities]
+    year = fleet.spec.last_year
+    new_readings = NewReadings(fleet)
+    # A later year than the DataBase operations wrote to
+    new_readings.day = new_readings.day.replace(year=new_readings.day.year + 1)
+
+    def facility(i: int) -> str:
+        return facilities[i % len(facilities)]
+
+    async def get(url: str, **kwargs: Any) -> None:
+        response = await client.get(url, **kwargs)
+        response.raise_for_status()
+
+    async def post(url: str, body: Any) -> None:
+        response = await client.post(url, json=body)
+        response.raise_for_status()
+
+    return {
+        "GET /readings/{facility_name}": lambda i: get(f"/readings/{facility(i)}"),
+        "GET /readings/{facility_name} columnar": lambda i: get(
+            f"/readings/{facility(i)}",
+            headers={"Accept": "application/vnd.smart-energy.columnar+json"},
+        ),
+        "GET /search/readings/{facility_name}": lambda i: get(
+            f"/search/readings/{facility(i)}",
+            params={"meter_type": "Energia elektryczna", "sort": "value", "order": "desc"},
+        ),
+        "GET /reports/consumption": lambda i: get(
+            "/reports/consumption",
+            params={"meter_type": REPORT_TYPES, "year": year, "facility_name": facility(i)},
+        ),
+        "POST /create_reading": lambda i: post(
+            "/create_reading", new_readings.next(1)[0].model_dump()
+        ),
+        f"POST /readings/bulk ({BULK_SIZE})": lambda i: post(
+            "/readings/bulk", [reading.model_dump() for reading in new_readings.next(BULK_SIZE)]
+        ),
+    }
+
+
+def async_database_url() -> str:
+    """Return BENCH_ASYNC_DATABASE_URL, or BENCH_DATABASE_URL with the asyncpg driver."""
+    url = os.environ.get("BENCH_ASYNC_DATABASE_URL")
+    if url:
+        return url
+    url = sqlalchemy.engine.make_url(os.environ["BENCH_DATABASE_URL"])
+    # pg8000 takes the path of a unix socket, asyncpg its directory
+    query = dict(url.query)
+    unix_sock = query.pop("unix_sock", None)
+    if unix_sock:
+        query["host"] = os.path.dirname(unix_sock)
+    return url.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+
+async def run_routes(fleet: fleets.Fleet, iterations: int) -> Dict[str, Dict[str, float]]:
+    engine = create_async_engine(async_database_url())
+    server.database = AsyncDataBase(engine=engine)
+    await server.response_cache.clear()
+    counter = QueryCounter(engine.sync_engine)
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, call in route_operations(client, fleet).items():
+                results[name] = await measure_async(call, iterations, counter)
+                print_result(name, results[name])
+    finally:
+        await engine.dispose()
+    return results
+
+
+def git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_result(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<44} {result['ops_per_sec']:>9.1f} {result['p50_ms']:>9.2f} "
+          f"{result['p99_ms']:>9.2f} {result['queries_per_op']:>8.1f}")
+
+
+def compare(results: Dict[str, Dict[str, float]], path: str) -> None:
+    """Print the change of every operation against a previous results file."""
+    previous = json.loads(pathlib.Path(path).read_text())
+    print(f"\nChange against {previous['commit'] or path}:")
+    print(f"{'operation':<44} {'ops/s':>9} {'p50':>9} {'p99':>9} {'queries':>8}")
+    for name, result in results.items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        changes = [
+            100 * (result[key] - before[key]) / before[key] if before[key] else 0.0
+            for key in ("ops_per_sec", "p50_ms", "p99_ms", "queries_per_op")
+        ]
+        print(f"{name:<44} " + " ".join(f"{change:>+8.1f}%" for change in changes))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--facilities", type=int, default=fleets.FleetSpec.facilities)
+    parser.add_argument("--meters", type=int, default=fleets.FleetSpec.meters_per_facility,
+                        help="meters per facility")
+    parser.add_argument("--years", type=int, default=fleets.FleetSpec.years)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--compare", metavar="RESULTS", help="previous results file")
+    parser.add_argument("--skip-routes", action="store_true", help="time the DataBase methods only")
+    args = parser.parse_args(argv)
+
+    spec = fleets.FleetSpec(facilities=args.facilities, meters_per_facility=args.meters,
+                            years=args.years)
+    db = bench_database()
+    db.bcrypt_rounds = 4
+    fleet = fleets.generate(spec)
+    start = time.perf_counter()
+    fleets.load(db, fleet)
+    print(f"Loaded {spec.readings} readings of {len(fleet.meters)} meters "
+          f"in {time.perf_counter() - start:.1f} s\n")
+    with db.pool.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+    print(f"{'operation':<44} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    counter = QueryCounter(db.pool)
+    results = {}
+    for name, call in database_operations(db, fleet).items():
+        results[name] = measure(call, args.iterations, counter)
+        print_result(name, results[name])
+    if not args.skip_routes:
+        results.update(asyncio.run(run_routes(fleet, args.iterations)))
+    db.close()
+
+    commit = git("rev-parse", "--short", "HEAD")
+    report = {
+        "commit": commit,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": db.pool.dialect.name,
+        "spec": dataclasses.asdict(spec),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit or 'unknown'}.json"
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from app import auth, query_budget, server
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Keep cached API responses from leaking between tests."""
+    yield
+    asyncio.run(server.response_cache.clear())
+
+
+@pytest.fixture(autouse=True)
+def clear_token_denylist():
+    """Keep revoked tokens from leaking between tests."""
+    yield
+    auth.tokens.denylist.clear()
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(monkeypatch):
+    """Fail requests that run more SQL statements than their route's budget."""
+    monkeypatch.setattr(query_budget, "enforce", True)
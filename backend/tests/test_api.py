@@ -1,8 +1,9 @@
+import datetime
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
-from app.server import app
-from app.api_models.models import APIReading, APIMeter, APIFacility, APIUser, APIAssignment
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.server import _encode_search_cursor, app
+from app.api_models.models import APIReading, APIMeter, APIFacility, APIUser, APIAssignment, APIConsumptionReport, APIConsumptionRow, APIConsumptionMonth, APIBulkResult, APIBulkError, APIMeterFilter
 
 @pytest.fixture
 def client():
@@ -10,7 +11,7 @@ def client():
 
 @pytest.fixture
 def mock_db():
-    with patch("app.server.database") as mock_db:
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
         yield mock_db
 
 # Root endpoint tests
@@ -20,6 +21,18 @@ def test_root_endpoint(client):
     assert response.status_code == 200
     assert response.json() == {"status": "Smart Energy API is running"}
 
+def test_metrics_endpoint(monkeypatch, tmp_path):
+    """Test that pool and cache metrics are exposed for Prometheus."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "db_pool_checkout_seconds" in response.text
+    assert "db_pool_size" in response.text
+    assert "id_cache_hits_total" in response.text
+
 # Reading endpoint tests
 def test_get_all_readings(client, mock_db):
     """Test getting all readings for a facility."""
@@ -53,7 +66,53 @@ def test_get_readings_by_type(client, mock_db):
     response = client.get("/readings/TestFacility/electric")
     assert response.status_code == 200
     assert "readings" in response.json()
-    mock_db.get_readings.assert_called_with("TestFacility", "electric")
+    mock_db.get_readings.assert_called_with(
+        "TestFacility", "electric", date_from=None, date_to=None, after=None, limit=1001
+    )
+
+def test_get_readings_pagination(client, mock_db):
+    """Test date filters, page size and the next page cursor."""
+    mock_db.get_readings.return_value = [
+        APIReading(
+            reading_id=i,
+            value=100.0 + i,
+            reading_date=f"2025-0{i}-01",
+            meter_serial_number="SN123",
+            email="test@example.com"
+        )
+        for i in range(1, 4)
+    ]
+
+    response = client.get("/readings/TestFacility?from=2025-01-01&to=2025-06-30&limit=2")
+    assert response.status_code == 200
+    assert [r["reading_id"] for r in response.json()["readings"]] == [1, 2]
+    cursor = response.json()["next_cursor"]
+    assert cursor
+    assert mock_db.get_readings.call_args.kwargs == {
+        "date_from": datetime.date(2025, 1, 1),
+        "date_to": datetime.date(2025, 6, 30),
+        "after": None,
+        "limit": 3,
+    }
+
+    mock_db.get_readings.return_value = mock_db.get_readings.return_value[2:]
+    response = client.get(f"/readings/TestFacility?limit=2&cursor={cursor}")
+    assert response.json()["next_cursor"] is None
+    assert mock_db.get_readings.call_args.kwargs["after"] == (datetime.date(2025, 2, 1), 2)
+
+    assert client.get("/readings/TestFacility?cursor=bogus").status_code == 400
+    assert client.get("/readings/TestFacility?limit=0").status_code == 422
+
+def test_get_readings_unknown_facility(client, mock_db):
+    """Test that readings of an unknown facility are a 404."""
+    mock_db.get_readings.side_effect = ValueError("Facility with name Magazyn not found")
+    mock_db.get_reading_columns.side_effect = ValueError("Facility with name Magazyn not found")
+
+    assert client.get("/readings/Magazyn").status_code == 404
+    response = client.get("/readings/Magazyn/Woda zimna",
+                          headers={"Accept": "application/vnd.smart-energy.columnar+json"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Facility with name Magazyn not found"
 
 def test_create_reading(client, mock_db):
     """Test creating a new reading."""
@@ -65,9 +124,11 @@ def test_create_reading(client, mock_db):
         "email": "test@example.com"
     }
     
+    mock_db.make_reading.return_value = 42
     response = client.post("/create_reading", json=reading_data)
     assert response.status_code == 201
     assert response.json()["message"] == "Reading created successfully"
+    assert response.json()["reading"]["reading_id"] == 42
     mock_db.make_reading.assert_called_once()
 
 def test_create_reading_error(client, mock_db):
@@ -85,6 +146,123 @@ def test_create_reading_error(client, mock_db):
     assert response.status_code == 404
     assert "detail" in response.json()
 
+def test_create_readings_bulk(client, mock_db):
+    """Test creating many readings with per-row errors."""
+    mock_db.make_readings.return_value = APIBulkResult(
+        created=1, errors=[APIBulkError(index=1, detail="Meter with serial_number INVALID not found")]
+    )
+    readings = [
+        {
+            "reading_id": 0,
+            "value": 123.5,
+            "reading_date": "2025-05-01",
+            "meter_serial_number": serial_number,
+            "email": "test@example.com"
+        }
+        for serial_number in ("SN123", "INVALID")
+    ]
+
+    response = client.post("/readings/bulk", json=readings)
+    assert response.status_code == 201
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0]["index"] == 1
+    assert len(mock_db.make_readings.call_args[0][0]) == 2
+
+def test_get_readings_batch(client, mock_db):
+    """Test getting the readings of many facilities in one request."""
+    reading = APIReading(reading_id=1, value=10.0, reading_date="2025-02-28",
+                         meter_serial_number="SN123", email="test@example.com")
+    mock_db.get_readings_batch.return_value = {"Biuro": [reading], "Hala": []}
+
+    response = client.post("/readings/batch", json={
+        "facility_names": ["Biuro", "Hala"],
+        "meter_types": ["Woda zimna"],
+        "date_from": "2025-01-01",
+    })
+    assert response.status_code == 200
+    assert response.json()["readings"]["Biuro"][0]["meter_serial_number"] == "SN123"
+    assert response.json()["readings"]["Hala"] == []
+    assert mock_db.get_readings_batch.call_args.args == (["Biuro", "Hala"], ["Woda zimna"])
+    assert mock_db.get_readings_batch.call_args.kwargs == {
+        "date_from": datetime.date(2025, 1, 1), "date_to": None, "after": None, "limit": 1001}
+    assert response.json()["next_cursor"] is None
+
+    mock_db.get_readings_batch.side_effect = ValueError("Facility with name Magazyn not found")
+    assert client.post("/readings/batch", json={"facility_names": ["Magazyn"]}).status_code == 404
+    assert client.post("/readings/batch", json={"facility_names": []}).json() == {
+        "readings": {}, "next_cursor": None}
+    too_many = {"facility_names": [f"Obiekt {i}" for i in range(101)]}
+    assert client.post("/readings/batch", json=too_many).status_code == 400
+    too_large = {"facility_names": ["Biuro"], "limit": 5001}
+    assert client.post("/readings/batch", json=too_large).status_code == 400
+
+# Report endpoint tests
+def test_get_consumption_report(client, mock_db):
+    """Test getting the consumption report for all facilities of a user."""
+    mock_db.get_consumption_report.return_value = APIConsumptionReport(
+        months=["2024-12", "2025-01"], rows=[], total=[None, None]
+    )
+
+    response = client.get(
+        "/reports/consumption",
+        params={
+            "meter_type": ["Woda zimna", "Woda ciepła"],
+            "year": 2025,
+            "facility_name": "__ALL__",
+            "email": "manager@example.com",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["report"]["months"] == ["2024-12", "2025-01"]
+    mock_db.get_consumption_report.assert_called_with(
+        ["Woda zimna", "Woda ciepła"], 2025, facility_name=None, user_email="manager@example.com"
+    )
+
+def test_get_consumption_report_unknown_facility(client, mock_db):
+    """Test consumption report for a missing facility."""
+    mock_db.get_consumption_report.side_effect = ValueError("Facility not found")
+
+    response = client.get(
+        "/reports/consumption",
+        params={"meter_type": "Energia elektryczna", "year": 2025, "facility_name": "Nope"},
+    )
+    assert response.status_code == 404
+
+def test_export_consumption_report(client, mock_db):
+    """Test streaming the consumption report as CSV."""
+    months = ["2024-12"] + [f"2025-{m:02d}" for m in range(1, 13)]
+    async def rows():
+        yield APIConsumptionRow(
+            facility_name="TestFacility",
+            serial_number="SN123",
+            ppe=None,
+            multiply_factor=1.0,
+            months=[APIConsumptionMonth(month=m, value=1234.5, usage=10.0) for m in months],
+        )
+
+    mock_db.iter_consumption_report.return_value = rows()
+
+    response = client.get(
+        "/reports/consumption/export",
+        params={"meter_type": "Woda zimna", "year": 2025, "facility_name": "TestFacility"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.split("\r\n")
+    assert lines[0].startswith("Lokal;nr licznika;PPE;jednostka;mnozna;Grudzien '24;zuzycie")
+    assert lines[1].startswith("TestFacility;SN123;-;m3;1;1234,5;10,00")
+    assert lines[2].startswith("SUMA;;;;;;10,00")
+
+def test_export_consumption_report_unknown_facility(client, mock_db):
+    """Test CSV export for a missing facility."""
+    mock_db.iter_consumption_report.side_effect = ValueError("Facility not found")
+
+    response = client.get(
+        "/reports/consumption/export",
+        params={"meter_type": "Woda zimna", "year": 2025, "facility_name": "Nope"},
+    )
+    assert response.status_code == 404
+
 # Meter endpoint tests
 def test_get_meters(client, mock_db):
     """Test getting all meters for a facility."""
@@ -104,6 +282,59 @@ def test_get_meters(client, mock_db):
     assert "meters" in response.json()
     assert len(response.json()["meters"]) == 1
 
+def test_search_meters(client, mock_db):
+    """Test that meter filters, sort and cursor are passed to the database."""
+    mock_db.search_meters.return_value = [
+        APIMeter(serial_number=f"SN{i}", meter_type="Woda zimna", facility_name="TestFacility",
+                 ppe=None, multiply_factor=1.0, description=None)
+        for i in range(1, 4)
+    ]
+
+    response = client.get("/search/meters/TestFacility?serial_prefix=sn&description=hala"
+                          "&sort=meter_type&order=desc&limit=2")
+    assert response.status_code == 200
+    assert [m["serial_number"] for m in response.json()["meters"]] == ["SN1", "SN2"]
+    assert mock_db.search_meters.call_args.args == (
+        "TestFacility", APIMeterFilter(serial_prefix="sn", description="hala"))
+    assert mock_db.search_meters.call_args.kwargs == {
+        "sort": "meter_type", "descending": True, "after": None, "limit": 3}
+
+    cursor = response.json()["next_cursor"]
+    mock_db.search_meters.return_value = []
+    response = client.get(f"/search/meters/TestFacility?sort=meter_type&cursor={cursor}")
+    assert response.json() == {"meters": [], "next_cursor": None}
+    assert mock_db.search_meters.call_args.kwargs["after"] == ("Woda zimna", "SN2")
+
+    # A cursor is bound to its sort key
+    assert client.get(f"/search/meters/TestFacility?cursor={cursor}").status_code == 400
+    assert client.get("/search/meters/TestFacility?sort=ppe").status_code == 422
+
+def test_search_readings(client, mock_db):
+    """Test reading search paging by value and an unknown facility."""
+    mock_db.search_readings.return_value = [
+        APIReading(reading_id=i, value=10.0 * i, reading_date="2025-01-31",
+                   meter_serial_number="SN1", email="test@example.com")
+        for i in range(1, 3)
+    ]
+
+    response = client.get("/search/readings/TestFacility?meter_type=Woda%20zimna"
+                          "&from=2025-01-01&sort=value&limit=1")
+    assert response.status_code == 200
+    assert mock_db.search_readings.call_args.args == (
+        "TestFacility", APIMeterFilter(meter_type="Woda zimna"))
+    assert mock_db.search_readings.call_args.kwargs["date_from"] == datetime.date(2025, 1, 1)
+
+    cursor = response.json()["next_cursor"]
+    client.get(f"/search/readings/TestFacility?sort=value&cursor={cursor}")
+    assert mock_db.search_readings.call_args.kwargs["after"] == (10.0, 1)
+    # After a reading without a value
+    cursor = _encode_search_cursor("value", None, 7)
+    client.get(f"/search/readings/TestFacility?sort=value&cursor={cursor}")
+    assert mock_db.search_readings.call_args.kwargs["after"] == (None, 7)
+
+    mock_db.search_readings.side_effect = ValueError("Facility Nowhere not found")
+    assert client.get("/search/readings/Nowhere").status_code == 404
+
 def test_create_meter(client, mock_db):
     """Test creating a new meter."""
     meter_data = {
@@ -149,6 +380,22 @@ def test_create_facility(client, mock_db):
     assert response.json()["message"] == "Facility created successfully"
     mock_db.add_facility.assert_called_once()
 
+def test_assign_facilities_bulk(client, mock_db):
+    """Test assigning many facilities with per-row errors."""
+    mock_db.assign_users_to_facilities.return_value = APIBulkResult(
+        created=1, errors=[APIBulkError(index=1, detail="Facility with name Nieznany not found")]
+    )
+    assignments = [
+        {"email": "user@example.com", "facility_name": name}
+        for name in ("Biuro", "Nieznany")
+    ]
+
+    response = client.post("/facilities/assignments/bulk", json=assignments)
+    assert response.status_code == 201
+    assert response.json()["created"] == 1
+    assert response.json()["errors"][0]["index"] == 1
+    assert mock_db.assign_users_to_facilities.call_args[0][0][1].facility_name == "Nieznany"
+
 # User endpoint tests
 def test_get_user(client, mock_db):
     """Test getting a user by email."""
@@ -180,4 +427,54 @@ def test_login(client, mock_db):
     response = client.post("/login", json=login_data)
     assert response.status_code == 200
     assert response.json()["message"] == "Login successful"
-    mock_db.login_user.assert_called_with("user@example.com", "password123")
\ No newline at end of file
+    mock_db.login_user.assert_called_with("user@example.com", "password123")
+    assert response.json()["token_type"] == "bearer"
+
+    token = response.json()["access_token"]
+    response = client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"email": "user@example.com", "access_level": 2}
+
+def test_me_requires_token(client):
+    """Test that authenticated routes reject missing and invalid tokens."""
+    assert client.get("/me").status_code == 401
+    response = client.get("/me", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+
+def test_refresh_token_rotation(client, mock_db):
+    """Test that a refresh token yields new tokens and can be used once."""
+    mock_db.login_user.return_value = APIUser(email="user@example.com", password="", access_level=3)
+    tokens = client.post("/login", json={"email": "user@example.com", "password": "password123"}).json()
+    # The role changed since login
+    mock_db.get_active_user.return_value = APIUser(email="user@example.com", password="", access_level=2)
+
+    response = client.post("/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    assert response.json()["access_level"] == 2
+    assert response.json()["refresh_token"] != tokens["refresh_token"]
+
+    response = client.post("/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    response = client.post("/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+def test_logout_revokes_tokens(client, mock_db):
+    """Test that logging out revokes the access and refresh tokens."""
+    mock_db.login_user.return_value = APIUser(email="user@example.com", password="", access_level=3)
+    tokens = client.post("/login", json={"email": "user@example.com", "password": "password123"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = client.post("/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/me", headers=headers).status_code == 401
+    response = client.post("/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+def test_block_user_revokes_tokens(client, mock_db):
+    """Test that blocking a user invalidates the tokens issued to them."""
+    mock_db.login_user.return_value = APIUser(email="user@example.com", password="", access_level=3)
+    tokens = client.post("/login", json={"email": "user@example.com", "password": "password123"}).json()
+
+    assert client.put("/users/user@example.com/block").status_code == 200
+    response = client.get("/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 401
\ No newline at end of file
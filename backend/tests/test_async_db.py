@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.database.db_client import AsyncDataBase
+from app.api_models.models import APIFacility, APIMeter, APIReading, APIUser
+
+@pytest.fixture
+def async_db(monkeypatch):
+    """AsyncDataBase on an in-memory aiosqlite stand-in for PostgreSQL."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = AsyncDataBase()
+    asyncio.run(db.create_schema())
+    yield db
+    asyncio.run(db.close())
+
+def test_async_facility_roundtrip(async_db):
+    """Test writing and reading facilities through the async client."""
+    async def scenario():
+        await async_db.add_facility(
+            APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com")
+        )
+        facilities = await async_db.get_all_facilities()
+        facility = await async_db.get_facility("Biuro")
+        with pytest.raises(ValueError):
+            await async_db.get_facility("Magazyn")
+        return facilities, facility
+
+    facilities, facility = asyncio.run(scenario())
+    assert [f.name for f in facilities] == ["Biuro"]
+    assert facility.address == "ul. Prosta 1"
+
+def test_async_login(async_db):
+    """Test that password hashing and verification work from the event loop."""
+    async def scenario():
+        await async_db.add_user(
+            APIUser(email="user@example.com", password="secret123", access_level=2)
+        )
+        return (
+            await async_db.login_user("user@example.com", "secret123"),
+            await async_db.login_user("user@example.com", "wrong"),
+        )
+
+    user, rejected = asyncio.run(scenario())
+    assert user.access_level == 2
+    assert rejected is None
+
+def test_async_iterate_in_chunks(async_db):
+    """Test consuming a lazy DataBase iterator from async code."""
+    async def scenario():
+        return [item async for item in async_db.iterate(iter(range(7)), chunk_size=3)]
+
+    assert asyncio.run(scenario()) == list(range(7))
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnraisableExceptionWarning")
+def test_async_iterate_closes_the_iterator_when_stopped_early(monkeypatch, tmp_path):
+    """Test that a stream abandoned by its consumer releases its connection."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    async_db = AsyncDataBase()
+
+    async def scenario():
+        await async_db.create_schema()
+        await async_db.add_facility(
+            APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com")
+        )
+        await async_db.add_user(
+            APIUser(email="user@example.com", password="secret123", access_level=2)
+        )
+        for serial_number in ("M-1", "M-2", "M-3"):
+            await async_db.add_meter(APIMeter(serial_number=serial_number, meter_type="Woda zimna",
+                                              facility_name="Biuro", ppe=None,
+                                              multiply_factor=1.0, description=None))
+            await async_db.make_reading(APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                                                   meter_serial_number=serial_number,
+                                                   email="user@example.com"))
+        rows = async_db.iterate(
+            async_db.database.iter_consumption_report(["Woda zimna"], 2025), chunk_size=1
+        )
+        first = await rows.__anext__()
+        streaming = async_db.engine.sync_engine.pool.checkedout()
+        await rows.aclose()
+        after = async_db.engine.sync_engine.pool.checkedout()
+        await async_db.close()
+        return first, streaming, after
+
+    first, streaming, after = asyncio.run(scenario())
+    assert first.serial_number == "M-1"
+    assert (streaming, after) == (1, 0)
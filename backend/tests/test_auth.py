@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from app import auth
+
+
+@pytest.fixture
+def issuer():
+    return auth.TokenIssuer(b"test-secret", access_ttl=60, refresh_ttl=600)
+
+
+def test_issue_and_validate(issuer):
+    """Test that a token round-trips its claims."""
+    claims = issuer.validate(issuer.issue("user@example.com", 2))
+    assert claims.email == "user@example.com"
+    assert claims.access_level == 2
+    assert claims.token_type == auth.ACCESS
+    assert claims.expires_at - claims.issued_at == 60
+
+
+def test_tampered_token_is_rejected(issuer):
+    """Test that changing the payload or the key invalidates the signature."""
+    token = issuer.issue("user@example.com", 3)
+    header, payload, signature = token.split(".")
+    forged = issuer.issue("user@example.com", 1).split(".")[1]
+    with pytest.raises(auth.TokenError, match="signature"):
+        issuer.validate(f"{header}.{forged}.{signature}")
+    with pytest.raises(auth.TokenError, match="signature"):
+        auth.TokenIssuer(b"other-secret").validate(token)
+    with pytest.raises(auth.TokenError, match="Malformed"):
+        issuer.validate("not-a-token")
+
+
+def test_token_type_is_checked(issuer):
+    """Test that refresh tokens are not accepted as access tokens and vice versa."""
+    with pytest.raises(auth.TokenError, match="access"):
+        issuer.validate(issuer.issue("user@example.com", 2, auth.REFRESH))
+    with pytest.raises(auth.TokenError, match="refresh"):
+        issuer.validate(issuer.issue("user@example.com", 2), auth.REFRESH)
+
+
+def test_expired_token_is_rejected():
+    """Test that tokens past their expiry are rejected."""
+    issuer = auth.TokenIssuer(b"test-secret", access_ttl=-1)
+    with pytest.raises(auth.TokenError, match="expired"):
+        issuer.validate(issuer.issue("user@example.com", 2))
+
+
+def test_revoke_token(issuer):
+    """Test that a revoked token is rejected and others stay valid."""
+    first = issuer.issue("user@example.com", 2)
+    second = issuer.issue("user@example.com", 2)
+    issuer.revoke(issuer.validate(first))
+    with pytest.raises(auth.TokenError, match="revoked"):
+        issuer.validate(first)
+    issuer.validate(second)
+
+
+def test_revoke_user(issuer):
+    """Test that revoking a user rejects earlier tokens only."""
+    old = issuer.issue("user@example.com", 2)
+    other = issuer.issue("other@example.com", 2)
+    issuer.revoke_user("user@example.com")
+    time.sleep(0.001)
+    new = issuer.issue("user@example.com", 1)
+    with pytest.raises(auth.TokenError, match="revoked"):
+        issuer.validate(old)
+    issuer.validate(other)
+    assert issuer.validate(new).access_level == 1
+
+
+def test_denylist_drops_expired_entries():
+    """Test that expired tokens do not accumulate in the denylist."""
+    issuer = auth.TokenIssuer(b"test-secret", access_ttl=60)
+    expired = auth.TokenClaims("user@example.com", 2, auth.ACCESS, "old", 0, 1)
+    issuer.revoke(expired)
+    issuer.revoke(issuer.validate(issuer.issue("user@example.com", 2)))
+    assert "old" not in issuer.denylist._tokens
@@ -0,0 +1,833 @@
+import datetime
+import os
+
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from app.database import backends
+from app.database.db_client import DataBase
+from app.api_models.models import APIFacility, APIMeter, APIMeterFilter, APIReading, APIUser
+
+
+def test_backend_name(monkeypatch):
+    monkeypatch.delenv("DB_BACKEND", raising=False)
+    assert backends.backend_name() == "cloudsql"
+    monkeypatch.setenv("DB_BACKEND", " SQLite ")
+    assert backends.backend_name() == "sqlite"
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    with pytest.raises(ValueError):
+        backends.backend_name()
+
+
+def test_database_url_sets_driver(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://user:pw@localhost:5432/energy")
+    assert backends.database_url("postgres").drivername == "postgresql+pg8000"
+    url = backends.database_url("postgres", asyncio=True)
+    assert url.drivername == "postgresql+asyncpg"
+    assert (url.host, url.database, url.password) == ("localhost", "energy", "pw")
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql://user@/energy?host=/cloudsql/project:region:instance")
+    assert backends.database_url("postgres").query == {
+        "unix_sock": "/cloudsql/project:region:instance/.s.PGSQL.5432"
+    }
+    assert backends.database_url("postgres", asyncio=True).query == {
+        "host": "/cloudsql/project:region:instance"
+    }
+
+    monkeypatch.delenv("DATABASE_URL")
+    with pytest.raises(ValueError):
+        backends.database_url("postgres")
+    assert str(backends.database_url("sqlite", asyncio=True)) == "sqlite+aiosqlite:///smart_energy.db"
+
+
+def test_sqlite_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    db = DataBase()
+    assert db.connector is None
+    assert db.pool.pool.size() == 2
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    assert isinstance(DataBase().pool.pool, StaticPool)
+
+
+def test_create_schema_and_crud_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.create_schema()  # existing tables are kept
+
+    inspector = sqlalchemy.inspect(db.pool)
+    assert set(inspector.get_table_names()) == {"users", "facilities", "assignments", "meters", "readings",
+                                                "monthly_consumption", "schema_migrations"}
+    assert "ix_readings_meter_id_reading_date_reading_id" in {index["name"] for index in inspector.get_indexes("readings")}
+
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    db.make_reading(APIReading(reading_id=0, value=12.5, reading_date="2025-01-31",
+                               meter_serial_number="M-1", email="user@example.com"))
+
+    readings = db.get_readings("Biuro")
+    assert [(r.value, r.reading_date) for r in readings] == [(12.5, "2025-01-31")]
+    assert [f.name for f in db.get_all_user_facilities("user@example.com")] == ["Biuro"]
+
+    # Meters and readings go with their facility
+    db.delete_facility("Biuro")
+    with db.pool.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM readings")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM meters")).scalar() == 0
+
+
+def test_admin_is_assigned_to_all_facilities_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    for name in ("Biuro", "Hala", "Magazyn"):
+        db.add_facility(APIFacility(name=name, address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="admin@example.com", password="secret123", access_level=1))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+
+    assert sorted(f.name for f in db.get_all_user_facilities("admin@example.com")) == ["Biuro", "Hala", "Magazyn"]
+    assert db.get_all_user_facilities("user@example.com") == []
+
+    db.assign_user_to_facility("user@example.com", "Hala")
+    assert db.assign_user_to_facilities("user@example.com") == 2
+    assert db.assign_user_to_facilities("user@example.com") == 0
+    with db.pool.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM assignments")).scalar() == 6
+
+
+def test_repeated_assignment_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+    db.assign_user_to_facility("user@example.com", "Biuro")
+
+    assignment = {"email": "user@example.com", "facility_name": "Biuro"}
+    with TestClient(server.app) as client:
+        assert client.post("/facilities/assignments", json=assignment).status_code == 201
+    with db.pool.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM assignments")).scalar() == 1
+    db.close()
+
+
+def test_bulk_assignment_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.create_schema()
+    for facility in ("Biuro", "Hala"):
+        db.add_facility(APIFacility(name=facility, address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+
+    assignments = [{"email": "user@example.com", "facility_name": facility}
+                   for facility in ("Biuro", "Hala", "Hala", "Nieznany")]
+    with TestClient(server.app) as client:
+        response = client.post("/facilities/assignments/bulk", json=assignments)
+        assert response.status_code == 201
+        assert response.json()["created"] == 1
+        assert [error["index"] for error in response.json()["errors"]] == [3]
+        assert client.post("/facilities/assignments/bulk", json=assignments).json()["created"] == 0
+    with db.pool.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM assignments")).scalar() == 2
+    db.close()
+
+
+def test_block_user_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.bcrypt_rounds = 4
+    db.create_schema()
+    for email in ("user@example.com", "other@example.com"):
+        db.add_user(APIUser(email=email, password="secret123", access_level=3))
+
+    credentials = {"email": "user@example.com", "password": "secret123"}
+    with TestClient(server.app) as client:
+        tokens = client.post("/login", json=credentials).json()
+        other = client.post("/login", json={**credentials, "email": "other@example.com"}).json()
+        assert client.put("/users/user@example.com/block").status_code == 200
+        assert client.put("/users/nobody@example.com/block").status_code == 404
+
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert client.get("/me", headers=headers).status_code == 401
+        assert client.post("/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+        assert client.post("/login", json=credentials).json()["access_level"] is None
+
+        # The role is read again on refresh
+        db.update_user("other@example.com", user_role=2)
+        response = client.post("/refresh", json={"refresh_token": other["refresh_token"]})
+        assert response.status_code == 200
+        assert response.json()["access_level"] == 2
+    assert db.get_active_user("user@example.com") is None
+    db.close()
+
+
+def test_ids_are_generated_by_the_database_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    # The returned IDs are cached, later lookups skip the database
+    assert db.id_cache.stats()["size"] == 3
+
+    reading = APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                         meter_serial_number="M-1", email="user@example.com")
+    first = db.make_reading(reading)
+    second = db.make_reading(reading.model_copy(update={"value": 2.0}))
+    assert second == first + 1
+    assert [r.reading_id for r in db.get_readings("Biuro")] == [first, second]
+
+
+def test_unit_of_work_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    checkouts = []
+    sqlalchemy.event.listen(db.pool, "checkout", lambda *args: checkouts.append(1))
+
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    with pytest.raises(ValueError, match="already exists"):
+        db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 2", email="biuro@example.com"))
+    meter = APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                     ppe=None, multiply_factor=1.0, description=None)
+    db.add_meter(meter)
+    with pytest.raises(ValueError, match="already exists"):
+        db.add_meter(meter)
+    with pytest.raises(ValueError, match="not found"):
+        db.add_meter(meter.model_copy(update={"serial_number": "M-2", "facility_name": "Hala"}))
+    assert len(checkouts) == 5
+
+    # Nested operations share the connection and roll back together
+    checkouts.clear()
+    before = db.id_cache.stats()
+    with pytest.raises(RuntimeError):
+        with db.unit_of_work():
+            db.add_facility(APIFacility(name="Hala", address="ul. Prosta 3", email="hala@example.com"))
+            db.add_meter(meter.model_copy(update={"serial_number": "M-2", "facility_name": "Hala"}))
+            raise RuntimeError("abort")
+    assert len(checkouts) == 1
+    # Only the IDs cached inside the rolled back block are evicted
+    after = db.id_cache.stats()
+    assert after["size"] == before["size"]
+    assert after["hits"] > before["hits"] and after["misses"] >= before["misses"]
+    assert db.id_cache.get("facilities", "Hala") is None
+    assert db.id_cache.get("facilities", "Biuro") is not None
+    assert [f.name for f in db.get_all_facilities()] == ["Biuro"]
+    assert [m.serial_number for m in db.get_all_meters("Biuro")] == ["M-1"]
+
+    db.add_facility(APIFacility(name="Hala", address="ul. Prosta 3", email="hala@example.com"))
+    db.add_meter(meter.model_copy(update={"serial_number": "M-2", "facility_name": "Hala"}))
+    assert [m.serial_number for m in db.get_all_meters("Hala")] == ["M-2"]
+
+
+def test_readings_keyset_pagination_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    for day in (3, 1, 2, 2):
+        db.make_reading(APIReading(reading_id=0, value=day, reading_date=f"2025-01-0{day}",
+                                   meter_serial_number="M-1", email="user@example.com"))
+
+    pages, after = [], None
+    while True:
+        page = db.get_readings("Biuro", after=after, limit=3)
+        pages.append(page)
+        if len(page) < 3:
+            break
+        after = (datetime.date.fromisoformat(page[-1].reading_date), page[-1].reading_id)
+
+    readings = [r for page in pages for r in page]
+    assert [len(page) for page in pages] == [3, 1]
+    assert [r.reading_date for r in readings] == sorted(r.reading_date for r in readings)
+    assert len({r.reading_id for r in readings}) == 4
+
+    in_range = db.get_readings("Biuro", "Woda zimna", date_from=datetime.date(2025, 1, 2),
+                               date_to=datetime.date(2025, 1, 2))
+    assert [r.value for r in in_range] == [2.0, 2.0]
+
+
+def test_monthly_consumption_kept_up_to_date_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=2.0, description=None))
+
+    def rollup():
+        with db.pool.connect() as conn:
+            return conn.execute(text(
+                "SELECT month, closing_value, delta, usage FROM monthly_consumption ORDER BY month"
+            )).fetchall()
+
+    for value, reading_date in ((10, "2025-01-10"), (12, "2025-01-31"), (20, "2025-02-15"), (26, "2025-04-30")):
+        db.make_reading(APIReading(reading_id=0, value=value, reading_date=reading_date,
+                                   meter_serial_number="M-1", email="user@example.com"))
+    assert rollup() == [
+        ("2025-01-01", 12.0, None, None),
+        ("2025-02-01", 20.0, 8.0, 16.0),
+        ("2025-04-01", 26.0, 6.0, 12.0),
+    ]
+
+    readings = {r.reading_date: r for r in db.get_readings("Biuro")}
+    # Moving February's reading to March changes both months and April's delta
+    moved = readings["2025-02-15"].model_copy(update={"reading_date": "2025-03-15", "value": 22})
+    db.update_reading(moved)
+    db.delete_reading(readings["2025-01-31"].reading_id)
+    db.update_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                             ppe=None, multiply_factor=1.0, description=None))
+    incremental = rollup()
+    assert incremental == [
+        ("2025-01-01", 10.0, None, None),
+        ("2025-03-01", 22.0, 12.0, 12.0),
+        ("2025-04-01", 26.0, 4.0, 4.0),
+    ]
+
+    assert db.rebuild_monthly_consumption() == 3
+    assert rollup() == incremental
+
+
+def test_consumption_report_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    for serial, meter_type in (("WZ-1", "Woda zimna"), ("EE-1", "Energia elektryczna")):
+        db.add_meter(APIMeter(serial_number=serial, meter_type=meter_type, facility_name="Biuro",
+                              ppe=None, multiply_factor=2.0, description=None))
+    for value, reading_date in ((10, "2024-12-31"), (12, "2025-01-31"), (20, "2025-03-31")):
+        db.make_reading(APIReading(reading_id=0, value=value, reading_date=reading_date,
+                                   meter_serial_number="WZ-1", email="user@example.com"))
+
+    params = {"meter_type": ["Woda zimna"], "year": 2025, "facility_name": "Biuro"}
+    with TestClient(server.app) as client:
+        response = client.get("/reports/consumption", params=params)
+        assert client.get("/reports/consumption",
+                          params={**params, "facility_name": "Nieznany"}).status_code == 404
+    assert response.status_code == 200
+    report = response.json()["report"]
+    assert [row["serial_number"] for row in report["rows"]] == ["WZ-1"]
+    months = {month["month"]: (month["value"], month["usage"]) for month in report["rows"][0]["months"]}
+    assert months["2024-12"] == (10.0, None)
+    assert months["2025-01"] == (12.0, 4.0)
+    assert months["2025-02"] == (None, None)
+    assert months["2025-03"] == (20.0, 16.0)
+    assert report["total"][:4] == [None, 4.0, None, 16.0]
+    db.close()
+
+
+def test_consumption_report_export_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.add_meter(APIMeter(serial_number="WZ-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=2.0, description=None))
+    for value, reading_date in ((10, "2024-12-31"), (12, "2025-01-31")):
+        db.make_reading(APIReading(reading_id=0, value=value, reading_date=reading_date,
+                                   meter_serial_number="WZ-1", email="user@example.com"))
+
+    with TestClient(server.app) as client:
+        response = client.get("/reports/consumption/export",
+                              params={"meter_type": ["Woda zimna"], "year": 2025})
+    assert response.status_code == 200
+    assert "Biuro;WZ-1;-;m3;2;10;-;12;4,00;-;" in response.text
+    db.close()
+
+
+def test_bulk_readings_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    for serial in ("M-1", "M-2"):
+        db.add_meter(APIMeter(serial_number=serial, meter_type="Woda zimna", facility_name="Biuro",
+                              ppe=None, multiply_factor=2.0, description=None))
+
+    readings = [
+        {"reading_id": 0, "value": value, "reading_date": reading_date,
+         "meter_serial_number": serial, "email": "user@example.com"}
+        for value, reading_date, serial in ((10, "2025-01-31", "M-1"), (15, "2025-02-28", "M-1"),
+                                            (5, "2025-01-31", "M-2"), (1, "2025-01-31", "M-404"))
+    ]
+    with TestClient(server.app) as client:
+        response = client.post("/readings/bulk", json=readings)
+    assert response.status_code == 201
+    assert response.json()["created"] == 3
+    assert [error["index"] for error in response.json()["errors"]] == [3]
+
+    with db.pool.connect() as conn:
+        assert conn.execute(text(
+            "SELECT m.serial_number, mc.month, mc.closing_value, mc.usage"
+            " FROM monthly_consumption mc JOIN meters m ON m.meter_id = mc.meter_id"
+            " ORDER BY m.serial_number, mc.month"
+        )).fetchall() == [
+            ("M-1", "2025-01-01", 10.0, None),
+            ("M-1", "2025-02-01", 15.0, 10.0),
+            ("M-2", "2025-01-01", 5.0, None),
+        ]
+    db.close()
+
+
+def test_manage_commands(monkeypatch, tmp_path, capsys):
+    from app import manage
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    manage.main(["migrate", "--to", "1"])
+    manage.main(["migrations"])
+    manage.main(["create-schema"])
+    manage.main(["migrate"])
+    manage.main(["rebuild-rollup"])
+    pending = [f"[ ] {m.version:03d} {m.name}" for m in migrations.MIGRATIONS[1:]]
+    assert capsys.readouterr().out.splitlines() == [
+        "Applied 001 create tables",
+        "[x] 001 create tables",
+        *pending,
+        "Schema created",
+        "Schema is up to date",
+        "monthly_consumption rebuilt: 0 meter months",
+    ]
+
+
+def test_migrations_upgrade_an_unversioned_database_on_sqlite(monkeypatch):
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    # Tables as created before migrations existed: no unique indexes, repeated assignments
+    with db.pool.begin() as conn:
+        conn.execute(text("CREATE TABLE users (user_id INTEGER PRIMARY KEY, email TEXT, password TEXT, access_level INTEGER)"))
+        conn.execute(text("CREATE TABLE facilities (facility_id INTEGER PRIMARY KEY, name TEXT, address TEXT, email TEXT)"))
+        conn.execute(text("CREATE TABLE assignments (assignment_id INTEGER PRIMARY KEY, user_id INTEGER, facility_id INTEGER)"))
+        conn.execute(text("CREATE INDEX ix_assignments_user_id_facility_id ON assignments (user_id, facility_id)"))
+        conn.execute(text("INSERT INTO assignments VALUES (1, 7, 9), (2, 7, 9), (3, 8, 9)"))
+
+    applied = migrations.upgrade(db.pool)
+    assert [m.version for m in applied] == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.upgrade(db.pool) == []
+    assert all(done for _, done in migrations.status(db.pool))
+
+    inspector = sqlalchemy.inspect(db.pool)
+    assert {index["name"] for index in inspector.get_indexes("assignments")} == {
+        "ux_assignments_user_id_facility_id", "ix_assignments_facility_id"}
+    assert "blocked" in {column["name"] for column in inspector.get_columns("users")}
+    with db.pool.connect() as conn:
+        assert conn.execute(text("SELECT assignment_id FROM assignments ORDER BY 1")).scalars().all() == [1, 3]
+
+
+def test_migrations_refuse_duplicated_natural_keys_on_sqlite(monkeypatch):
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    migrations.upgrade(db.pool, target=2)
+    with db.pool.begin() as conn:
+        conn.execute(text("DROP INDEX ux_users_email"))
+        conn.execute(text("INSERT INTO users (email, password, access_level) VALUES ('a@example.com', 'x', 2), ('a@example.com', 'y', 2)"))
+
+    with pytest.raises(migrations.MigrationError, match="users.email.*a@example.com"):
+        migrations.upgrade(db.pool)
+    assert [m.version for m, done in migrations.status(db.pool) if done] == [1, 2]
+
+
+def test_migrations_fill_the_rollup_of_existing_readings_on_sqlite(monkeypatch):
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    migrations.upgrade(db.pool, target=4)
+    # Readings stored before the rollup was maintained
+    with db.pool.begin() as conn:
+        conn.execute(text("INSERT INTO facilities (name) VALUES ('Biuro')"))
+        conn.execute(text("INSERT INTO meters (serial_number, meter_type, facility_id, multiply_factor)"
+                          " VALUES ('M-1', 'Woda zimna', 1, 2.0)"))
+        conn.execute(text("INSERT INTO readings (value, reading_date, meter_id)"
+                          " VALUES (10.0, '2025-01-31', 1), (14.0, '2025-02-28', 1)"))
+
+    assert [m.version for m in migrations.upgrade(db.pool, target=5)] == [5]
+    with db.pool.connect() as conn:
+        assert conn.execute(text(
+            "SELECT month, closing_value, usage FROM monthly_consumption ORDER BY month"
+        )).all() == [("2025-01-01", 10.0, None), ("2025-02-01", 14.0, 8.0)]
+
+
+def test_reads_are_single_queries_on_sqlite(monkeypatch):
+    """Test that reads by name run one statement and 404 only when empty."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_facility(APIFacility(name="Hala", address="ul. Prosta 2", email="hala@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=3))
+    db.add_user(APIUser(email="new@example.com", password="secret123", access_level=3))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    db.make_reading(APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                               meter_serial_number="M-1", email="user@example.com"))
+    db.id_cache.clear()
+
+    reads = {
+        "get_readings": lambda name: db.get_readings(name),
+        "get_reading_columns": lambda name: db.get_reading_columns(name)["reading_id"],
+        "search_readings": lambda name: db.search_readings(name),
+        "get_all_meters": lambda name: db.get_all_meters(name),
+        "get_meters_by_type": lambda name: db.get_meters_by_type(name, "Woda zimna"),
+        "search_meters": lambda name: db.search_meters(name),
+    }
+    for method, read in reads.items():
+        assert len(_query_plans(db, lambda: read("Biuro"))) == 1, method
+        assert read("Hala") == [], method
+        with pytest.raises(ValueError):
+            read("Magazyn")
+
+    assert len(_query_plans(db, lambda: db.get_all_user_facilities("user@example.com"))) == 1
+    assert db.get_all_user_facilities("new@example.com") == []
+    with pytest.raises(ValueError):
+        db.get_all_user_facilities("nobody@example.com")
+
+
+def _query_plans(db, call):
+    """Run ``call`` and return the query plan of every SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    sqlalchemy.event.listen(db.pool, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        sqlalchemy.event.remove(db.pool, "before_cursor_execute", capture)
+    explain = "EXPLAIN QUERY PLAN " if db.pool.dialect.name == "sqlite" else "EXPLAIN "
+    with db.pool.connect() as conn:
+        if db.pool.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        return [
+            " ".join(str(row[-1]) for row in conn.exec_driver_sql(explain + statement, parameters))
+            for statement, parameters in statements
+        ]
+
+
+def _assert_hot_queries_use_indexes(db):
+    db.create_schema(drop=True)
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    db.make_reading(APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                               meter_serial_number="M-1", email="user@example.com"))
+    db.id_cache.clear()
+
+    plans = _query_plans(db, lambda: db.get_readings("Biuro"))
+    assert len(plans) == 1
+    readings = " ".join(plans)
+    assert "ux_facilities_name" in readings
+    assert "ix_meters_facility_id_meter_type" in readings
+    assert "ix_readings_meter_id_reading_date_reading_id" in readings
+
+    facilities = " ".join(_query_plans(db, lambda: db.get_all_user_facilities("user@example.com")))
+    assert "ux_users_email" in facilities
+    assert "ux_assignments_user_id_facility_id" in facilities
+
+
+def test_hot_queries_use_indexes_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    _assert_hot_queries_use_indexes(DataBase())
+
+
+@pytest.mark.skipif("TEST_POSTGRES_URL" not in os.environ,
+                    reason="set TEST_POSTGRES_URL to a disposable PostgreSQL database")
+def test_hot_queries_use_indexes_on_postgres(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "postgres")
+    monkeypatch.setenv("DATABASE_URL", os.environ["TEST_POSTGRES_URL"])
+    _assert_hot_queries_use_indexes(DataBase())
+
+
+def test_search_meters_and_readings_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    for serial, meter_type, ppe, description in [
+        ("EE-100", "Energia elektryczna", "PL0037", "Hala produkcyjna"),
+        ("EE-101", "Energia elektryczna", "PL0038", "Biuro, 100% powierzchni"),
+        ("WZ-1", "Woda zimna", None, None),
+    ]:
+        db.add_meter(APIMeter(serial_number=serial, meter_type=meter_type, facility_name="Biuro",
+                              ppe=ppe, multiply_factor=1.0, description=description))
+    for serial, value, date in [("EE-100", 5.0, "2025-01-31"), ("EE-101", 7.0, "2025-01-31"),
+                                ("EE-100", 9.0, "2025-02-28"), ("WZ-1", 1.0, "2025-02-28")]:
+        db.make_reading(APIReading(reading_id=0, value=value, reading_date=date,
+                                   meter_serial_number=serial, email="user@example.com"))
+
+    def serials(**kwargs):
+        return [m.serial_number for m in db.search_meters("Biuro", **kwargs)]
+
+    assert serials() == ["EE-100", "EE-101", "WZ-1"]
+    assert serials(filters=APIMeterFilter(serial_prefix="ee-")) == ["EE-100", "EE-101"]
+    assert serials(filters=APIMeterFilter(ppe_prefix="PL0038")) == ["EE-101"]
+    assert serials(filters=APIMeterFilter(description="HALA")) == ["EE-100"]
+    # Wildcards in the search text match literally
+    assert serials(filters=APIMeterFilter(description="0%")) == ["EE-101"]
+    assert serials(filters=APIMeterFilter(serial_prefix="EE_")) == []
+    assert serials(sort="meter_type", descending=True) == ["WZ-1", "EE-101", "EE-100"]
+    assert serials(sort="meter_type", after=("Energia elektryczna", "EE-100"), limit=1) == ["EE-101"]
+
+    readings = db.search_readings("Biuro", APIMeterFilter(meter_type="Energia elektryczna"),
+                                  sort="value", descending=True)
+    assert [r.value for r in readings] == [9.0, 7.0, 5.0]
+    page = db.search_readings("Biuro", sort="value", after=(5.0, readings[-1].reading_id), limit=2)
+    assert [r.value for r in page] == [7.0, 9.0]
+    february = db.search_readings("Biuro", date_from=datetime.date(2025, 2, 1), sort="serial_number")
+    assert [r.meter_serial_number for r in february] == ["EE-100", "WZ-1"]
+
+    with pytest.raises(ValueError):
+        db.search_meters("Biuro", sort="ppe")
+
+    # The columnar form holds the same readings, one list per field
+    columns = db.search_reading_columns("Biuro", sort="value", descending=True)
+    rows = db.search_readings("Biuro", sort="value", descending=True)
+    assert columns == {field: [getattr(r, field) for r in rows] for field in columns}
+    assert db.get_reading_columns("Biuro", "Woda zimna") == {
+        "reading_id": [rows[-1].reading_id], "value": [1.0], "reading_date": ["2025-02-28"],
+        "meter_serial_number": ["WZ-1"], "email": ["user@example.com"]}
+    assert db.get_reading_columns("Biuro", "Woda ciepła")["reading_id"] == []
+
+
+def test_search_readings_pages_through_null_values_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=3))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    with db.pool.begin() as conn:
+        conn.execute(text("INSERT INTO readings (value, reading_date, meter_id, user_id)"
+                          " VALUES (2.0, '2025-01-31', 1, 1), (NULL, '2025-02-28', 1, 1),"
+                          " (1.0, '2025-03-31', 1, 1), (NULL, '2025-04-30', 1, 1)"))
+
+    # Readings loaded without a value come last and are not skipped by the cursor
+    for descending, expected in ((False, [1.0, 2.0, None, None]), (True, [2.0, 1.0, None, None])):
+        values, after = [], None
+        while True:
+            page = db.search_reading_columns("Biuro", sort="value", descending=descending,
+                                             after=after, limit=1)
+            if not page["reading_id"]:
+                break
+            values += page["value"]
+            after = (page["value"][-1], page["reading_id"][-1])
+        assert values == expected
+    db.close()
+
+
+def _assert_readings_batch(db):
+    db.create_schema(drop=True)
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=3))
+    for facility in ("Biuro", "Hala", "Magazyn"):
+        db.add_facility(APIFacility(name=facility, address="ul. Prosta 1", email="biuro@example.com"))
+    for serial, meter_type, facility in [("WZ-1", "Woda zimna", "Biuro"),
+                                         ("EE-1", "Energia elektryczna", "Biuro"),
+                                         ("WZ-2", "Woda zimna", "Hala")]:
+        db.add_meter(APIMeter(serial_number=serial, meter_type=meter_type, facility_name=facility,
+                              ppe=None, multiply_factor=1.0, description=None))
+    for month in (1, 2, 3):
+        for serial in ("WZ-1", "EE-1", "WZ-2"):
+            db.make_reading(APIReading(reading_id=0, value=float(month), reading_date=f"2025-{month:02d}-28",
+                                       meter_serial_number=serial, email="user@example.com"))
+    db.id_cache.clear()
+
+    batch = db.get_readings_batch(["Hala", "Biuro", "Magazyn"], ["Woda zimna"],
+                                  date_from=datetime.date(2025, 2, 1))
+    assert list(batch) == ["Hala", "Biuro", "Magazyn"]
+    assert [(r.meter_serial_number, r.reading_date) for r in batch["Biuro"]] == [
+        ("WZ-1", "2025-02-28"), ("WZ-1", "2025-03-28")]
+    assert len(batch["Hala"]) == 2
+    assert batch["Magazyn"] == []
+    assert len(db.get_readings_batch(["Biuro"])["Biuro"]) == 6
+
+    # Pages run across facilities by (reading_date, reading_id)
+    first = db.get_readings_batch(["Hala", "Biuro"], ["Woda zimna"], limit=3)
+    assert [r.reading_date for r in first["Biuro"] + first["Hala"]] == [
+        "2025-01-28", "2025-02-28", "2025-01-28"]
+    last = max(first["Biuro"] + first["Hala"], key=lambda r: (r.reading_date, r.reading_id))
+    after = (datetime.date.fromisoformat(last.reading_date), last.reading_id)
+    second = db.get_readings_batch(["Hala", "Biuro"], ["Woda zimna"], after=after, limit=3)
+    assert sum(len(rows) for rows in second.values()) == 3
+    assert {r.reading_id for rows in first.values() for r in rows}.isdisjoint(
+        r.reading_id for rows in second.values() for r in rows)
+
+    with pytest.raises(ValueError, match="Nieznany"):
+        db.get_readings_batch(["Biuro", "Nieznany"])
+
+
+def test_readings_batch_on_sqlite(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    _assert_readings_batch(DataBase())
+
+
+def test_readings_batch_endpoint_pages_on_sqlite(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from app import server
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    _assert_readings_batch(db)
+
+    batch = {"facility_names": ["Biuro", "Hala"], "date_from": "2025-01-01",
+             "date_to": "2025-12-31", "limit": 2}
+    pages = []
+    with TestClient(server.app) as client:
+        while True:
+            response = client.post("/readings/batch", json=batch)
+            assert response.status_code == 200
+            pages.append(response.json()["readings"])
+            if response.json()["next_cursor"] is None:
+                break
+            batch["cursor"] = response.json()["next_cursor"]
+    assert [sum(len(rows) for rows in page.values()) for page in pages] == [2, 2, 2, 2, 1]
+    assert [r["reading_date"] for page in pages for r in page["Biuro"]] == [
+        "2025-01-28", "2025-01-28", "2025-02-28", "2025-02-28", "2025-03-28", "2025-03-28"]
+    assert len([r for page in pages for r in page["Hala"]]) == 3
+    db.close()
+
+
+@pytest.mark.skipif("TEST_POSTGRES_URL" not in os.environ,
+                    reason="set TEST_POSTGRES_URL to a disposable PostgreSQL database")
+def test_readings_batch_on_postgres(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "postgres")
+    monkeypatch.setenv("DATABASE_URL", os.environ["TEST_POSTGRES_URL"])
+    _assert_readings_batch(DataBase())
+
+
+def test_partition_readings_needs_postgres_on_sqlite(monkeypatch):
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    with pytest.raises(migrations.MigrationError, match="PostgreSQL"):
+        migrations.partition_readings(db.pool)
+
+
+@pytest.mark.skipif("TEST_POSTGRES_URL" not in os.environ,
+                    reason="set TEST_POSTGRES_URL to a disposable PostgreSQL database")
+def test_partitioned_readings_on_postgres(monkeypatch):
+    from app.database import migrations
+
+    monkeypatch.setenv("DB_BACKEND", "postgres")
+    monkeypatch.setenv("DATABASE_URL", os.environ["TEST_POSTGRES_URL"])
+    db = DataBase()
+    db.create_schema(drop=True)
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=3))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    for month in (1, 2, 3):
+        db.make_reading(APIReading(reading_id=0, value=float(month), reading_date=f"2025-{month:02d}-28",
+                                   meter_serial_number="M-1", email="user@example.com"))
+
+    created = migrations.partition_readings(db.pool)
+    assert created[:3] == ["readings_2025_01", "readings_2025_02", "readings_2025_03"]
+    assert migrations.partition_readings(db.pool) == []
+
+    # IDs continue after the copied readings, a reading may move between months
+    reading_id = db.make_reading(APIReading(reading_id=0, value=4.0, reading_date="2025-04-28",
+                                            meter_serial_number="M-1", email="user@example.com"))
+    assert reading_id == 4
+    db.update_reading(APIReading(reading_id=reading_id, value=4.0, reading_date="2025-02-28",
+                                 meter_serial_number="M-1", email="user@example.com"))
+    february = db.get_readings("Biuro", date_from=datetime.date(2025, 2, 1),
+                               date_to=datetime.date(2025, 2, 28))
+    assert [reading.reading_id for reading in february] == [2, 4]
+    plans = _query_plans(db, lambda: db.get_readings(
+        "Biuro", date_from=datetime.date(2025, 2, 1), date_to=datetime.date(2025, 2, 28)))
+    assert "readings_2025_02" in plans[0]
+    assert "readings_2025_01" not in plans[0] and "readings_default" not in plans[0]
+    page = " ".join(_query_plans(db, lambda: db.get_readings(
+        "Biuro", after=(datetime.date(2025, 3, 1), 0), limit=10)))
+    assert "readings_2025_03" in page and "readings_2025_02" not in page
+
+    # A reading of a month without partition waits in the default partition
+    # until partition_readings adds the month
+    current = datetime.date.today().replace(day=1)
+    name = f"readings_{current:%Y_%m}"
+    with db.pool.begin() as conn:
+        conn.execute(text(f"DROP TABLE {name}"))
+    db.make_reading(APIReading(reading_id=0, value=5.0, reading_date=str(current),
+                               meter_serial_number="M-1", email="user@example.com"))
+    assert migrations.partition_readings(db.pool) == [name]
+    with db.pool.connect() as conn:
+        assert conn.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar() == 1
+        assert conn.execute(text("SELECT COUNT(*) FROM readings_default")).scalar() == 0
+    assert [r.value for r in db.get_readings("Biuro")] == [1.0, 2.0, 4.0, 3.0, 5.0]
+
+    db.delete_meter("M-1")
+    assert db.get_readings("Biuro") == []
+    db.close()
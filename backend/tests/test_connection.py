@@ -1,12 +1,14 @@
 import pytest
+import datetime
 import os
 from unittest.mock import patch, MagicMock
 from sqlalchemy import text
-from app.database.db_client import DataBase, DatabaseError
+from app.database.db_client import DataBase, DatabaseError, IdCache
+from app.api_models.models import APIReading
 
 @pytest.fixture
 def mock_connector():
-    with patch("app.database.db_client.Connector") as mock:
+    with patch("google.cloud.sql.connector.Connector") as mock:
         connector_instance = MagicMock()
         mock.return_value = connector_instance
         yield mock
@@ -73,4 +75,122 @@ def test_fetch_query_results(mock_connector, mock_sqlalchemy_engine):
     # Test exception handling
     conn.execute.side_effect = Exception("Database error")
     with pytest.raises(DatabaseError):
-        db._fetch_query_results("SELECT * FROM test")
\ No newline at end of file
+        db._fetch_query_results("SELECT * FROM test")
+
+def test_get_consumption_report(mock_connector, mock_sqlalchemy_engine):
+    """Test assembling the consumption report from month rows."""
+    db = DataBase()
+
+    conn = MagicMock()
+    db.pool.connect.return_value.__enter__.return_value = conn
+    conn.execute.return_value.fetchall.return_value = [
+        ("F1", "S1", "PPE1", 2.0, datetime.datetime(2024, 12, 1), 100.0, None),
+        ("F1", "S1", "PPE1", 2.0, datetime.datetime(2025, 1, 1), 110.0, 20.0),
+        ("F1", "S2", None, 1.0, None, None, None),
+        ("F2", "S3", None, 1.0, datetime.datetime(2025, 1, 1), 7.0, 3.0),
+    ]
+
+    report = db.get_consumption_report(["Energia elektryczna"], 2025)
+    conn.execute.assert_called_once()
+    assert report.months[0] == "2024-12"
+    assert len(report.months) == 13
+    assert [row.serial_number for row in report.rows] == ["S1", "S2", "S3"]
+    assert report.rows[0].months[1].value == 110.0
+    assert report.rows[1].months[1].value is None
+    assert report.total[:3] == [None, 23.0, None]
+
+
+def test_stream_query_results(mock_connector, mock_sqlalchemy_engine):
+    """Test streaming query results through a server-side cursor."""
+    db = DataBase()
+
+    conn = MagicMock()
+    db.pool.connect.return_value.__enter__.return_value = conn
+    streaming_conn = conn.execution_options.return_value
+    streaming_conn.execute.return_value = iter([("value1",), ("value2",)])
+
+    rows = db._stream_query_results("SELECT * FROM test", chunk_size=10)
+    conn.execution_options.assert_not_called()
+    assert list(rows) == [("value1",), ("value2",)]
+    conn.execution_options.assert_called_once_with(stream_results=True, yield_per=10)
+
+    streaming_conn.execute.side_effect = Exception("Database error")
+    with pytest.raises(DatabaseError):
+        list(db._stream_query_results("SELECT * FROM test"))
+
+
+def test_make_readings(mock_connector, mock_sqlalchemy_engine):
+    """Test bulk reading insert with batched lookups and per-row errors."""
+    db = DataBase()
+    db.pool.dialect.name = "postgresql"
+
+    conn = MagicMock()
+    db.pool.connect.return_value.__enter__.return_value = conn
+    conn.execute.return_value.fetchall.side_effect = [
+        [("SN1", 11)],
+        [("tech@example.com", 21)],
+    ]
+
+    readings = [
+        APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                   meter_serial_number="SN1", email="tech@example.com"),
+        APIReading(reading_id=0, value=2.0, reading_date="2025-01-31",
+                   meter_serial_number="SN404", email="tech@example.com"),
+        APIReading(reading_id=0, value=3.0, reading_date="31.01.2025",
+                   meter_serial_number="SN1", email="tech@example.com"),
+        APIReading(reading_id=0, value=4.0, reading_date="2025-02-28",
+                   meter_serial_number="SN1", email="tech@example.com"),
+    ]
+    result = db.make_readings(readings)
+
+    assert result.created == 2
+    assert [error.index for error in result.errors] == [1, 2]
+    # Two lookups, a single insert for the whole batch, the meter lock and
+    # the rollup refresh
+    assert conn.execute.call_count == 6
+    insert_params = conn.execute.call_args_list[2][0][1]
+    assert insert_params["meter_ids"] == [11, 11]
+    assert insert_params["values"] == [1.0, 4.0]
+    conn.commit.assert_called_once()
+
+
+def test_id_cache_lru_and_ttl():
+    """Test ID cache eviction, expiry and counters."""
+    cache = IdCache(max_size=2, ttl=60)
+    cache.set("meters", "SN1", 1)
+    cache.set("meters", "SN2", 2)
+    assert cache.get("meters", "SN1") == 1
+    cache.set("meters", "SN3", 3)  # evicts SN2, the least recently used
+    assert cache.get("meters", "SN2") is None
+    assert cache.get("meters", "SN3") == 3
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+    cache.invalidate("meters")
+    assert cache.stats()["size"] == 0
+
+    expired = IdCache(ttl=0)
+    expired.set("users", "user@example.com", 1)
+    assert expired.get("users", "user@example.com") is None
+
+def test_entity_id_lookups_are_cached(mock_connector, mock_sqlalchemy_engine):
+    """Test that repeated ID lookups skip the database until invalidated."""
+    db = DataBase()
+
+    conn = MagicMock()
+    db.pool.connect.return_value.__enter__.return_value = conn
+    conn.execute.return_value.fetchone.return_value = (42,)
+
+    assert db._get_meter_id("SN1") == 42
+    assert db._get_meter_id("SN1") == 42
+    assert conn.execute.call_count == 1
+    assert db.id_cache.stats()["hits"] == 1
+
+    db.delete_meter("SN1")
+    conn.execute.reset_mock()
+    db._get_meter_id("SN1")
+    assert conn.execute.call_count == 1
+
+    # Batched lookups only query the values that are not cached yet
+    conn.execute.return_value.fetchall.return_value = [("SN2", 43)]
+    assert db._get_meter_ids(["SN1", "SN2"]) == {"SN1": 42, "SN2": 43}
+    assert conn.execute.call_args[0][1] == {"values": ["SN2"]}
@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from app.server import app
 
 @pytest.fixture
@@ -9,7 +9,7 @@ def client():
 
 @pytest.fixture
 def mock_db():
-    with patch("app.server.database") as mock_db:
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
         # Set up error scenarios
         mock_db.get_readings.side_effect = ValueError("Facility not found")
         mock_db.get_all_meters.side_effect = ValueError("Facility not found")
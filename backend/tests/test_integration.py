@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from app.server import app
 from app.api_models.models import APIUser, APIFacility, APIMeter, APIReading
 
@@ -10,7 +10,7 @@ def client():
 
 @pytest.fixture
 def mock_db():
-    with patch("app.server.database") as mock_db:
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
         mock_db.login_user.return_value = APIUser(
             email="technician@example.com",
             password="hashed_pw", 
@@ -66,6 +66,7 @@ def test_complete_workflow(client, mock_db):
         "email": "technician@example.com"
     }
     
+    mock_db.make_reading.return_value = 1
     reading_response = client.post("/create_reading", json=reading_data)
     assert reading_response.status_code == 201
     
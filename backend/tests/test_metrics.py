@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from unittest.mock import patch, AsyncMock
+
+from app.server import app
+from app.database import query_metrics
+from app.database.db_client import DataBase
+from app.api_models.models import APIFacility, APIMeter, APIReading, APIUser
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_db():
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
+        yield mock_db
+
+
+def test_requests_are_recorded_by_route(client, mock_db):
+    """Test latency and status metrics labelled by route template."""
+    route = "/readings/{facility_name}"
+    requests = sample("http_request_seconds_count", method="GET", route=route)
+    ok = sample("http_responses_total", method="GET", route=route, status="200")
+    unmatched = sample("http_responses_total", method="GET", route="unmatched", status="404")
+    mock_db.get_readings.return_value = []
+
+    client.get("/readings/Biuro")
+    client.get("/readings/Hala")
+    client.get("/no/such/route")
+
+    assert sample("http_request_seconds_count", method="GET", route=route) == requests + 2
+    assert sample("http_responses_total", method="GET", route=route, status="200") == ok + 2
+    assert sample("http_responses_total", method="GET", route="unmatched", status="404") == unmatched + 1
+    assert sample("http_requests_in_flight", method="GET") == 0
+    assert "http_request_seconds_bucket" in client.get("/metrics").text
+
+
+def test_queries_are_recorded_by_calling_method(monkeypatch):
+    """Test that statements are attributed to the public DataBase method."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+    db.add_meter(APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                          ppe=None, multiply_factor=1.0, description=None))
+    for value in (1.0, 2.0):
+        db.make_reading(APIReading(reading_id=0, value=value, reading_date="2025-01-31",
+                                   meter_serial_number="M-1", email="user@example.com"))
+    db.id_cache.clear()
+
+    fetches = sample("db_query_seconds_count", method="get_readings", kind="fetch")
+    lookups = sample("db_query_seconds_count", method="get_readings", kind="lookup")
+    rows = sample("db_query_rows_total", method="get_readings", kind="fetch")
+    errors = sample("db_query_errors_total", method="add_facility", kind="returning")
+
+    db.get_readings("Biuro")
+    assert sample("db_query_seconds_count", method="get_readings", kind="fetch") == fetches + 1
+    assert sample("db_query_rows_total", method="get_readings", kind="fetch") == rows + 2
+    assert sample("db_query_seconds_count", method="get_readings", kind="lookup") == lookups
+
+    db.add_facility(APIFacility(name="Hala", address="ul. Prosta 2", email="hala@example.com"))
+    db.id_cache.clear()
+    db.get_readings("Hala")
+    # The facility lookup after an empty result goes through private helpers,
+    # but is counted for get_readings
+    assert sample("db_query_seconds_count", method="get_readings", kind="lookup") == lookups + 1
+
+    with db.pool.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE facilities")
+    with pytest.raises(Exception):
+        db.add_facility(APIFacility(name="Magazyn", address="ul. Prosta 3", email="magazyn@example.com"))
+    assert sample("db_query_errors_total", method="add_facility", kind="returning") == errors + 1
+
+
+def test_query_metrics_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(query_metrics, "enabled", False)
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    db = DataBase()
+    before = sample("db_query_seconds_count", method="unknown", kind="fetch")
+    db._fetch_query_results("SELECT 1")
+    assert sample("db_query_seconds_count", method="unknown", kind="fetch") == before
@@ -0,0 +1,65 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.database import passwords
+from app.database.db_client import DataBase
+from app.api_models.models import APIUser
+
+
+def test_verify_password_rehashes_on_cost_change():
+    hashed = passwords.hash_password("secret123", 4)
+    assert hashed.startswith("$2b$04$")
+
+    assert passwords.verify_password("secret123", hashed, 4) == (True, None)
+    assert passwords.verify_password("wrong", hashed, 5) == (False, None)
+    valid, new_hash = passwords.verify_password("secret123", hashed, 5)
+    assert valid and new_hash.startswith("$2b$05$")
+    assert passwords.verify_password("secret123", new_hash, 5) == (True, None)
+
+
+def test_password_hasher_runs_in_worker_processes():
+    hasher = passwords.PasswordHasher(max_workers=2, rounds=4)
+
+    async def scenario():
+        hashed = await hasher.hash("secret123")
+        return hashed, await asyncio.gather(
+            hasher.verify("secret123", hashed), hasher.verify("wrong", hashed)
+        )
+
+    try:
+        hashed, results = asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+    assert hashed.startswith("$2b$04$")
+    assert results == [(True, None), (False, None)]
+
+
+def test_bcrypt_rounds_from_environment(monkeypatch):
+    monkeypatch.delenv("BCRYPT_ROUNDS", raising=False)
+    assert passwords.bcrypt_rounds() == 12
+    monkeypatch.setenv("BCRYPT_ROUNDS", "10")
+    assert passwords.bcrypt_rounds() == 10
+    monkeypatch.setenv("BCRYPT_WORKERS", "3")
+    assert passwords.PasswordHasher().max_workers == 3
+
+
+def test_login_rehashes_when_cost_changes(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    db = DataBase()
+    db.create_schema()
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=2))
+
+    def stored_hash():
+        with db.pool.connect() as conn:
+            return conn.execute(text("SELECT password FROM users")).scalar()
+
+    assert stored_hash().startswith("$2b$04$")
+    db.bcrypt_rounds = 5
+    assert db.login_user("user@example.com", "wrong") is None
+    assert stored_hash().startswith("$2b$04$")
+    assert db.login_user("user@example.com", "secret123").access_level == 2
+    assert stored_hash().startswith("$2b$05$")
+    assert db.login_user("user@example.com", "secret123") is not None
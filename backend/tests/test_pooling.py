@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+import sqlalchemy
+from sqlalchemy.pool import QueuePool
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.database import pooling
+from app.database.db_client import DataBase
+
+
+def test_pool_options_defaults(monkeypatch):
+    for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_TIMEOUT", "DB_POOL_RECYCLE", "DB_POOL_PRE_PING"):
+        monkeypatch.delenv(name, raising=False)
+    assert pooling.pool_options() == {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
+
+def test_pool_options_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "2.5")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "-1")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    options = pooling.pool_options()
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 0
+    assert options["pool_timeout"] == 2.5
+    assert options["pool_recycle"] == -1
+    assert options["pool_pre_ping"] is False
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    engine = sqlalchemy.create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    pooling.instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_checkout_records_exhaustion_and_timeouts(small_engine):
+    exhausted = pooling.POOL_EXHAUSTED._value.get()
+    timeouts = pooling.POOL_TIMEOUTS._value.get()
+    connections = pooling.POOL_CONNECTIONS._value.get()
+
+    held = pooling.checkout(small_engine)
+    with pytest.raises(sqlalchemy.exc.TimeoutError):
+        pooling.checkout(small_engine)
+    assert pooling.POOL_TIMEOUTS._value.get() == timeouts + 1
+
+    # A waiter that gets the connection once it is returned.
+    waiter = threading.Thread(target=lambda: pooling.checkout(small_engine).close())
+    small_engine.pool._timeout = 5
+    timer = threading.Timer(0.05, held.close)
+    timer.start()
+    waiter.start()
+    waiter.join()
+    timer.join()
+
+    assert pooling.POOL_EXHAUSTED._value.get() == exhausted + 1
+    assert pooling.POOL_CONNECTIONS._value.get() == connections + 1
+
+
+def test_collector_reports_pool_and_cache(small_engine):
+    db = DataBase(pool=small_engine)
+    db.id_cache.set("meter", "M-1", 1)
+    db.id_cache.get("meter", "M-1")
+    registry = CollectorRegistry()
+    registry.register(pooling.DataBaseCollector(db))
+
+    with db._connect():
+        output = generate_latest(registry).decode()
+
+    assert "db_pool_size 1.0" in output
+    assert "db_pool_checked_out 1.0" in output
+    assert "id_cache_hits_total 1.0" in output
+    assert "id_cache_size 1.0" in output
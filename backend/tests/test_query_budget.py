@@ -0,0 +1,140 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app import query_budget, server
+from app.database import query_metrics
+from app.database.db_client import DataBase
+from app.api_models.models import APIFacility, APIMeter, APIMeterFilter, APIReading, APIUser
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    db = DataBase()
+    db.bcrypt_rounds = 4
+    db.create_schema()
+    db.add_facility(APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com"))
+    db.add_user(APIUser(email="user@example.com", password="secret123", access_level=3))
+    db.assign_user_to_facility("user@example.com", "Biuro")
+    for serial_number in ("M-1", "M-2", "M-3"):
+        db.add_meter(APIMeter(serial_number=serial_number, meter_type="Woda zimna",
+                              facility_name="Biuro", ppe=None, multiply_factor=1.0, description=None))
+    db.make_reading(APIReading(reading_id=0, value=1.0, reading_date="2025-01-31",
+                               meter_serial_number="M-1", email="user@example.com"))
+    db.id_cache.clear()
+    yield db
+    db.close()
+
+
+def test_statements_are_tracked_by_sql(db):
+    """Test counting the statements of a block by SQL text."""
+    with query_metrics.track_statements() as found:
+        db.get_readings("Biuro")
+    with query_metrics.track_statements() as empty:
+        db.get_meters_by_type("Biuro", "Woda ciepła")
+        db.get_meters_by_type("Biuro", "Licznik ciepła")
+    db.get_readings("Biuro")
+
+    assert found.total == 1
+    # The facility is only looked up after the first empty result, then cached
+    assert empty.total == 3
+    assert empty.most_repeated()[1] == 2
+    assert query_metrics.StatementLog().most_repeated() == (None, 0)
+
+
+def test_budget_and_repeated_statements(db, monkeypatch, caplog):
+    """Test logging N+1 requests and enforcing the declared budget."""
+    app = FastAPI()
+    app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+    @app.get("/meters/{facility_name}")
+    @query_budget.query_budget(2)
+    async def meters(facility_name: str):
+        # One query per meter, the pattern the detector is meant to catch
+        return [db.search_meters(facility_name, APIMeterFilter(serial_prefix=meter.serial_number))
+                for meter in db.get_all_meters(facility_name)]
+
+    @app.get("/facilities")
+    async def facilities():
+        return db.get_all_facilities()
+
+    client = TestClient(app)
+    route = "/meters/{facility_name}"
+    exceeded = REGISTRY.get_sample_value(
+        "http_query_budget_exceeded_total", {"method": "GET", "route": route}
+    ) or 0.0
+
+    with pytest.raises(query_budget.QueryBudgetExceeded, match="budget is 2"):
+        client.get("/meters/Biuro")
+
+    monkeypatch.setattr(query_budget, "enforce", False)
+    monkeypatch.setattr(query_budget, "QUERY_REPEAT_THRESHOLD", 3)
+    db.id_cache.clear()
+    with caplog.at_level(logging.WARNING, logger="app.query_budget"):
+        assert client.get("/meters/Biuro").status_code == 200
+        assert client.get("/facilities").status_code == 200
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("3 times" in message and "LIKE" in message for message in messages)
+    assert any("its budget is 2" in message for message in messages)
+    assert not any("/facilities" in message for message in messages)
+    assert REGISTRY.get_sample_value(
+        "http_query_budget_exceeded_total", {"method": "GET", "route": route}
+    ) == exceeded + 2
+
+
+def test_routes_stay_within_budget(db):
+    """Test the hot routes against their budgets with a cold ID cache.
+
+    The consumption reports and bulk inserts use PostgreSQL arrays and are
+    not run on SQLite.
+    """
+    requests = [
+        ("GET", "/readings/Biuro", {}),
+        ("GET", "/readings/Biuro/Woda zimna", {}),
+        ("GET", "/meters/Biuro", {}),
+        ("GET", "/meters/Biuro/Woda zimna", {}),
+        ("GET", "/search/meters/Biuro", {"params": {"serial_prefix": "M-"}}),
+        ("GET", "/search/readings/Biuro", {"params": {"sort": "value"}}),
+        ("POST", "/readings/batch", {"json": {"facility_names": ["Biuro"], "meter_types": ["Woda zimna"]}}),
+        ("GET", "/facilities", {}),
+        ("GET", "/facilities/user/user@example.com", {}),
+        ("GET", "/users/user@example.com", {}),
+        ("POST", "/create_reading", {"json": {
+            "reading_id": 0, "value": 2.0, "reading_date": "2025-02-28",
+            "meter_serial_number": "M-2", "email": "user@example.com",
+        }}),
+    ]
+    with TestClient(server.app) as client:
+        for method, url, kwargs in requests:
+            server.database.database.id_cache.clear()
+            response = client.request(method, url, **kwargs)
+            assert response.status_code < 300, url
+
+
+def test_routes_stay_within_budget_for_an_empty_facility(db):
+    """Test the routes of a facility without meters, which look it up again."""
+    db.add_facility(APIFacility(name="Hala", address="ul. Prosta 2", email="hala@example.com"))
+    db.assign_user_to_facility("user@example.com", "Hala")
+    db.id_cache.clear()
+    urls = [
+        "/readings/Hala",
+        "/readings/Hala/Woda zimna",
+        "/meters/Hala",
+        "/meters/Hala/Woda zimna",
+        "/search/meters/Hala",
+        "/search/readings/Hala",
+    ]
+    with TestClient(server.app) as client:
+        for url in urls:
+            server.database.database.id_cache.clear()
+            response = client.get(url)
+            assert response.status_code == 200, url
+        db.add_user(APIUser(email="new@example.com", password="secret123", access_level=3))
+        server.database.database.id_cache.clear()
+        assert client.get("/facilities/user/new@example.com").status_code == 200
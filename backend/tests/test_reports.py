@@ -0,0 +1,41 @@
+import pytest
+from app.api_models.models import APIConsumptionRow, APIConsumptionMonth
+from app.reports.csv_export import format_pl, iter_consumption_csv, report_header
+import app.reports.csv_export as csv_export
+
+def test_format_pl():
+    """Test pl-PL number formatting."""
+    assert format_pl(None) == "-"
+    assert format_pl(1234.5) == "1234,5"
+    assert format_pl(12345.678) == "12 345,678"
+    assert format_pl(100.0) == "100"
+    assert format_pl(-2.5, 2) == "-2,50"
+    assert format_pl(1234567.0, 2) == "1 234 567,00"
+    assert format_pl(-0.001, 2) == "0,00"
+
+def test_report_header():
+    """Test report header columns."""
+    header = report_header(2025)
+    assert header[:7] == ["Lokal", "nr licznika", "PPE", "jednostka", "mnozna", "Grudzien '24", "zuzycie"]
+    assert len(header) == 5 + 13 * 2
+
+def test_iter_consumption_csv_chunks(monkeypatch):
+    """Test that the CSV is produced in chunks and the SUM row adds up."""
+    monkeypatch.setattr(csv_export, "FLUSH_EVERY", 2)
+    months = ["2024-12"] + [f"2025-{m:02d}" for m in range(1, 13)]
+    rows = (
+        APIConsumptionRow(
+            facility_name="Obiekt;A",
+            serial_number=f"SN{i}",
+            ppe="PPE",
+            multiply_factor=2.5,
+            months=[APIConsumptionMonth(month=m, value=None, usage=1.25) for m in months],
+        )
+        for i in range(5)
+    )
+
+    chunks = list(iter_consumption_csv(rows, 2025, "kWh"))
+    assert len(chunks) > 1
+    lines = "".join(chunks).split("\r\n")
+    assert lines[1].startswith('"Obiekt;A";SN0;PPE;kWh;2.5;-;1,25')
+    assert lines[6].startswith("SUMA;;;;;;6,25")
@@ -0,0 +1,145 @@
+import asyncio
+import fnmatch
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock
+
+from app.server import app
+from app.response_cache import MemoryBackend, RedisBackend
+from app.api_models.models import APIFacility, APIMeter
+
+
+class FakeRedis:
+    """In-process stand-in for redis.asyncio.Redis."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    async def scan_iter(self, match):
+        pattern = match.replace("\\", "")
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, pattern):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_db():
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
+        yield mock_db
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda: MemoryBackend(max_entries=10),
+    lambda: RedisBackend(FakeRedis()),
+])
+def test_backend_namespaces(make_backend):
+    backend = make_backend()
+
+    async def scenario():
+        for key in ("meters:Biuro|/a?", "meters:Biuro 2|/b?", "facilities|/c?", "user_facilities:a@x.pl|/d?"):
+            await backend.set(key, b"x")
+        await backend.delete_namespace("meters:Biuro")
+        after_exact = [await backend.get(k) for k in ("meters:Biuro|/a?", "meters:Biuro 2|/b?")]
+        await backend.delete_namespace("user_facilities")
+        after_group = await backend.get("user_facilities:a@x.pl|/d?")
+        await backend.clear()
+        return after_exact, after_group, await backend.get("facilities|/c?")
+
+    assert asyncio.run(scenario()) == ([None, b"x"], None, None)
+
+
+def test_memory_backend_is_bounded_and_expires():
+    backend = MemoryBackend(max_entries=2, ttl=60)
+
+    async def scenario():
+        await backend.set("a|", b"1")
+        await backend.set("b|", b"2")
+        await backend.get("a|")
+        await backend.set("c|", b"3")
+        return [await backend.get(key) for key in ("a|", "b|", "c|")]
+
+    assert asyncio.run(scenario()) == [b"1", None, b"3"]
+    assert len(backend) == 2
+
+    backend.ttl = -1
+    asyncio.run(backend.set("d|", b"4"))
+    assert asyncio.run(backend.get("d|")) is None
+
+
+def test_cached_facilities_and_conditional_get(client, mock_db):
+    """Test that repeat requests skip the database and revalidate with ETags."""
+    mock_db.get_all_facilities.return_value = [
+        APIFacility(name="Biuro", address="ul. Prosta 1", email="biuro@example.com")
+    ]
+
+    first = client.get("/facilities")
+    second = client.get("/facilities")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == {"facilities": [
+        {"name": "Biuro", "address": "ul. Prosta 1", "email": "biuro@example.com"}
+    ]}
+    assert mock_db.get_all_facilities.await_count == 1
+
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and first.headers["cache-control"] == "no-cache"
+    not_modified = client.get("/facilities", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    client.post("/create_facility", json={"name": "Magazyn", "address": "ul. Krzywa 2", "email": "m@example.com"})
+    mock_db.get_all_facilities.return_value.append(
+        APIFacility(name="Magazyn", address="ul. Krzywa 2", email="m@example.com")
+    )
+    changed = client.get("/facilities", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert mock_db.get_all_facilities.await_count == 2
+
+
+def test_meter_writes_invalidate_their_facility(client, mock_db):
+    """Test write-through invalidation of the meters of one facility."""
+    mock_db.get_all_meters.return_value = [
+        APIMeter(serial_number="M-1", meter_type="Woda zimna", facility_name="Biuro",
+                 ppe=None, multiply_factor=1.0, description=None)
+    ]
+    client.get("/meters/Biuro")
+    client.get("/meters/Magazyn")
+    assert mock_db.get_all_meters.await_count == 2
+
+    client.post("/create_meter", json={
+        "serial_number": "M-2", "meter_type": "Woda zimna", "facility_name": "Biuro",
+        "ppe": None, "multiply_factor": 1.0, "description": None,
+    })
+    client.get("/meters/Biuro")
+    client.get("/meters/Magazyn")
+    assert mock_db.get_all_meters.await_count == 3
+
+
+def test_errors_are_not_cached(client, mock_db):
+    """Test that a 404 is not stored and the next request reaches the database."""
+    mock_db.get_all_user_facilities.side_effect = ValueError("User not found")
+    assert client.get("/facilities/user/nobody@example.com").status_code == 404
+    assert client.get("/facilities/user/nobody@example.com").status_code == 404
+    assert mock_db.get_all_user_facilities.await_count == 2
@@ -0,0 +1,89 @@
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from unittest.mock import patch, AsyncMock
+
+from app import response_formats
+from app.server import app
+from app.api_models.models import APIReading
+
+COLUMNS = {
+    "reading_id": [1, 2, 3],
+    "value": [10.0, 12.5, 15.0],
+    "reading_date": ["2025-01-31", "2025-02-28", "2025-03-31"],
+    "meter_serial_number": ["SN1", "SN1", "SN1"],
+    "email": ["tech@example.com"] * 3,
+}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_db():
+    with patch("app.server.database", new_callable=AsyncMock) as mock_db:
+        yield mock_db
+
+
+def request_accepting(accept):
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", None),
+    ("*/*", None),
+    ("application/json", None),
+    (response_formats.COLUMNAR_JSON, response_formats.COLUMNAR_JSON),
+    (f"application/json;q=0.5, {response_formats.COLUMNAR_JSON}", response_formats.COLUMNAR_JSON),
+    (f"application/json, {response_formats.COLUMNAR_JSON};q=0.5", None),
+    (f"{response_formats.COLUMNAR_JSON};q=0", None),
+])
+def test_negotiate(accept, expected):
+    """Test that a compact format is only chosen when preferred explicitly."""
+    assert response_formats.negotiate(request_accepting(accept)) == expected
+
+
+def test_negotiate_without_msgpack(monkeypatch):
+    """Test that MessagePack is not offered when msgpack is not installed."""
+    monkeypatch.setattr(response_formats, "msgpack", None)
+    accept = f"application/x-msgpack, {response_formats.COLUMNAR_JSON};q=0.9"
+    assert response_formats.negotiate(request_accepting(accept)) == response_formats.COLUMNAR_JSON
+    assert response_formats.negotiate(request_accepting("application/x-msgpack")) is None
+
+
+def test_readings_in_columnar_json(client, mock_db):
+    """Test a columnar page and that its cursor continues like the default one."""
+    mock_db.get_reading_columns.return_value = COLUMNS
+
+    response = client.get("/readings/TestFacility?limit=2",
+                          headers={"Accept": response_formats.COLUMNAR_JSON})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == response_formats.COLUMNAR_JSON
+    assert response.headers["vary"] == "Accept"
+    body = orjson.loads(response.content)
+    assert body["readings"] == {field: values[:2] for field, values in COLUMNS.items()}
+    mock_db.get_readings.assert_not_called()
+
+    mock_db.get_readings.return_value = [
+        APIReading(reading_id=2, value=12.5, reading_date="2025-02-28",
+                   meter_serial_number="SN1", email="tech@example.com"),
+        APIReading(reading_id=3, value=15.0, reading_date="2025-03-31",
+                   meter_serial_number="SN1", email="tech@example.com"),
+    ]
+    rows = client.get("/readings/TestFacility?limit=1")
+    assert rows.headers["vary"] == "Accept"
+    assert body["next_cursor"] == rows.json()["next_cursor"]
+
+
+def test_search_readings_in_msgpack(client, mock_db):
+    """Test the MessagePack form of a reading search."""
+    msgpack = pytest.importorskip("msgpack")
+    mock_db.search_reading_columns.return_value = COLUMNS
+
+    response = client.get("/search/readings/TestFacility?sort=value",
+                          headers={"Accept": "application/x-msgpack"})
+    assert response.headers["content-type"] == response_formats.MSGPACK
+    assert msgpack.unpackb(response.content) == {"readings": COLUMNS, "next_cursor": None}
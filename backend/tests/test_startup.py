@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app import server
+
+# Upper bound for importing app.server on a Cloud Run cold start.
+IMPORT_BUDGET_SECONDS = 3.0
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_import_is_lazy_and_within_budget():
+    """Test that importing the app builds no client and stays under budget."""
+    script = textwrap.dedent("""
+        import sys, time
+        start = time.perf_counter()
+        import app.server
+        elapsed = time.perf_counter() - start
+        print(elapsed, app.server.database is None, "google.cloud.sql.connector" in sys.modules)
+    """)
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout.split()
+
+    assert output[1:] == ["True", "False"]
+    assert float(output[0]) < IMPORT_BUDGET_SECONDS
+
+
+def test_lifespan_creates_and_closes_database(monkeypatch, tmp_path):
+    """Test that the client lives exactly as long as the application."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'energy.db'}")
+    collectors = set(REGISTRY._collector_to_names)
+
+    with TestClient(server.app):
+        database = server.database
+        assert database is not None
+        assert len(REGISTRY._collector_to_names) == len(collectors) + 1
+
+    assert server.database is None
+    assert set(REGISTRY._collector_to_names) == collectors
+    assert database.pool.pool.checkedout() == 0
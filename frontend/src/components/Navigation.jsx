@@ -8,7 +8,7 @@ const Navigation = () => {
     const userEmail = sessionManager.getUserEmail(); // Assuming getUserEmail() returns the email string
 
     const handleLogout = () => {
-        sessionManager.clearSession();
+        sessionManager.logout();
         navigate('/');
     };
 
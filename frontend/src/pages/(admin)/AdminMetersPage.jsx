@@ -14,6 +14,7 @@ import {
     WarningAmber as WarningAmberIcon
 } from '@mui/icons-material';
 import { API_URL } from '../../definitions';
+import { fetchReadings } from '../../scripts/readings';
 import { sessionManager } from '../../scripts/session_manager';
 
 const COMMON_METER_TYPES = ['Energia elektryczna', 'Energia klimatyzacja', 'Woda zimna', 'Woda ciepła', 'Licznik ciepła'];
@@ -171,12 +172,10 @@ const AdminMetersPage = () => {
         }
         setIsLoadingReadings(true);
         try {
-            const response = await fetch(`${API_URL}/readings/${encodeURIComponent(facilityName)}`, {
-                cache: 'no-store'
+            const readingsArray = await fetchReadings(facilityName, {
+                init: { cache: 'no-store' },
+                errorMessage: `Nie udało się pobrać odczytów dla obiektu ${facilityName}.`
             });
-            if (!response.ok) throw new Error(`Nie udało się pobrać odczytów dla obiektu ${facilityName}.`);
-            const data = await response.json();
-            const readingsArray = Array.isArray(data) ? data : (data && Array.isArray(data.readings) ? data.readings : []);
             setReadings(readingsArray);
         } catch (err) {
             setError(prev => prev ? `${prev}\nNie udało się pobrać odczytów: ${err.message}` : `Nie udało się pobrać odczytów: ${err.message}`);
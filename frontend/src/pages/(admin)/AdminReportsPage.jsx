@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Box, Button, MenuItem, FormControl, InputLabel, Select, CircularProgress, Alert } from '@mui/material';
 import { API_URL } from '../../definitions';
 import { sessionManager } from '../../scripts/session_manager';
+import { generateConsumptionReport } from '../../scripts/reports';
 import { saveAs } from 'file-saver'; // Dodaj do package.json: npm install file-saver
 
 const AdminReportsPage = () => {
@@ -39,613 +40,59 @@ const AdminReportsPage = () => {
         fetchFacilities();
     }, []);
 
-    // Funkcja pomocnicza do generowania CSV
     /**
-     * Generuje i pobiera raport CSV dla liczników energii elektrycznej.
-     * @function generateElectricityReport
-     * @returns {Promise<void>}
+     * Pobiera raport zużycia generowany po stronie serwera dla podanych typów liczników.
+     * @function runReport
+     * @param {string[]} meterTypes - Typy liczników ujęte w raporcie.
+     * @param {string} filePrefix - Prefiks nazwy pliku.
+     * @returns {void}
      */
-    const generateElectricityReport = async () => {
+    const runReport = (meterTypes, filePrefix) => {
         if (!selectedFacility) return;
-        setIsLoading(true);
         setError('');
         try {
-            let facilitiesToReport = [];
-            if (selectedFacility === "__ALL__") {
-                facilitiesToReport = facilities;
-            } else {
-                facilitiesToReport = facilities.filter(f => f.name === selectedFacility);
-            }
-            let allRows = [];
-            for (const facility of facilitiesToReport) {
-                // 1. Pobierz liczniki
-                let meters = [];
-                try {
-                    const metersRes = await fetch(`${API_URL}/meters/${encodeURIComponent(facility.name)}`);
-                    if (!metersRes.ok) throw new Error();
-                    const metersData = await metersRes.json();
-                    meters = Array.isArray(metersData) ? metersData : (metersData.meters || []);
-                } catch {
-                    meters = [];
-                }
-                const electricityMeters = meters.filter(m => m.meter_type === 'Energia elektryczna');
-
-                // 2. Pobierz odczyty
-                let readings = [];
-                try {
-                    const readingsRes = await fetch(`${API_URL}/readings/${encodeURIComponent(facility.name)}/Energia elektryczna`);
-                    if (!readingsRes.ok) throw new Error();
-                    const readingsData = await readingsRes.json();
-                    readings = Array.isArray(readingsData) ? readingsData : (readingsData.readings || []);
-                } catch {
-                    readings = [];
-                }
-
-                // 3. Przygotuj dane CSV dla tego obiektu
-                const rows = electricityMeters.map(meter => {
-                    const meterReadings = [];
-                    let prevValue = null;
-
-                    // Grudzień 2024
-                    const grudzien24 = readings.find(r =>
-                        r.meter_serial_number === meter.serial_number &&
-                        new Date(r.reading_date).getMonth() === 11 &&
-                        new Date(r.reading_date).getFullYear() === 2024
-                    );
-                    meterReadings.push(grudzien24 ? grudzien24.value : '-');
-                    prevValue = grudzien24 ? parseFloat(grudzien24.value) : null;
-
-                    // Styczeń-grudzień 2025
-                    let prevMonthValue = prevValue;
-                    for (let m = 0; m < 12; m++) {
-                        const reading = readings.find(r =>
-                            r.meter_serial_number === meter.serial_number &&
-                            new Date(r.reading_date).getMonth() === m &&
-                            new Date(r.reading_date).getFullYear() === 2025
-                        );
-                        const value = reading ? parseFloat(reading.value) : '';
-                        meterReadings.push(value !== '' ? value.toLocaleString('pl-PL') : '-');
-                        // Zużycie
-                        let usage = '-';
-                        if (value !== '' && prevMonthValue !== null && value !== '') {
-                            usage = (value - prevMonthValue).toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
-                        }
-                        meterReadings.push(usage);
-                        prevMonthValue = value !== '' ? value : prevMonthValue;
-                    }
-
-                    return [
-                        facility.name || '-',
-                        meter.serial_number || '-',
-                        meter.ppe || '-',
-                        meter.unit || 'kWh',
-                        meter.multiply_factor !== undefined && meter.multiply_factor !== null ? meter.multiply_factor : '-',
-                        ...meterReadings
-                    ];
-                });
-
-                allRows = allRows.concat(rows);
-            }
-
-            // 4. Przygotuj nagłówki CSV (tylko raz)
-            const months = [
-                'Grudzien \'24', 'styczen', 'luty', 'marzec', 'kwiecien', 'maj', 'czerwiec',
-                'lipiec', 'sierpien', 'wrzesien', 'pazdziernik', 'listopad', 'grudzien'
-            ];
-            const header = [
-                'Lokal', 'nr licznika', 'PPE', 'jednostka', 'mnozna',
-                ...months.flatMap(m => [m, 'zuzycie'])
-            ];
-
-            // 5. SUMA zużyć
-            // Indeksy kolumn zużycia: 5,7,9,...,29 (licząc od 0)
-            const zuzycieIndexes = [];
-            let col = 5;
-            for (let i = 0; i < 13; i++) {
-                zuzycieIndexes.push(col + 1); // bo po każdej wartości jest kolumna zużycia
-                col += 2;
-            }
-            const sumZuzycie = Array(13).fill(0);
-            allRows.forEach(row => {
-                zuzycieIndexes.forEach((idx, i) => {
-                    const val = row[idx];
-                    const num = typeof val === 'string' ? parseFloat(val.replace(',', '.')) : val;
-                    if (!isNaN(num)) sumZuzycie[i] += num;
-                });
+            generateConsumptionReport({
+                facility: selectedFacility,
+                email: sessionManager.getUserEmail(),
+                meterTypes,
+                filePrefix
             });
-            const sumRow = [
-                'SUMA', '', '', '', '',
-                ...months.flatMap((_, i) => ['', sumZuzycie[i] !== 0 ? sumZuzycie[i].toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 }) : '-'])
-            ];
-
-            // 6. Zbuduj CSV
-            const csvContent = [
-                header.join(';'),
-                ...allRows.map(row => row.join(';')),
-                sumRow.join(';')
-            ].join('\r\n');
-
-            // 7. Pobierz plik
-            const filename = selectedFacility === "__ALL__"
-                ? `Raport_Energia_Elektryczna_Wszystkie_obiekty.csv`
-                : `Raport_Energia_Elektryczna_${selectedFacility}.csv`;
-            const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-            if (window.navigator.msSaveOrOpenBlob) {
-                window.navigator.msSaveBlob(blob, filename);
-            } else {
-                const link = document.createElement('a');
-                const url = URL.createObjectURL(blob);
-                link.href = url;
-                link.setAttribute('download', filename);
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-                URL.revokeObjectURL(url);
-            }
         } catch (err) {
             setError('Błąd generowania raportu: ' + (err.message || err));
-        } finally {
-            setIsLoading(false);
         }
     };
 
-    // Funkcja pomocnicza do generowania CSV dla liczników Energii Klimatyzacji
+    /**
+     * Generuje i pobiera raport CSV dla liczników energii elektrycznej.
+     * @function generateElectricityReport
+     * @returns {void}
+     */
+    const generateElectricityReport = () =>
+        runReport(['Energia elektryczna'], 'Raport_Energia_Elektryczna');
+
     /**
      * Generuje i pobiera raport CSV dla liczników energii klimatyzacji.
      * @function generateAirConditioningReport
-     * @returns {Promise<void>}
+     * @returns {void}
      */
-    const generateAirConditioningReport = async () => {
-        if (!selectedFacility) return;
-        setIsLoading(true);
-        setError('');
-        try {
-            let facilitiesToReport = [];
-            if (selectedFacility === "__ALL__") {
-                facilitiesToReport = facilities;
-            } else {
-                facilitiesToReport = facilities.filter(f => f.name === selectedFacility);
-            }
-            let allRows = [];
-            for (const facility of facilitiesToReport) {
-                // 1. Pobierz liczniki
-                let meters = [];
-                try {
-                    const metersRes = await fetch(`${API_URL}/meters/${encodeURIComponent(facility.name)}`);
-                    if (!metersRes.ok) throw new Error();
-                    const metersData = await metersRes.json();
-                    meters = Array.isArray(metersData) ? metersData : (metersData.meters || []);
-                } catch {
-                    meters = [];
-                }
-                const acMeters = meters.filter(m => m.meter_type === 'Energia klimatyzacja');
-
-                // 2. Pobierz odczyty
-                let readings = [];
-                try {
-                    const readingsRes = await fetch(`${API_URL}/readings/${encodeURIComponent(facility.name)}/Energia klimatyzacja`);
-                    if (!readingsRes.ok) throw new Error();
-                    const readingsData = await readingsRes.json();
-                    readings = Array.isArray(readingsData) ? readingsData : (readingsData.readings || []);
-                } catch {
-                    readings = [];
-                }
-
-                // 3. Przygotuj dane CSV dla tego obiektu
-                const rows = acMeters.map(meter => {
-                    const meterReadings = [];
-                    let prevValue = null;
-
-                    // Grudzień 2024
-                    const grudzien24 = readings.find(r =>
-                        r.meter_serial_number === meter.serial_number &&
-                        new Date(r.reading_date).getMonth() === 11 &&
-                        new Date(r.reading_date).getFullYear() === 2024
-                    );
-                    meterReadings.push(grudzien24 ? grudzien24.value : '-');
-                    prevValue = grudzien24 ? parseFloat(grudzien24.value) : null;
-
-                    // Styczeń-grudzień 2025
-                    let prevMonthValue = prevValue;
-                    for (let m = 0; m < 12; m++) {
-                        const reading = readings.find(r =>
-                            r.meter_serial_number === meter.serial_number &&
-                            new Date(r.reading_date).getMonth() === m &&
-                            new Date(r.reading_date).getFullYear() === 2025
-                        );
-                        const value = reading ? parseFloat(reading.value) : '';
-                        meterReadings.push(value !== '' ? value.toLocaleString('pl-PL') : '-');
-                        // Zużycie
-                        let usage = '-';
-                        if (value !== '' && prevMonthValue !== null && value !== '') {
-                            usage = (value - prevMonthValue).toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
-                        }
-                        meterReadings.push(usage);
-                        prevMonthValue = value !== '' ? value : prevMonthValue;
-                    }
+    const generateAirConditioningReport = () =>
+        runReport(['Energia klimatyzacja'], 'Raport_Energia_Klimatyzacja');
 
-                    return [
-                        facility.name || '-',
-                        meter.serial_number || '-',
-                        meter.ppe || '-',
-                        meter.unit || 'kWh',
-                        meter.multiply_factor !== undefined && meter.multiply_factor !== null ? meter.multiply_factor : '-',
-                        ...meterReadings
-                    ];
-                });
-
-                allRows = allRows.concat(rows);
-            }
-
-            // 4. Przygotuj nagłówki CSV (tylko raz)
-            const months = [
-                'Grudzien \'24', 'styczen', 'luty', 'marzec', 'kwiecien', 'maj', 'czerwiec',
-                'lipiec', 'sierpien', 'wrzesien', 'pazdziernik', 'listopad', 'grudzien'
-            ];
-            const header = [
-                'Lokal', 'nr licznika', 'PPE', 'jednostka', 'mnozna',
-                ...months.flatMap(m => [m, 'zuzycie'])
-            ];
-
-            // 5. SUMA zużyć
-            const zuzycieIndexes = [];
-            let col = 5;
-            for (let i = 0; i < 13; i++) {
-                zuzycieIndexes.push(col + 1);
-                col += 2;
-            }
-            const sumZuzycie = Array(13).fill(0);
-            allRows.forEach(row => {
-                zuzycieIndexes.forEach((idx, i) => {
-                    const val = row[idx];
-                    const num = typeof val === 'string' ? parseFloat(val.replace(',', '.')) : val;
-                    if (!isNaN(num)) sumZuzycie[i] += num;
-                });
-            });
-            const sumRow = [
-                'SUMA', '', '', '', '',
-                ...months.flatMap((_, i) => ['', sumZuzycie[i] !== 0 ? sumZuzycie[i].toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 }) : '-'])
-            ];
-
-            // 6. Zbuduj CSV
-            const csvContent = [
-                header.join(';'),
-                ...allRows.map(row => row.join(';')),
-                sumRow.join(';')
-            ].join('\r\n');
-
-            // 7. Pobierz plik
-            const filename = selectedFacility === "__ALL__"
-                ? `Raport_Energia_Klimatyzacja_Wszystkie_obiekty.csv`
-                : `Raport_Energia_Klimatyzacja_${selectedFacility}.csv`;
-            const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-            if (window.navigator.msSaveOrOpenBlob) {
-                window.navigator.msSaveBlob(blob, filename);
-            } else {
-                const link = document.createElement('a');
-                const url = URL.createObjectURL(blob);
-                link.href = url;
-                link.setAttribute('download', filename);
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-                URL.revokeObjectURL(url);
-            }
-        } catch (err) {
-            setError('Błąd generowania raportu: ' + (err.message || err));
-        } finally {
-            setIsLoading(false);
-        }
-    };
-
-    // Funkcja pomocnicza do generowania CSV dla liczników Wody zimnej i Wody ciepłej
     /**
      * Generuje i pobiera raport CSV dla liczników wody zimnej i ciepłej.
      * @function generateWaterReport
-     * @returns {Promise<void>}
+     * @returns {void}
      */
-    const generateWaterReport = async () => {
-        if (!selectedFacility) return;
-        setIsLoading(true);
-        setError('');
-        try {
-            let facilitiesToReport = [];
-            if (selectedFacility === "__ALL__") {
-                facilitiesToReport = facilities;
-            } else {
-                facilitiesToReport = facilities.filter(f => f.name === selectedFacility);
-            }
-            let allRows = [];
-
-            // Typy liczników do raportu
-            const waterTypes = ['Woda zimna', 'Woda ciepła'];
-
-            for (const facility of facilitiesToReport) {
-                // 1. Pobierz liczniki
-                let meters = [];
-                try {
-                    const metersRes = await fetch(`${API_URL}/meters/${encodeURIComponent(facility.name)}`);
-                    if (!metersRes.ok) throw new Error();
-                    const metersData = await metersRes.json();
-                    meters = Array.isArray(metersData) ? metersData : (metersData.meters || []);
-                } catch {
-                    meters = [];
-                }
-                const waterMeters = meters.filter(m => waterTypes.includes(m.meter_type));
-
-                // 2. Pobierz odczyty dla obu typów
-                let allReadings = [];
-                for (const type of waterTypes) {
-                    try {
-                        const readingsRes = await fetch(`${API_URL}/readings/${encodeURIComponent(facility.name)}/${encodeURIComponent(type)}`);
-                        if (!readingsRes.ok) throw new Error();
-                        const readingsData = await readingsRes.json();
-                        const readings = Array.isArray(readingsData) ? readingsData : (readingsData.readings || []);
-                        allReadings = allReadings.concat(readings);
-                    } catch {
-                        // Brak odczytów dla tego typu
-                    }
-                }
-
-                // 3. Przygotuj dane CSV dla tego obiektu
-                const rows = waterMeters.map(meter => {
-                    const meterReadings = [];
-                    let prevValue = null;
-
-                    // Grudzień 2024
-                    const grudzien24 = allReadings.find(r =>
-                        r.meter_serial_number === meter.serial_number &&
-                        new Date(r.reading_date).getMonth() === 11 &&
-                        new Date(r.reading_date).getFullYear() === 2024
-                    );
-                    meterReadings.push(grudzien24 ? grudzien24.value : '-');
-                    prevValue = grudzien24 ? parseFloat(grudzien24.value) : null;
+    const generateWaterReport = () =>
+        runReport(['Woda zimna', 'Woda ciepła'], 'Raport_Woda');
 
-                    // Styczeń-grudzień 2025
-                    let prevMonthValue = prevValue;
-                    for (let m = 0; m < 12; m++) {
-                        const reading = allReadings.find(r =>
-                            r.meter_serial_number === meter.serial_number &&
-                            new Date(r.reading_date).getMonth() === m &&
-                            new Date(r.reading_date).getFullYear() === 2025
-                        );
-                        const value = reading ? parseFloat(reading.value) : '';
-                        meterReadings.push(value !== '' ? value.toLocaleString('pl-PL') : '-');
-                        // Zużycie
-                        let usage = '-';
-                        if (value !== '' && prevMonthValue !== null && value !== '') {
-                            usage = (value - prevMonthValue).toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
-                        }
-                        meterReadings.push(usage);
-                        prevMonthValue = value !== '' ? value : prevMonthValue;
-                    }
-
-                    return [
-                        facility.name || '-',
-                        meter.serial_number || '-',
-                        meter.ppe || '-',
-                        meter.unit || 'm3',
-                        meter.multiply_factor !== undefined && meter.multiply_factor !== null ? meter.multiply_factor : '-',
-                        ...meterReadings
-                    ];
-                });
-
-                allRows = allRows.concat(rows);
-            }
-
-            // 4. Przygotuj nagłówki CSV (tylko raz)
-            const months = [
-                'Grudzien \'24', 'styczen', 'luty', 'marzec', 'kwiecien', 'maj', 'czerwiec',
-                'lipiec', 'sierpien', 'wrzesien', 'pazdziernik', 'listopad', 'grudzien'
-            ];
-            const header = [
-                'Lokal', 'nr licznika', 'PPE', 'jednostka', 'mnozna',
-                ...months.flatMap(m => [m, 'zuzycie'])
-            ];
-
-            // 5. SUMA zużyć
-            const zuzycieIndexes = [];
-            let col = 5;
-            for (let i = 0; i < 13; i++) {
-                zuzycieIndexes.push(col + 1);
-                col += 2;
-            }
-            const sumZuzycie = Array(13).fill(0);
-            allRows.forEach(row => {
-                zuzycieIndexes.forEach((idx, i) => {
-                    const val = row[idx];
-                    const num = typeof val === 'string' ? parseFloat(val.replace(',', '.')) : val;
-                    if (!isNaN(num)) sumZuzycie[i] += num;
-                });
-            });
-            const sumRow = [
-                'SUMA', '', '', '', '',
-                ...months.flatMap((_, i) => ['', sumZuzycie[i] !== 0 ? sumZuzycie[i].toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 }) : '-'])
-            ];
-
-            // 6. Zbuduj CSV
-            const csvContent = [
-                header.join(';'),
-                ...allRows.map(row => row.join(';')),
-                sumRow.join(';')
-            ].join('\r\n');
-
-            // 7. Pobierz plik
-            const filename = selectedFacility === "__ALL__"
-                ? `Raport_Woda_Wszystkie_obiekty.csv`
-                : `Raport_Woda_${selectedFacility}.csv`;
-            const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-            if (window.navigator.msSaveOrOpenBlob) {
-                window.navigator.msSaveBlob(blob, filename);
-            } else {
-                const link = document.createElement('a');
-                const url = URL.createObjectURL(blob);
-                link.href = url;
-                link.setAttribute('download', filename);
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-                URL.revokeObjectURL(url);
-            }
-        } catch (err) {
-            setError('Błąd generowania raportu: ' + (err.message || err));
-        } finally {
-            setIsLoading(false);
-        }
-    };
-
-    // Funkcja pomocnicza do generowania CSV dla liczników ciepła
     /**
      * Generuje i pobiera raport CSV dla liczników ciepła.
      * @function generateHeatMeterReport
-     * @returns {Promise<void>}
+     * @returns {void}
      */
-    const generateHeatMeterReport = async () => {
-        if (!selectedFacility) return;
-        setIsLoading(true);
-        setError('');
-        try {
-            let facilitiesToReport = [];
-            if (selectedFacility === "__ALL__") {
-                facilitiesToReport = facilities;
-            } else {
-                facilitiesToReport = facilities.filter(f => f.name === selectedFacility);
-            }
-            let allRows = [];
-
-            // Typ liczników do raportu
-            const heatType = 'Licznik ciepła';
-
-            for (const facility of facilitiesToReport) {
-                // 1. Pobierz liczniki
-                let meters = [];
-                try {
-                    const metersRes = await fetch(`${API_URL}/meters/${encodeURIComponent(facility.name)}`);
-                    if (!metersRes.ok) throw new Error();
-                    const metersData = await metersRes.json();
-                    meters = Array.isArray(metersData) ? metersData : (metersData.meters || []);
-                } catch {
-                    meters = [];
-                }
-                const heatMeters = meters.filter(m => m.meter_type === heatType);
-
-                // 2. Pobierz odczyty
-                let readings = [];
-                try {
-                    const readingsRes = await fetch(`${API_URL}/readings/${encodeURIComponent(facility.name)}/${encodeURIComponent(heatType)}`);
-                    if (!readingsRes.ok) throw new Error();
-                    const readingsData = await readingsRes.json();
-                    readings = Array.isArray(readingsData) ? readingsData : (readingsData.readings || []);
-                } catch {
-                    readings = [];
-                }
-
-                // 3. Przygotuj dane CSV dla tego obiektu
-                const rows = heatMeters.map(meter => {
-                    const meterReadings = [];
-                    let prevValue = null;
-
-                    // Grudzień 2024
-                    const grudzien24 = readings.find(r =>
-                        r.meter_serial_number === meter.serial_number &&
-                        new Date(r.reading_date).getMonth() === 11 &&
-                        new Date(r.reading_date).getFullYear() === 2024
-                    );
-                    meterReadings.push(grudzien24 ? grudzien24.value : '-');
-                    prevValue = grudzien24 ? parseFloat(grudzien24.value) : null;
-
-                    // Styczeń-grudzień 2025
-                    let prevMonthValue = prevValue;
-                    for (let m = 0; m < 12; m++) {
-                        const reading = readings.find(r =>
-                            r.meter_serial_number === meter.serial_number &&
-                            new Date(r.reading_date).getMonth() === m &&
-                            new Date(r.reading_date).getFullYear() === 2025
-                        );
-                        const value = reading ? parseFloat(reading.value) : '';
-                        meterReadings.push(value !== '' ? value.toLocaleString('pl-PL') : '-');
-                        // Zużycie
-                        let usage = '-';
-                        if (value !== '' && prevMonthValue !== null && value !== '') {
-                            usage = (value - prevMonthValue).toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
-                        }
-                        meterReadings.push(usage);
-                        prevMonthValue = value !== '' ? value : prevMonthValue;
-                    }
-
-                    return [
-                        facility.name || '-',
-                        meter.serial_number || '-',
-                        meter.ppe || '-',
-                        meter.unit || 'GJ',
-                        meter.multiply_factor !== undefined && meter.multiply_factor !== null ? meter.multiply_factor : '-',
-                        ...meterReadings
-                    ];
-                });
-
-                allRows = allRows.concat(rows);
-            }
-
-            // 4. Przygotuj nagłówki CSV (tylko raz)
-            const months = [
-                'Grudzien \'24', 'styczen', 'luty', 'marzec', 'kwiecien', 'maj', 'czerwiec',
-                'lipiec', 'sierpien', 'wrzesien', 'pazdziernik', 'listopad', 'grudzien'
-            ];
-            const header = [
-                'Lokal', 'nr licznika', 'PPE', 'jednostka', 'mnozna',
-                ...months.flatMap(m => [m, 'zuzycie'])
-            ];
-
-            // 5. SUMA zużyć
-            const zuzycieIndexes = [];
-            let col = 5;
-            for (let i = 0; i < 13; i++) {
-                zuzycieIndexes.push(col + 1);
-                col += 2;
-            }
-            const sumZuzycie = Array(13).fill(0);
-            allRows.forEach(row => {
-                zuzycieIndexes.forEach((idx, i) => {
-                    const val = row[idx];
-                    const num = typeof val === 'string' ? parseFloat(val.replace(',', '.')) : val;
-                    if (!isNaN(num)) sumZuzycie[i] += num;
-                });
-            });
-            const sumRow = [
-                'SUMA', '', '', '', '',
-                ...months.flatMap((_, i) => ['', sumZuzycie[i] !== 0 ? sumZuzycie[i].toLocaleString('pl-PL', { minimumFractionDigits: 2, maximumFractionDigits: 2 }) : '-'])
-            ];
-
-            // 6. Zbuduj CSV
-            const csvContent = [
-                header.join(';'),
-                ...allRows.map(row => row.join(';')),
-                sumRow.join(';')
-            ].join('\r\n');
-
-            // 7. Pobierz plik
-            const filename = selectedFacility === "__ALL__"
-                ? `Raport_Licznik_Ciepla_Wszystkie_obiekty.csv`
-                : `Raport_Licznik_Ciepla_${selectedFacility}.csv`;
-            const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-            if (window.navigator.msSaveOrOpenBlob) {
-                window.navigator.msSaveBlob(blob, filename);
-            } else {
-                const link = document.createElement('a');
-                const url = URL.createObjectURL(blob);
-                link.href = url;
-                link.setAttribute('download', filename);
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-                URL.revokeObjectURL(url);
-            }
-        } catch (err) {
-            setError('Błąd generowania raportu: ' + (err.message || err));
-        } finally {
-            setIsLoading(false);
-        }
-    };
+    const generateHeatMeterReport = () =>
+        runReport(['Licznik ciepła'], 'Raport_Licznik_Ciepla');
 
     return (
         <div className="p-6">
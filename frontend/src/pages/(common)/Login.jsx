@@ -50,6 +50,8 @@ const Login = () => {
                 sessionManager.setSession({
                     access_level: result.access_level,
                     email: result.email, // Zakładamy, że API zwraca email w result.email
+                    access_token: result.access_token,
+                    refresh_token: result.refresh_token,
                     // dodaj inne dane użytkownika jeśli potrzebne
                 });
 
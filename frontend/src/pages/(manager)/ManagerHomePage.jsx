@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { sessionManager } from '../../scripts/session_manager';
 import { API_URL } from '../../definitions';
+import { fetchReadingsBatch } from '../../scripts/readings';
 import {
     CircularProgress, Alert, Paper, Typography, Box,
     FormControl, InputLabel, Select, MenuItem
@@ -24,6 +25,7 @@ const AdminHomePage = () => {
     const [facilities, setFacilities] = useState([]);
     const [selectedFacility, setSelectedFacility] = useState(null);
     const [readings, setReadings] = useState([]);
+    const [readingsByFacility, setReadingsByFacility] = useState({});
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState('');
     const [selectedYear, setSelectedYear] = useState(getCurrentYear());
@@ -62,40 +64,44 @@ const AdminHomePage = () => {
     }, [userEmail]);
 
     /**
-     * Pobiera odczyty dla wybranego obiektu i typu licznika.
+     * Pobiera odczyty wszystkich obiektów z listy dla typu licznika jednym zapytaniem
+     * /readings/batch, zamiast osobnego zapytania po wyborze każdego obiektu.
+     * Pobierany jest tylko wybrany rok i grudzień roku poprzedniego, od którego liczone jest
+     * zużycie w styczniu.
      * @function fetchReadings
-     * @param {string} facilityName - Nazwa obiektu.
+     * @param {string[]} facilityNames - Nazwy obiektów.
      * @param {string} meterType - Typ licznika.
+     * @param {number} year - Wybrany rok.
      * @returns {Promise<void>}
      */
-    // Pobierz odczyty dla wybranego obiektu
-    const fetchReadings = useCallback(async (facilityName, meterType) => {
-        if (!facilityName || !meterType) {
-            setReadings([]);
+    const fetchReadings = useCallback(async (facilityNames, meterType, year) => {
+        if (facilityNames.length === 0 || !meterType) {
+            setReadingsByFacility({});
             return;
         }
         setIsLoading(true);
         try {
-            const response = await fetch(`${API_URL}/readings/${encodeURIComponent(facilityName)}/${encodeURIComponent(meterType)}`);
-            if (!response.ok) throw new Error('Nie udało się pobrać odczytów.');
-            const data = await response.json();
-            console.log('fetchReadings - response data:', data);
-            setReadings(Array.isArray(data) ? data : (data.readings || []));
+            setReadingsByFacility(await fetchReadingsBatch(facilityNames, {
+                meterTypes: [meterType],
+                from: `${year - 1}-12-01`,
+                to: `${year}-12-31`,
+            }));
         } catch (err) {
             setError(err.message);
-            setReadings([]);
+            setReadingsByFacility({});
         } finally {
             setIsLoading(false);
         }
     }, []);
 
     useEffect(() => {
-        if (selectedFacility && selectedMeterType) {
-            fetchReadings(selectedFacility.name, selectedMeterType);
-        } else {
-            setReadings([]);
-        }
-    }, [selectedFacility, selectedMeterType, fetchReadings]);
+        fetchReadings(facilities.map(f => f.name), selectedMeterType, selectedYear);
+    }, [facilities, selectedMeterType, selectedYear, fetchReadings]);
+
+    // Odczyty wybranego obiektu są już pobrane
+    useEffect(() => {
+        setReadings(selectedFacility ? (readingsByFacility[selectedFacility.name] || []) : []);
+    }, [selectedFacility, readingsByFacility]);
 
     // --- Agregacja do wykresu zbiorczego ---
     /**
@@ -14,6 +14,8 @@ import {
     WarningAmber as WarningAmberIcon
 } from '@mui/icons-material';
 import { API_URL } from '../../definitions';
+import { fetchReadings } from '../../scripts/readings';
+import { searchMeters } from '../../scripts/search';
 import { sessionManager } from '../../scripts/session_manager';
 
 const COMMON_METER_TYPES = ['Energia elektryczna', 'Energia klimatyzacja', 'Woda zimna', 'Woda ciepła', 'Licznik ciepła'];
@@ -120,22 +122,26 @@ const TechnicianDataEntryPage = () => {
     }, [fetchFacilities, currentUserEmail]);
 
     /**
-     * Pobiera liczniki dla wybranego obiektu.
+     * Pobiera liczniki wybranego obiektu, filtrowane po stronie serwera.
      * @function
      * @async
      * @param {string} facilityName - Nazwa wybranego obiektu.
+     * @param {string} [meterType] - Typ licznika.
+     * @param {string} [serialPrefix] - Początek numeru seryjnego.
      */
-    const fetchMetersForFacility = useCallback(async (facilityName) => {
+    const fetchMetersForFacility = useCallback(async (facilityName, meterType, serialPrefix) => {
         if (!facilityName) {
             setMeters([]);
             return;
         }
         setIsLoadingMeters(true);
         try {
-            const response = await fetch(`${API_URL}/meters/${encodeURIComponent(facilityName)}`);
-            if (!response.ok) throw new Error(`Nie udało się pobrać liczników dla obiektu ${facilityName}.`);
-            const data = await response.json();
-            setMeters(Array.isArray(data) ? data : (data.meters || []));
+            const metersArray = await searchMeters(facilityName, {
+                meterType,
+                serialPrefix,
+                errorMessage: `Nie udało się pobrać liczników dla obiektu ${facilityName}.`
+            });
+            setMeters(metersArray);
         } catch (err) {
             setError(err.message);
             setMeters([]);
@@ -157,12 +163,10 @@ const TechnicianDataEntryPage = () => {
         }
         setIsLoadingReadings(true);
         try {
-            const response = await fetch(`${API_URL}/readings/${encodeURIComponent(facilityName)}`, {
-                cache: 'no-store'
+            const readingsArray = await fetchReadings(facilityName, {
+                init: { cache: 'no-store' },
+                errorMessage: `Nie udało się pobrać odczytów dla obiektu ${facilityName}.`
             });
-            if (!response.ok) throw new Error(`Nie udało się pobrać odczytów dla obiektu ${facilityName}.`);
-            const data = await response.json();
-            const readingsArray = Array.isArray(data) ? data : (data && Array.isArray(data.readings) ? data.readings : []);
             setReadings(readingsArray);
         } catch (err) {
             setError(err.message);
@@ -176,14 +180,22 @@ const TechnicianDataEntryPage = () => {
         if (selectedFacility) {
             setError('');
             setSuccessMessage('');
-            fetchMetersForFacility(selectedFacility.name);
             fetchReadingsForFacility(selectedFacility.name);
             setExpandedReadings({});
         } else {
             setMeters([]);
             setReadings([]);
         }
-    }, [selectedFacility, fetchMetersForFacility, fetchReadingsForFacility]);
+    }, [selectedFacility, fetchReadingsForFacility]);
+
+    // Liczniki są filtrowane przez serwer; wpisywany numer wysyłany jest po krótkiej przerwie
+    useEffect(() => {
+        if (!selectedFacility) return undefined;
+        const timeout = setTimeout(() => {
+            fetchMetersForFacility(selectedFacility.name, selectedMeterTypeFilter, meterSearchQuery.trim());
+        }, meterSearchQuery ? 300 : 0);
+        return () => clearTimeout(timeout);
+    }, [selectedFacility, selectedMeterTypeFilter, meterSearchQuery, fetchMetersForFacility]);
 
     /**
      * Otwiera dialog dodawania nowego odczytu dla wybranego licznika.
@@ -392,25 +404,7 @@ const TechnicianDataEntryPage = () => {
         }));
     };
 
-    /**
-     * Zwraca listę liczników przefiltrowanych po typie i wyszukiwaniu po numerze seryjnym.
-     * @function
-     * @returns {Array} Lista liczników do wyświetlenia.
-     */
-    const getFilteredAndSearchedMeters = () => {
-        let filtered = meters;
-        if (selectedMeterTypeFilter) {
-            filtered = filtered.filter(meter => meter.meter_type === selectedMeterTypeFilter);
-        }
-        if (meterSearchQuery) {
-            filtered = filtered.filter(meter =>
-                meter.serial_number.toLowerCase().includes(meterSearchQuery.toLowerCase())
-            );
-        }
-        return filtered;
-    };
-
-    const displayedMeters = selectedFacility ? getFilteredAndSearchedMeters() : [];
+    const displayedMeters = selectedFacility ? meters : [];
 
     return (
         <div className="p-6 bg-ars-whitegrey min-h-screen flex flex-col">
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { sessionManager } from '../../scripts/session_manager';
 import { API_URL } from '../../definitions';
+import { fetchReadings } from '../../scripts/readings';
 import { CircularProgress, Alert, Paper, Typography, Box, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, IconButton, Collapse } from '@mui/material';
 import { KeyboardArrowDown as KeyboardArrowDownIcon, KeyboardArrowUp as KeyboardArrowUpIcon, WarningAmber as WarningAmberIcon } from '@mui/icons-material';
 
@@ -65,13 +66,7 @@ const UserMetersPage = () => {
             const metersData = await metersResponse.json();
             setMeters(Array.isArray(metersData) ? metersData : (metersData.meters || []));
 
-            const readingsResponse = await fetch(`${API_URL}/readings/${encodeURIComponent(facility.name)}`, { cache: 'no-store' });
-            if (!readingsResponse.ok) {
-                const errorData = await readingsResponse.json().catch(() => ({}));
-                throw new Error(errorData.detail || 'Nie udało się pobrać odczytów.');
-            }
-            const readingsData = await readingsResponse.json();
-            setReadings(Array.isArray(readingsData) ? readingsData : (readingsData.readings || []));
+            setReadings(await fetchReadings(facility.name, { init: { cache: 'no-store' } }));
 
         } catch (err) {
             setError(err.message);
@@ -8,7 +8,7 @@ import { API_URL } from '../definitions';
  * @param {Object} formData - Dane logowania użytkownika.
  * @param {string} formData.email - Adres email użytkownika.
  * @param {string} formData.password - Hasło użytkownika.
- * @returns {Promise<Object>} Wynik autoryzacji: { success, email, access_level, message } lub błąd.
+ * @returns {Promise<Object>} Wynik autoryzacji: { success, email, access_level, access_token, refresh_token, message } lub błąd.
  * @throws {Error} W przypadku błędu komunikacji lub nieprawidłowych danych logowania.
  */
 async function AuthFunc(formData) {
@@ -45,6 +45,8 @@ async function AuthFunc(formData) {
                 success: true,
                 email: formData.email,
                 access_level: data.access_level,
+                access_token: data.access_token,
+                refresh_token: data.refresh_token,
                 message: data.message || 'Zalogowano pomyślnie'
             };
         } else {
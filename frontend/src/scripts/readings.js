@@ -0,0 +1,102 @@
+import { API_URL } from '../definitions';
+
+/**
+ * Pobiera odczyty obiektu strona po stronie, podążając za `next_cursor` zwracanym przez serwer.
+ * @async
+ * @function fetchReadings
+ * @param {string} facilityName - Nazwa obiektu.
+ * @param {Object} [options]
+ * @param {string} [options.meterType] - Typ licznika; bez niego pobierane są odczyty wszystkich liczników.
+ * @param {string} [options.from] - Data początkowa (YYYY-MM-DD), włącznie.
+ * @param {string} [options.to] - Data końcowa (YYYY-MM-DD), włącznie.
+ * @param {RequestInit} [options.init] - Dodatkowe opcje przekazywane do fetch, np. { cache: 'no-store' }.
+ * @param {string} [options.errorMessage] - Komunikat błędu, gdy serwer nie poda szczegółów.
+ * @returns {Promise<Object[]>} Odczyty posortowane według daty.
+ * @throws {Error} Gdy którakolwiek strona nie zostanie pobrana.
+ */
+export async function fetchReadings(facilityName, {
+    meterType,
+    from,
+    to,
+    init,
+    errorMessage = 'Nie udało się pobrać odczytów.',
+} = {}) {
+    let url = `${API_URL}/readings/${encodeURIComponent(facilityName)}`;
+    if (meterType) url += `/${encodeURIComponent(meterType)}`;
+
+    const readings = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams();
+        if (from) params.append('from', from);
+        if (to) params.append('to', to);
+        if (cursor) params.append('cursor', cursor);
+
+        const query = params.toString();
+        const response = await fetch(query ? `${url}?${query}` : url, init);
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.detail || errorMessage);
+        }
+        const data = await response.json();
+        if (Array.isArray(data.readings)) readings.push(...data.readings);
+        cursor = data.next_cursor;
+    } while (cursor);
+
+    return readings;
+}
+
+// Limit obiektów w jednym zapytaniu /readings/batch (MAX_BATCH_FACILITIES na serwerze).
+const BATCH_FACILITIES = 100;
+
+/**
+ * Pobiera odczyty wielu obiektów naraz przez POST /readings/batch, pogrupowane według obiektu.
+ * Odczyty przychodzą stronami wspólnymi dla wszystkich obiektów; funkcja podąża za `next_cursor`.
+ * @async
+ * @function fetchReadingsBatch
+ * @param {string[]} facilityNames - Nazwy obiektów.
+ * @param {Object} [options]
+ * @param {string[]} [options.meterTypes] - Typy liczników; bez nich pobierane są odczyty wszystkich liczników.
+ * @param {string} [options.from] - Data początkowa (YYYY-MM-DD), włącznie.
+ * @param {string} [options.to] - Data końcowa (YYYY-MM-DD), włącznie.
+ * @param {RequestInit} [options.init] - Dodatkowe opcje przekazywane do fetch.
+ * @param {string} [options.errorMessage] - Komunikat błędu, gdy serwer nie poda szczegółów.
+ * @returns {Promise<Object<string, Object[]>>} Odczyty każdego obiektu posortowane według daty.
+ * @throws {Error} Gdy którekolwiek zapytanie się nie powiedzie.
+ */
+export async function fetchReadingsBatch(facilityNames, {
+    meterTypes,
+    from,
+    to,
+    init,
+    errorMessage = 'Nie udało się pobrać odczytów.',
+} = {}) {
+    const readings = {};
+    for (let start = 0; start < facilityNames.length; start += BATCH_FACILITIES) {
+        let cursor = null;
+        do {
+            const response = await fetch(`${API_URL}/readings/batch`, {
+                ...init,
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    facility_names: facilityNames.slice(start, start + BATCH_FACILITIES),
+                    meter_types: meterTypes,
+                    date_from: from,
+                    date_to: to,
+                    cursor,
+                }),
+            });
+            if (!response.ok) {
+                const errorData = await response.json().catch(() => ({}));
+                throw new Error(errorData.detail || errorMessage);
+            }
+            const data = await response.json();
+            Object.entries(data.readings).forEach(([name, rows]) => {
+                readings[name] = (readings[name] || []).concat(rows);
+            });
+            cursor = data.next_cursor;
+        } while (cursor);
+    }
+    return readings;
+}
@@ -0,0 +1,62 @@
+import { API_URL } from '../definitions';
+
+/**
+ * Rok, za który generowane są raporty (grudzień roku poprzedniego + styczeń-grudzień).
+ * @constant {number}
+ */
+export const REPORT_YEAR = 2025;
+
+/**
+ * Pobiera gotowy raport zużycia z serwera (jedno zapytanie niezależnie od liczby obiektów).
+ * @async
+ * @function fetchConsumptionReport
+ * @param {Object} options
+ * @param {string} options.facility - Nazwa obiektu lub "__ALL__" dla wszystkich obiektów użytkownika.
+ * @param {string} options.email - Email użytkownika, którego obiekty są raportowane.
+ * @param {string[]} options.meterTypes - Typy liczników ujęte w raporcie.
+ * @param {number} [options.year] - Raportowany rok.
+ * @returns {Promise<Object>} Raport: { months, rows, total }.
+ * @throws {Error} Gdy serwer zwróci błąd.
+ */
+export async function fetchConsumptionReport({ facility, email, meterTypes, year = REPORT_YEAR }) {
+    const params = new URLSearchParams();
+    meterTypes.forEach(type => params.append('meter_type', type));
+    params.append('year', year);
+    params.append('facility_name', facility);
+    if (email) params.append('email', email);
+
+    const response = await fetch(`${API_URL}/reports/consumption?${params.toString()}`);
+    if (!response.ok) throw new Error('Nie udało się pobrać raportu.');
+    const data = await response.json();
+    return data.report;
+}
+
+/**
+ * Pobiera raport CSV (separator ";", format liczb pl-PL) generowany strumieniowo po stronie serwera.
+ * Plik jest zapisywany bezpośrednio przez przeglądarkę, bez budowania go w pamięci.
+ * @function generateConsumptionReport
+ * @param {Object} options
+ * @param {string} options.facility - Nazwa obiektu lub "__ALL__".
+ * @param {string} options.email - Email użytkownika.
+ * @param {string[]} options.meterTypes - Typy liczników ujęte w raporcie.
+ * @param {string} options.filePrefix - Prefiks nazwy pliku, np. "Raport_Woda".
+ * @param {number} [options.year] - Raportowany rok.
+ * @returns {void}
+ */
+export function generateConsumptionReport({ facility, email, meterTypes, filePrefix, year = REPORT_YEAR }) {
+    const params = new URLSearchParams();
+    meterTypes.forEach(type => params.append('meter_type', type));
+    params.append('year', year);
+    params.append('facility_name', facility);
+    if (email) params.append('email', email);
+
+    const filename = facility === "__ALL__"
+        ? `${filePrefix}_Wszystkie_obiekty.csv`
+        : `${filePrefix}_${facility}.csv`;
+    const link = document.createElement('a');
+    link.href = `${API_URL}/reports/consumption/export?${params.toString()}`;
+    link.setAttribute('download', filename);
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+}
@@ -0,0 +1,113 @@
+import { API_URL } from '../definitions';
+
+/**
+ * Pobiera wszystkie strony wyników wyszukiwania, podążając za `next_cursor` zwracanym przez serwer.
+ * @async
+ * @function fetchAllPages
+ * @param {string} url - Adres endpointu /search.
+ * @param {Object<string, string>} filters - Parametry zapytania; puste wartości są pomijane.
+ * @param {string} key - Klucz listy wyników w odpowiedzi ('meters' lub 'readings').
+ * @param {RequestInit} [init] - Dodatkowe opcje przekazywane do fetch.
+ * @param {string} errorMessage - Komunikat błędu, gdy serwer nie poda szczegółów.
+ * @returns {Promise<Object[]>} Wyniki w kolejności zwróconej przez serwer.
+ * @throws {Error} Gdy którakolwiek strona nie zostanie pobrana.
+ */
+async function fetchAllPages(url, filters, key, init, errorMessage) {
+    const results = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams();
+        Object.entries(filters).forEach(([name, value]) => {
+            if (value) params.append(name, value);
+        });
+        if (cursor) params.append('cursor', cursor);
+
+        const response = await fetch(`${url}?${params.toString()}`, init);
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.detail || errorMessage);
+        }
+        const data = await response.json();
+        if (Array.isArray(data[key])) results.push(...data[key]);
+        cursor = data.next_cursor;
+    } while (cursor);
+
+    return results;
+}
+
+/**
+ * Wyszukuje liczniki obiektu po stronie serwera.
+ * @async
+ * @function searchMeters
+ * @param {string} facilityName - Nazwa obiektu.
+ * @param {Object} [options]
+ * @param {string} [options.meterType] - Typ licznika.
+ * @param {string} [options.serialPrefix] - Początek numeru seryjnego (bez rozróżniania wielkości liter).
+ * @param {string} [options.ppePrefix] - Początek numeru PPE.
+ * @param {string} [options.description] - Fragment opisu licznika.
+ * @param {string} [options.sort] - Klucz sortowania: 'serial_number' lub 'meter_type'.
+ * @param {string} [options.order] - Kolejność: 'asc' lub 'desc'.
+ * @param {RequestInit} [options.init] - Dodatkowe opcje przekazywane do fetch.
+ * @param {string} [options.errorMessage] - Komunikat błędu, gdy serwer nie poda szczegółów.
+ * @returns {Promise<Object[]>} Znalezione liczniki.
+ * @throws {Error} Gdy wyszukiwanie się nie powiedzie.
+ */
+export async function searchMeters(facilityName, {
+    meterType,
+    serialPrefix,
+    ppePrefix,
+    description,
+    sort,
+    order,
+    init,
+    errorMessage = 'Nie udało się wyszukać liczników.',
+} = {}) {
+    const url = `${API_URL}/search/meters/${encodeURIComponent(facilityName)}`;
+    const filters = {
+        meter_type: meterType,
+        serial_prefix: serialPrefix,
+        ppe_prefix: ppePrefix,
+        description,
+        sort,
+        order,
+    };
+    return fetchAllPages(url, filters, 'meters', init, errorMessage);
+}
+
+/**
+ * Wyszukuje odczyty obiektu po stronie serwera, według licznika i daty.
+ * @async
+ * @function searchReadings
+ * @param {string} facilityName - Nazwa obiektu.
+ * @param {Object} [options] - Filtry licznika jak w {@link searchMeters}, a ponadto:
+ * @param {string} [options.from] - Data początkowa (YYYY-MM-DD), włącznie.
+ * @param {string} [options.to] - Data końcowa (YYYY-MM-DD), włącznie.
+ * @param {string} [options.sort] - Klucz sortowania: 'reading_date', 'value' lub 'serial_number'.
+ * @returns {Promise<Object[]>} Znalezione odczyty.
+ * @throws {Error} Gdy wyszukiwanie się nie powiedzie.
+ */
+export async function searchReadings(facilityName, {
+    meterType,
+    serialPrefix,
+    ppePrefix,
+    description,
+    from,
+    to,
+    sort,
+    order,
+    init,
+    errorMessage = 'Nie udało się wyszukać odczytów.',
+} = {}) {
+    const url = `${API_URL}/search/readings/${encodeURIComponent(facilityName)}`;
+    const filters = {
+        meter_type: meterType,
+        serial_prefix: serialPrefix,
+        ppe_prefix: ppePrefix,
+        description,
+        from,
+        to,
+        sort,
+        order,
+    };
+    return fetchAllPages(url, filters, 'readings', init, errorMessage);
+}
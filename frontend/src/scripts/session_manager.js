@@ -1,4 +1,5 @@
 import { setSecureCookie, getSecureCookie, removeSecureCookie } from '../utils/Cookies';
+import { API_URL } from '../definitions';
 
 class SessionManager {
     constructor() {
@@ -10,6 +11,8 @@ class SessionManager {
             isAuthenticated: true,
             accessLevel: userData.access_level,
             email: userData.email,
+            accessToken: userData.access_token,
+            refreshToken: userData.refresh_token,
             timestamp: Date.now()
         };
 
@@ -50,11 +53,65 @@ class SessionManager {
         return this.session.isAuthenticated;
     }
 
+    getAccessToken() {
+        return this.session.accessToken;
+    }
+
+    /**
+     * Nagłówki autoryzacji dla zapytań do API wymagających zalogowania.
+     */
+    authHeaders() {
+        return this.session.accessToken ? { Authorization: `Bearer ${this.session.accessToken}` } : {};
+    }
+
+    /**
+     * Wymienia refresh token na nową parę tokenów.
+     * @returns {Promise<boolean>} true, jeśli sesja została odświeżona.
+     */
+    async refreshTokens() {
+        if (!this.session.refreshToken) return false;
+        const response = await fetch(`${API_URL}/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: this.session.refreshToken })
+        });
+        if (!response.ok) {
+            this.clearSession();
+            return false;
+        }
+        const data = await response.json();
+        this.session.accessToken = data.access_token;
+        this.session.refreshToken = data.refresh_token;
+        this.session.accessLevel = data.access_level;
+        this.updateSessionTimestamp();
+        return true;
+    }
+
+    /**
+     * Unieważnia tokeny na serwerze i czyści sesję lokalnie.
+     */
+    async logout() {
+        const { accessToken, refreshToken } = this.session;
+        this.clearSession();
+        if (!accessToken) return;
+        try {
+            await fetch(`${API_URL}/logout`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${accessToken}` },
+                body: JSON.stringify({ refresh_token: refreshToken })
+            });
+        } catch (error) {
+            console.error('Error revoking session:', error);
+        }
+    }
+
     clearSession() {
         this.session = {
             isAuthenticated: false,
             accessLevel: null,
-            user: null
+            user: null,
+            accessToken: null,
+            refreshToken: null
         };
         localStorage.removeItem('userSession');
         removeSecureCookie('isAuthenticated');